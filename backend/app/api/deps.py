@@ -6,7 +6,7 @@ from sqlalchemy import select
 
 from app.core.database import AsyncSessionLocal
 from app.core.security import verify_token
-from app.core.redis_client import RedisClient, get_redis
+from app.core.principal_cache import principal_cache
 from app.models.user import User, Role
 
 # Security scheme
@@ -35,15 +35,21 @@ async def get_current_user(
             detail="Could not validate credentials"
         )
     
-    # Get user from database
-    result = await db.execute(select(User).where(User.username == username))
-    user = result.scalar_one_or_none()
-    
+    # Get user from cache, falling back to the database
+    issued_at = payload.get("iat")
+    user = await principal_cache.get(username, issued_at)
     if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
+        generation = await principal_cache.generation(username)
+        result = await db.execute(select(User).where(User.username == username))
+        user = result.scalar_one_or_none()
+        
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found"
+            )
+        
+        await principal_cache.set(username, issued_at, user, generation)
     
     if not user.is_active:
         raise HTTPException(
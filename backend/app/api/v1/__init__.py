@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1 import auth, stations, sessions, users, dashboard, analytics
+from app.api.v1 import auth, stations, sessions, users, dashboard, analytics, exports
 
 api_router = APIRouter()
 
@@ -9,3 +9,4 @@ api_router.include_router(sessions.router, prefix="/sessions", tags=["Sessions"]
 api_router.include_router(users.router, prefix="/users", tags=["Users"])
 api_router.include_router(dashboard.router, prefix="/dashboard", tags=["Dashboard"])
 api_router.include_router(analytics.router, prefix="/analytics", tags=["Analytics"])
+api_router.include_router(exports.router, prefix="/exports", tags=["Exports"])
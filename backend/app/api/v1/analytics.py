@@ -14,6 +14,36 @@ from app.services.analytics_service import AnalyticsService
 router = APIRouter()
 
 
+@router.get("/overview")
+async def get_analytics_overview(
+    period: Literal['day', 'week', 'month'] = Query('week', description="Time period for analytics"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get the analytics page in one round trip
+    
+    **Admin only endpoint**
+    
+    Returns the revenue, sessions, utilization and peak-hours payloads
+    (same shapes as their individual endpoints), computed concurrently.
+    
+    Args:
+        period: Time period ('day', 'week', or 'month')
+    
+    Returns:
+        Combined analytics data
+    """
+    # Check if user is admin
+    if current_user.role != 'ADMIN':
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    analytics_service = AnalyticsService(db)
+    data = await analytics_service.get_overview(period)
+    
+    return data
+
+
 @router.get("/revenue")
 async def get_revenue_analytics(
     period: Literal['day', 'week', 'month'] = Query('week', description="Time period for analytics"),
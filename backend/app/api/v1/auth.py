@@ -6,14 +6,15 @@ import logging
 
 from app.api.deps import get_db, get_current_user
 from app.core.security import (
-    verify_password, 
+    password_hasher,
+    password_needs_rehash,
     create_access_token, 
     create_refresh_token,
     create_password_reset_token,
-    verify_password_reset_token,
-    get_password_hash
+    verify_password_reset_token
 )
 from app.core.config import settings
+from app.core.principal_cache import principal_cache
 from app.models.user import User
 from app.schemas.user import UserLogin, UserResponse
 from app.schemas.auth import Token, PasswordResetRequest, PasswordResetConfirm
@@ -52,7 +53,7 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    if not verify_password(credentials.password, user.password_hash):
+    if not await password_hasher.verify(credentials.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -74,10 +75,16 @@ async def login(
         data={"sub": user.username, "user_id": str(user.id)}
     )
     
+    # Upgrade the hash if the work factor changed
+    if password_needs_rehash(user.password_hash):
+        user.password_hash = await password_hasher.hash(credentials.password)
+        logger.info(f"Upgraded password hash for user: {user.username}")
+    
     # Update last login
     from datetime import datetime
     user.last_login = datetime.utcnow()
     await db.commit()
+    await principal_cache.invalidate(user.username)
     
     return Token(
         access_token=access_token,
@@ -239,10 +246,14 @@ async def confirm_password_reset(
             detail="User account is inactive"
         )
     
+    # Hash outside the try so a busy hasher's 503 isn't reported as a 500
+    password_hash = await password_hasher.hash(reset_data.new_password)
+
     # Update password
     try:
-        user.password_hash = get_password_hash(reset_data.new_password)
+        user.password_hash = password_hash
         await db.commit()
+        await principal_cache.invalidate(user.username)
         logger.info(f"Password successfully reset for user: {user.username}")
         
         return {
@@ -0,0 +1,52 @@
+from datetime import date, datetime, time, timedelta
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from app.api.deps import get_current_admin
+from app.core.database import engine
+from app.core.timezone import get_shift_start
+from app.models.user import User
+from app.services.export_service import MEDIA_TYPES, stream_export
+
+router = APIRouter()
+
+@router.get("/{dataset}")
+async def export_dataset(
+    dataset: Literal["sessions", "payments", "events"],
+    from_date: date = Query(..., description="First shift date (the shift starting 6 AM that day)"),
+    to_date: Optional[date] = Query(None, description="Last shift date, inclusive (defaults to from_date)"),
+    export_format: Literal["csv", "ndjson"] = Query("csv", alias="format"),
+    gzip: bool = Query(False, description="Gzip-compress the file"),
+    current_user: User = Depends(get_current_admin)
+):
+    """
+    Stream an export of sessions, payments or events (Admin only)
+    
+    Covers whole shifts: from 6 AM local time on from_date up to 6 AM the
+    day after to_date. Rows are streamed as they are read, so any range
+    can be exported.
+    """
+    to_date = to_date or from_date
+    if to_date < from_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="to_date must not be before from_date"
+        )
+    
+    start = get_shift_start(datetime.combine(from_date, time(6)))
+    # Localize the next 6 AM directly so a DST change inside the range is honoured
+    end = get_shift_start(datetime.combine(to_date + timedelta(days=1), time(6)))
+    
+    filename = f"{dataset}_{from_date.isoformat()}_{to_date.isoformat()}.{export_format}"
+    media_type = MEDIA_TYPES[export_format]
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+    
+    return StreamingResponse(
+        stream_export(engine, dataset, export_format, start, end, gzip=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
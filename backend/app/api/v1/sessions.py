@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List
+from sqlalchemy import select, tuple_
+from typing import List, Optional, Tuple
 from uuid import UUID
 from datetime import datetime, timedelta, timezone
+import base64
 import logging
 
 from app.api.deps import get_db, get_current_staff
@@ -12,27 +13,80 @@ from app.models.station import Station, StationStatus
 from app.models.payment import Payment, PaymentStatus
 from app.models.user import User
 from app.schemas.session import SessionCreate, SessionExtend, SessionResponse
-from app.websocket.manager import connection_manager
+from app.websocket.rpc import agent_rpc
 from app.websocket.dashboard_manager import dashboard_manager
 from app.core.redis import redis_manager
+from app.scheduler.session_monitor import session_monitor
 from app.services.event_logger import EventLogger, EventType
+from app.services.analytics_rollup import AnalyticsRollup
+from app.services.analytics_cache import analytics_cache
+from app.services.station_registry import station_registry
 from app.core.timezone import get_current_time, format_datetime_for_display
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+def _encode_cursor(session: Session) -> str:
+    """Opaque cursor pointing just past a session in (started_at, id) order"""
+    raw = f"{session.started_at.isoformat()}|{session.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Parse a cursor produced by _encode_cursor"""
+    try:
+        started_at, session_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(started_at), UUID(session_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
 @router.get("", response_model=List[SessionResponse])
 async def get_all_sessions(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500, description="Page size"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    station_id: Optional[UUID] = Query(None),
+    status_filter: Optional[SessionStatus] = Query(None, alias="status"),
+    created_by: Optional[UUID] = Query(None, description="Staff user who started the session"),
+    started_from: Optional[datetime] = Query(None, description="Sessions started at or after this time"),
+    started_to: Optional[datetime] = Query(None, description="Sessions started before this time"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_staff)
 ):
     """
-    Get all sessions
+    Get sessions, newest first
+    
+    Keyset-paginated on (started_at, id): when more sessions exist the
+    X-Next-Cursor response header holds the cursor for the next page.
     """
+    query = select(Session)
+    
+    if station_id:
+        query = query.where(Session.station_id == station_id)
+    if status_filter:
+        query = query.where(Session.status == status_filter)
+    if created_by:
+        query = query.where(Session.created_by == created_by)
+    if started_from:
+        query = query.where(Session.started_at >= started_from)
+    if started_to:
+        query = query.where(Session.started_at < started_to)
+    if cursor:
+        cursor_started_at, cursor_id = _decode_cursor(cursor)
+        query = query.where(tuple_(Session.started_at, Session.id) < tuple_(cursor_started_at, cursor_id))
+    
+    # One extra row tells us whether there is a next page
     result = await db.execute(
-        select(Session).order_by(Session.started_at.desc())
+        query.order_by(Session.started_at.desc(), Session.id.desc()).limit(limit + 1)
     )
     sessions = result.scalars().all()
+    
+    if len(sessions) > limit:
+        sessions = sessions[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(sessions[-1])
+    
     return sessions
 
 @router.post("", response_model=SessionResponse, status_code=status.HTTP_201_CREATED)
@@ -111,25 +165,32 @@ async def create_session(
         # Update station status
         station.status = StationStatus.IN_SESSION
         
+        # Update analytics facts in the same transaction
+        await db.flush()
+        await AnalyticsRollup(db).record_session_started(session.id, payment.id)
+        
         await db.commit()
         await db.refresh(session)
         await db.refresh(station)  # Refresh station to load all attributes
+        await station_registry.sync_station(station)
+        await station_registry.sync_session(session)
+        await analytics_cache.invalidate()
         
         logger.info(f"Session created: {session.id} for {station.name} - Started: {format_datetime_for_display(started_at)}")
         
-        # Notify agent via WebSocket
-        await connection_manager.send_to_station(str(session.station_id), {
-            "type": "session_start",
-            "data": {
-                "id": str(session.id),
-                "user_name": session.user_name,
-                "started_at": session.started_at.isoformat(),
-                "scheduled_end_at": session.scheduled_end_at.isoformat(),
-                "duration_minutes": session.duration_minutes,
-                "extended_minutes": session.extended_minutes,
-            }
+        # Schedule expiry at the session deadline
+        await session_monitor.schedule_session(str(session.id), str(session.station_id), session.scheduled_end_at)
+        
+        # Start the session on the agent; dashboards get its confirmation
+        agent_rpc.send_session_command(str(session.station_id), str(session.id), "session_start", {
+            "id": str(session.id),
+            "user_name": session.user_name,
+            "started_at": session.started_at.isoformat(),
+            "scheduled_end_at": session.scheduled_end_at.isoformat(),
+            "duration_minutes": session.duration_minutes,
+            "extended_minutes": session.extended_minutes,
         })
-        logger.info(f"Session start notification sent to station {station.name}")
+        logger.info(f"Session start command sent to station {station.name}")
         
         # Broadcast session update to all dashboards
         session_dict = SessionResponse.model_validate(session).model_dump(mode='json')
@@ -140,11 +201,17 @@ async def create_session(
         station_dict = StationResponseSchema.model_validate(station).model_dump(mode='json')
         await dashboard_manager.send_station_update(station_dict)
         
-        # Cache session in Redis
-        await redis_manager.cache_session(
-            str(session.id),
-            session_dict,
-            ttl=session_data.duration_minutes * 60 + 300  # Session duration + 5 min buffer
+        # Cache session and station status in Redis (one round trip)
+        await (
+            redis_manager.batch()
+            .cache_session(
+                str(session.id),
+                session_dict,
+                ttl=session_data.duration_minutes * 60 + 300,  # Session duration + 5 min buffer
+                scheduled_end_at=session.scheduled_end_at
+            )
+            .cache_station_status(str(station.id), station.status.value)
+            .execute()
         )
         
         # Log event
@@ -158,7 +225,9 @@ async def create_session(
                 "station_name": station.name,
                 "duration_minutes": session_data.duration_minutes,
                 "amount": float(session_data.amount)
-            }
+            },
+            # A payment was taken: commit the audit record, don't queue it
+            durable=True
         )
         
         return session
@@ -235,31 +304,38 @@ async def extend_session(
     session.extended_minutes += extend_data.additional_minutes
     session.scheduled_end_at += timedelta(minutes=extend_data.additional_minutes)
     
+    # Update analytics facts in the same transaction
+    await db.flush()
+    await AnalyticsRollup(db).record_session_extended(session.id, payment.id, extend_data.additional_minutes)
+    
     await db.commit()
     await db.refresh(session)
+    await station_registry.sync_session(session)
+    await analytics_cache.invalidate([session.started_at])
     
     logger.info(f"Session extended: {session.id} by {extend_data.additional_minutes} minutes")
     
+    # Move the expiry deadline
+    await session_monitor.schedule_session(str(session.id), str(session.station_id), session.scheduled_end_at)
+    
     # Broadcast session update to all dashboards
     session_dict = SessionResponse.model_validate(session).model_dump(mode='json')
     await dashboard_manager.send_session_update(session_dict)
     
-    # Notify agent via WebSocket
-    await connection_manager.send_to_station(str(session.station_id), {
-        "type": "session_extended",
-        "data": {
-            "id": str(session.id),
-            "extended_minutes": extend_data.additional_minutes,
-            "new_end_time": session.scheduled_end_at.isoformat(),
-            "total_extended_minutes": session.extended_minutes
-        }
+    # Extend the session on the agent; dashboards get its confirmation
+    agent_rpc.send_session_command(str(session.station_id), str(session.id), "session_extended", {
+        "id": str(session.id),
+        "extended_minutes": extend_data.additional_minutes,
+        "new_end_time": session.scheduled_end_at.isoformat(),
+        "total_extended_minutes": session.extended_minutes
     })
     
     # Update Redis cache
     await redis_manager.cache_session(
         str(session.id),
         session_dict,
-        ttl=(session.duration_minutes + session.extended_minutes) * 60 + 300
+        ttl=(session.duration_minutes + session.extended_minutes) * 60 + 300,
+        scheduled_end_at=session.scheduled_end_at
     )
     
     # Log event
@@ -272,7 +348,9 @@ async def extend_session(
             "additional_minutes": extend_data.additional_minutes,
             "total_extended_minutes": session.extended_minutes,
             "amount": float(extend_data.amount)
-        }
+        },
+        # Extension payment: committed like the one at session start
+        durable=True
     )
     
     return session
@@ -316,13 +394,23 @@ async def stop_session(
         station.status = StationStatus.ONLINE
         logger.info(f"Station {station.name} reset to ONLINE after session stop")
     
+    # Update analytics facts in the same transaction
+    await db.flush()
+    await AnalyticsRollup(db).record_sessions_closed([session.id])
+    
     await db.commit()
     await db.refresh(session)
+    await station_registry.sync_session(session)
+    await analytics_cache.invalidate([session.started_at])
     if station:
         await db.refresh(station)  # Refresh station to load all attributes
+        await station_registry.sync_station(station)
     
     logger.info(f"Session stopped: {session.id}")
     
+    # No longer needs to expire
+    await session_monitor.cancel_session(str(session.id))
+    
     # Broadcast session update to all dashboards
     session_dict = SessionResponse.model_validate(session).model_dump(mode='json')
     await dashboard_manager.send_session_update(session_dict)
@@ -333,18 +421,18 @@ async def stop_session(
         station_dict = StationResponseSchema.model_validate(station).model_dump(mode='json')
         await dashboard_manager.send_station_update(station_dict)
     
-    # Notify agent via WebSocket
-    await connection_manager.send_to_station(str(session.station_id), {
-        "type": "session_end",
-        "data": {
-            "id": str(session.id),
-            "ended_at": session.actual_end_at.isoformat(),
-            "reason": "manual_stop"
-        }
+    # End the session on the agent; dashboards get its confirmation
+    agent_rpc.send_session_command(str(session.station_id), str(session.id), "session_end", {
+        "id": str(session.id),
+        "ended_at": session.actual_end_at.isoformat(),
+        "reason": "manual_stop"
     })
     
-    # Remove from Redis cache
-    await redis_manager.delete_session(str(session.id))
+    # Remove from Redis cache and refresh station status (one round trip)
+    batch = redis_manager.batch().delete_sessions([str(session.id)])
+    if station:
+        batch.cache_station_status(str(station.id), station.status.value)
+    await batch.execute()
     
     # Log event
     await EventLogger.log_session_event(
@@ -355,7 +443,8 @@ async def stop_session(
         data={
             "reason": "manual_stop",
             "ended_by": current_user.username
-        }
+        },
+        durable=True
     )
     
     return session
@@ -1,15 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List, Optional
+from typing import List, Literal, Optional
 from uuid import UUID
+from datetime import datetime, timedelta, timezone
 import logging
 
 from app.api.deps import get_db, get_current_staff, get_current_admin
+from app.core.config import settings
 from app.models.station import Station, StationType, ControlMethod, StationStatus
 from app.models.user import User
-from app.schemas.station import StationCreate, StationUpdate, StationResponse
+from app.schemas.station import (
+    StationCreate, StationUpdate, StationResponse,
+    StationCommandRequest, StationCommandResponse
+)
+from app.services.station_registry import station_registry
+from app.services.station_telemetry import telemetry_store
 from app.websocket.dashboard_manager import dashboard_manager
+from app.websocket.rpc import agent_rpc
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -97,6 +105,7 @@ async def create_station(
         db.add(station)
         await db.commit()
         await db.refresh(station)
+        await station_registry.sync_station(station)
         
         logger.info(f"Station created successfully: {station.name} (ID: {station.id})")
         return station
@@ -157,6 +166,7 @@ async def update_station(
         
         await db.commit()
         await db.refresh(station)
+        await station_registry.sync_station(station)
         
         logger.info(f"Station updated successfully: {station.name} (ID: {station.id})")
         
@@ -223,6 +233,12 @@ async def delete_station(
             logger.info(f"Station soft deleted: {station.name} (ID: {station.id})")
         
         await db.commit()
+        if permanent:
+            await station_registry.remove_station(str(station_id))
+            # Pending samples would now violate the foreign key on flush
+            telemetry_store.discard(str(station_id))
+        else:
+            await station_registry.sync_station(station)
         return None
         
     except Exception as e:
@@ -233,6 +249,71 @@ async def delete_station(
             detail=f"Failed to delete station: {str(e)}"
         )
 
+@router.post("/commands", response_model=StationCommandResponse)
+async def send_station_command(
+    request: StationCommandRequest,
+    current_user: User = Depends(get_current_staff)
+):
+    """
+    Send a command to several station agents and wait for their replies
+    
+    Commands go out concurrently; each station's result says whether its
+    agent confirmed, reported failure, timed out or is offline.
+    """
+    station_ids = list(dict.fromkeys(str(station_id) for station_id in request.station_ids))
+    if len(station_ids) > settings.AGENT_RPC_MAX_STATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.AGENT_RPC_MAX_STATIONS} stations per command"
+        )
+    
+    results = await agent_rpc.call_many(station_ids, request.command, timeout=request.timeout)
+    succeeded = sum(1 for result in results if result["ok"])
+    
+    logger.info(
+        f"Command {request.command} sent to {len(station_ids)} station(s) by {current_user.username}: "
+        f"{succeeded} confirmed"
+    )
+    
+    return {
+        "command": request.command,
+        "requested": len(station_ids),
+        "succeeded": succeeded,
+        "failed": len(station_ids) - succeeded,
+        "results": results
+    }
+
+@router.get("/{station_id}/telemetry")
+async def get_station_telemetry(
+    station_id: UUID,
+    start: Optional[datetime] = Query(None, description="Defaults to 24 hours before end"),
+    end: Optional[datetime] = Query(None, description="Defaults to now"),
+    resolution: Optional[Literal[60, 900, 3600]] = Query(None, description="Bucket seconds; chosen from the range if omitted"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_staff)
+):
+    """
+    Get CPU, memory, disk and lock-state history reported by a station's agent
+    
+    Points carry per-bucket averages and maxima; `latest` is the newest raw
+    sample if the agent is connected to this worker.
+    """
+    # Naive query times are taken as UTC
+    if end is not None and end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    if start is not None and start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+
+    end = end or datetime.now(timezone.utc)
+    start = start or end - timedelta(hours=24)
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be before end"
+        )
+    
+    return await telemetry_store.get_history(db, station_id, start, end, resolution)
+
 @router.post("/{station_id}/restore", response_model=StationResponse)
 async def restore_station(
     station_id: UUID,
@@ -260,6 +341,7 @@ async def restore_station(
         station.deleted_at = None
         await db.commit()
         await db.refresh(station)
+        await station_registry.sync_station(station)
         
         logger.info(f"Station restored: {station.name} (ID: {station.id})")
         return station
@@ -8,7 +8,8 @@ import logging
 from app.api.deps import get_db, get_current_admin, get_current_user
 from app.models.user import User, Role
 from app.schemas.user import UserCreate, UserUpdate, UserResponse
-from app.core.security import get_password_hash
+from app.core.security import password_hasher
+from app.core.principal_cache import principal_cache
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -80,12 +81,15 @@ async def create_user(
                 detail=f"Email '{user_data.email}' already exists"
             )
     
+    # Hash outside the try so a busy hasher's 503 isn't reported as a 500
+    password_hash = await password_hasher.hash(user_data.password)
+    
     # Create user - wrap in try/except to catch database errors
     try:
         user_dict = user_data.model_dump(exclude={"password"})
         user = User(
             **user_dict,
-            password_hash=get_password_hash(user_data.password)
+            password_hash=password_hash
         )
         
         db.add(user)
@@ -188,9 +192,10 @@ async def reset_user_password(
         )
     
     # Update password
-    user.password_hash = get_password_hash(password)
+    user.password_hash = await password_hasher.hash(password)
     await db.commit()
     await db.refresh(user)
+    await principal_cache.invalidate(user.username)
     
     if user.id == current_user.id:
         logger.info(f"User {user.username} reset their own password")
@@ -229,6 +234,7 @@ async def toggle_user_status(
     user.is_active = not user.is_active
     await db.commit()
     await db.refresh(user)
+    await principal_cache.invalidate(user.username)
     
     status_text = "enabled" if user.is_active else "disabled"
     logger.info(f"User {user.username} {status_text} by admin: {current_user.username}")
@@ -18,12 +18,19 @@ class Settings(BaseSettings):
     
     # Redis
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    REDIS_MAX_CONNECTIONS: int = 50  # shared pool for cache, leases and pub/sub
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30  # seconds idle before a pooled connection is re-checked
     
     # Security
     SECRET_KEY: str = os.getenv("SECRET_KEY", "change-me-in-production")
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    PRINCIPAL_CACHE_TTL: int = 60  # seconds an authenticated user is served from cache
+    PRINCIPAL_CACHE_SIZE: int = 1024  # tokens kept in each worker's LRU
+    BCRYPT_ROUNDS: int = 12  # work factor; existing hashes are upgraded on login
+    PASSWORD_HASH_WORKERS: int = 2  # threads per worker running bcrypt
+    PASSWORD_HASH_MAX_QUEUE: int = 32  # waiting hash calls before returning 503
     
     # CORS
     CORS_ORIGINS: str = "http://localhost:3000,https://admin.venue.local,https://venue.local"
@@ -36,9 +43,50 @@ class Settings(BaseSettings):
     # WebSocket
     WS_HEARTBEAT_INTERVAL: int = 30
     WS_HEARTBEAT_TIMEOUT: int = 90
+    WS_HEARTBEAT_SWEEP_INTERVAL: float = 1.0  # seconds between stale-agent sweeps
+    AGENT_MAX_IN_FLIGHT: int = 8  # concurrent message handlers per agent connection
+    AGENT_MAX_QUEUED_MESSAGES: int = 100  # ordered messages buffered per lane before reads pause
+    AGENT_DRAIN_TIMEOUT: int = 5  # seconds pending handlers get to finish after a disconnect
+    AGENT_RPC_TIMEOUT: float = 5.0  # seconds to wait for an agent's reply per attempt
+    AGENT_RPC_RETRIES: int = 1  # extra attempts for idempotent commands
+    AGENT_RPC_MAX_STATIONS: int = 200  # stations per bulk command request
+    
+    # Dashboard WebSocket fan-out
+    DASHBOARD_SEND_QUEUE_SIZE: int = 100  # messages buffered per dashboard
+    DASHBOARD_SLOW_CONSUMER_POLICY: str = "coalesce"  # drop, coalesce or disconnect
+    
+    # Event log writer
+    EVENT_SINK_QUEUE_SIZE: int = 10000  # events buffered before new ones are dropped
+    EVENT_SINK_BATCH_SIZE: int = 500  # rows per INSERT
+    EVENT_SINK_FLUSH_INTERVAL: float = 1.0  # seconds, max delay before a batch is written
+    EVENT_PARTITION_MONTHS_AHEAD: int = 2  # monthly partitions created in advance
+    EVENT_RETENTION_DAYS: int = 180  # raw events older than this are rolled up and removed
+    EVENT_ARCHIVE_PARTITIONS: bool = False  # detach and keep expired partitions instead of dropping
+    EVENT_MAINTENANCE_INTERVAL: int = 21600  # seconds
+    
+    # Agent telemetry (status_update samples)
+    TELEMETRY_FLUSH_INTERVAL: int = 60  # seconds between batched writes
+    TELEMETRY_MAX_PENDING: int = 10000  # minute aggregates kept while the database is unavailable
+    TELEMETRY_MINUTE_RETENTION_HOURS: int = 48
+    TELEMETRY_QUARTER_RETENTION_DAYS: int = 30  # 15-minute tier
+    TELEMETRY_HOUR_RETENTION_DAYS: int = 365
+    TELEMETRY_RETENTION_INTERVAL: int = 3600  # seconds
+    
+    # Analytics
+    ANALYTICS_QUERY_CONCURRENCY: int = 4  # pooled connections one analytics request may use at once
+    
+    # Exports
+    EXPORT_BATCH_SIZE: int = 1000  # rows fetched per server-side cursor round trip
+    
+    # Analytics cache
+    ANALYTICS_CLOSED_CACHE_TTL: int = 8 * 24 * 3600  # seconds, completed-shift results (key changes each shift)
+    ANALYTICS_LIVE_CACHE_TTL: int = 30  # seconds, results that include the current shift
     
     # Session Monitor
     SESSION_CHECK_INTERVAL: int = 10  # seconds
+    SESSION_RECONCILE_INTERVAL: int = 300  # seconds, full DB resync of the expiry heap
+    SESSION_MONITOR_LEASE_TTL: int = 10  # seconds, leader failover time across workers
+    STATION_REGISTRY_RELOAD_INTERVAL: int = 300  # seconds, full DB reload of the in-memory station registry
     SESSION_WARNING_MINUTES: int = 5
     SESSION_FINAL_WARNING_MINUTES: int = 1
     
@@ -0,0 +1,99 @@
+"""In-process metric helpers"""
+import inspect
+import logging
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency buckets; a final bucket catches the rest
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram
+
+    Observing is a bisect and an increment, so it is cheap enough for every
+    message; percentiles are estimated as the upper bound of the bucket that
+    contains them.
+    """
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts: List[int] = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float):
+        """Record one latency in milliseconds"""
+        self.counts[bisect_left(self.buckets, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q: float) -> float:
+        """Estimated latency (ms) below which a fraction q of observations fall"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def snapshot(self) -> dict:
+        """Counts, average, maximum and estimated percentiles"""
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            "p50_ms": round(self.percentile(0.5), 2),
+            "p95_ms": round(self.percentile(0.95), 2),
+            "p99_ms": round(self.percentile(0.99), 2),
+            "buckets": {
+                **{f"le_{bound:g}": count for bound, count in zip(self.buckets, self.counts)},
+                "le_inf": self.counts[-1],
+            },
+        }
+
+class MetricsRegistry:
+    """
+    Named get_metrics() providers, collected for GET /dashboard/metrics
+
+    Subsystems register their provider next to their global instance (like
+    event bus handlers); a provider may be sync or async.
+    """
+
+    def __init__(self):
+        self.providers: Dict[str, Callable[[], Any]] = {}
+
+    def register(self, name: str, provider: Callable[[], Any]):
+        """Register a subsystem's metrics provider"""
+        self.providers[name] = provider
+
+    async def collect(self, names: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Metrics of every (or the named) subsystem
+
+        A failing provider reports its error instead of failing the rest.
+        """
+        selected = self.providers if names is None else {
+            name: self.providers[name] for name in names if name in self.providers
+        }
+        metrics = {}
+        for name, provider in selected.items():
+            try:
+                result = provider()
+                if inspect.isawaitable(result):
+                    result = await result
+                metrics[name] = result
+            except Exception as e:
+                logger.error(f"Failed to collect {name} metrics: {e}")
+                metrics[name] = {"error": str(e)}
+        return metrics
+
+# Global metrics registry instance
+metrics_registry = MetricsRegistry()
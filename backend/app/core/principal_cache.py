@@ -0,0 +1,191 @@
+"""Cache of authenticated users so protected requests skip the users lookup"""
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+from uuid import UUID
+
+from app.core.config import settings
+from app.core.redis import redis_manager
+from app.models.user import User, Role, MembershipTier
+from app.websocket.event_bus import event_bus
+
+logger = logging.getLogger(__name__)
+
+# Invalidation counters outlive any in-flight lookup by a wide margin
+GENERATION_TTL = 86400
+
+# Write the shared copy only if the user wasn't invalidated since the lookup began
+SET_SCRIPT = """
+if (redis.call('get', KEYS[2]) or '0') == ARGV[1] then
+    return redis.call('setex', KEYS[1], ARGV[3], ARGV[2])
+end
+return 0
+"""
+
+# Columns kept in the cache; the password hash is deliberately left out
+CACHED_FIELDS = (
+    "id", "username", "email", "full_name", "phone", "role",
+    "membership_tier", "balance", "is_active", "created_at", "last_login"
+)
+
+def _to_dict(user: User) -> dict:
+    """Flatten a User into JSON-safe values"""
+    data = {}
+    for field in CACHED_FIELDS:
+        value = getattr(user, field)
+        if isinstance(value, (UUID, Decimal)):
+            value = str(value)
+        elif isinstance(value, (Role, MembershipTier)):
+            value = value.value
+        elif isinstance(value, datetime):
+            value = value.isoformat()
+        data[field] = value
+    return data
+
+def _from_dict(data: dict) -> User:
+    """Rebuild a detached User from cached values"""
+    return User(
+        id=UUID(data["id"]),
+        username=data["username"],
+        email=data.get("email"),
+        full_name=data.get("full_name"),
+        phone=data.get("phone"),
+        role=Role(data["role"]),
+        membership_tier=MembershipTier(data["membership_tier"]) if data.get("membership_tier") else None,
+        balance=Decimal(data["balance"]) if data.get("balance") is not None else None,
+        is_active=data.get("is_active"),
+        created_at=datetime.fromisoformat(data["created_at"]) if data.get("created_at") else None,
+        last_login=datetime.fromisoformat(data["last_login"]) if data.get("last_login") else None
+    )
+
+class PrincipalCache:
+    """
+    Two-level cache of token principals
+
+    Entries are keyed by the token's sub and iat in an in-process LRU, backed
+    by a shared Redis copy per sub so other workers can fill their LRU without
+    touching the database. Both levels expire after PRINCIPAL_CACHE_TTL.
+
+    Anything that changes whether or how a user may authenticate (status,
+    password, role) must call invalidate(); it clears the Redis copy and
+    tells every worker to drop its local entries for that user.
+
+    Lookups that race an invalidation must not be cached. Each worker keeps a
+    local generation per user for its LRU, and a shared one in Redis guards
+    the Redis copy, since the bus message reaches other workers too late.
+    """
+
+    def __init__(self):
+        # "sub:iat" -> (expires_at, cached fields)
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        # Bumped on invalidation so a lookup that raced it isn't cached
+        self._generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def generation(self, sub: str) -> Tuple[int, Optional[int]]:
+        """
+        Current invalidation generations for a user (read before loading)
+
+        Returns:
+            (local generation, shared generation or None if Redis is unavailable)
+        """
+        local = self._generations.get(sub, 0)
+        if not redis_manager.is_connected:
+            return local, None
+        shared = await redis_manager.get(f"principal_gen:{sub}")
+        return local, shared or 0
+
+    async def get(self, sub: str, iat) -> Optional[User]:
+        """Get a cached principal, or None on a miss"""
+        key = f"{sub}:{iat}"
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, data = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return _from_dict(data)
+            del self._entries[key]
+
+        data = await self._get_shared(sub)
+        if data is not None:
+            self._store_local(key, data)
+            self.hits += 1
+            return _from_dict(data)
+
+        self.misses += 1
+        return None
+
+    async def set(self, sub: str, iat, user: User, generation: Tuple[int, Optional[int]]):
+        """Cache a principal loaded from the database"""
+        local, shared = generation
+        if self._generations.get(sub, 0) != local:
+            # Invalidated on this worker while we were loading it
+            return
+
+        data = _to_dict(user)
+        self._store_local(f"{sub}:{iat}", data)
+        if shared is not None:
+            await self._set_shared(sub, data, shared)
+
+    async def invalidate(self, sub: str):
+        """Drop a user everywhere after their status, password or role changed"""
+        self._invalidate_local(sub)
+        await (
+            redis_manager.batch()
+            .increment(f"principal_gen:{sub}", ttl=GENERATION_TTL)
+            .delete(f"principal:{sub}")
+            .execute()
+        )
+        await event_bus.publish("principal_invalidate", {"sub": sub})
+
+    def get_metrics(self) -> dict:
+        """Hit/miss counters"""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+    async def _get_shared(self, sub: str) -> Optional[dict]:
+        """Read the Redis copy, if any"""
+        return await redis_manager.get(f"principal:{sub}")
+
+    async def _set_shared(self, sub: str, data: dict, generation: int):
+        """Write the Redis copy unless the user was invalidated on any worker"""
+        if not redis_manager.is_connected:
+            return
+        try:
+            await redis_manager.redis.eval(
+                SET_SCRIPT, 2, f"principal:{sub}", f"principal_gen:{sub}",
+                generation, json.dumps(data), settings.PRINCIPAL_CACHE_TTL
+            )
+        except Exception as e:
+            logger.error(f"Failed to cache principal {sub}: {e}")
+
+    def _store_local(self, key: str, data: dict):
+        self._entries[key] = (time.monotonic() + settings.PRINCIPAL_CACHE_TTL, data)
+        self._entries.move_to_end(key)
+        while len(self._entries) > settings.PRINCIPAL_CACHE_SIZE:
+            self._entries.popitem(last=False)
+
+    def _invalidate_local(self, sub: str):
+        self._generations[sub] = self._generations.get(sub, 0) + 1
+        prefix = f"{sub}:"
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            del self._entries[key]
+
+    async def _handle_bus_invalidate(self, payload: dict):
+        """Drop local entries invalidated on another worker"""
+        sub = payload.get("sub")
+        if sub:
+            self._invalidate_local(sub)
+
+# Global principal cache instance
+principal_cache = PrincipalCache()
+event_bus.register("principal_invalidate", principal_cache._handle_bus_invalidate)
@@ -1,31 +1,142 @@
 """Redis connection and cache management"""
 import json
 import logging
-from typing import Optional, Any
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 from redis import asyncio as aioredis
 from app.core.config import settings
+from app.core.metrics import metrics_registry
 
 logger = logging.getLogger(__name__)
 
+# Sorted set of active session IDs scored by scheduled_end_at (epoch seconds)
+ACTIVE_SESSIONS_KEY = "sessions:active"
+# Index entries this far past their deadline are pruned (matches the cache TTL buffer)
+ACTIVE_SESSION_GRACE = 300
+
+class RedisBatch:
+    """
+    Cache writes queued for a single pipelined round trip
+    
+    Obtained from RedisManager.batch(); nothing is sent until execute().
+    """
+    
+    def __init__(self, manager: "RedisManager", transaction: bool = True):
+        self._manager = manager
+        self._transaction = transaction
+        self._ops: List[Callable] = []
+    
+    def __len__(self) -> int:
+        return len(self._ops)
+    
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> "RedisBatch":
+        """Queue a JSON value, with TTL if given"""
+        data = json.dumps(value, default=str)
+        if ttl:
+            self._ops.append(lambda pipe: pipe.setex(key, ttl, data))
+        else:
+            self._ops.append(lambda pipe: pipe.set(key, data))
+        return self
+    
+    def mset(self, values: Dict[str, Any], ttl: Optional[int] = None) -> "RedisBatch":
+        """Queue several JSON values sharing one TTL"""
+        for key, value in values.items():
+            self.set(key, value, ttl)
+        return self
+    
+    def delete(self, *keys: str) -> "RedisBatch":
+        """Queue key deletion"""
+        if keys:
+            self._ops.append(lambda pipe: pipe.delete(*keys))
+        return self
+    
+    def increment(self, key: str, amount: int = 1, ttl: Optional[int] = None) -> "RedisBatch":
+        """Queue a counter increment, refreshing its TTL if given"""
+        self._ops.append(lambda pipe: pipe.incrby(key, amount))
+        if ttl:
+            self._ops.append(lambda pipe: pipe.expire(key, ttl))
+        return self
+    
+    def cache_session(
+        self,
+        session_id: str,
+        session_data: dict,
+        ttl: int = 3600,
+        scheduled_end_at: Optional[datetime] = None
+    ) -> "RedisBatch":
+        """Queue a session cache write (and index it when scheduled_end_at is given)"""
+        data = json.dumps(session_data, default=str)
+        self._ops.append(lambda pipe: pipe.setex(f"session:{session_id}", ttl, data))
+        if scheduled_end_at is not None:
+            score = scheduled_end_at.timestamp()
+            self._ops.append(lambda pipe: pipe.zadd(ACTIVE_SESSIONS_KEY, {session_id: score}))
+        return self
+    
+    def delete_sessions(self, session_ids: Iterable[str]) -> "RedisBatch":
+        """Queue removal of sessions from the cache and the active-session index"""
+        session_ids = list(session_ids)
+        if session_ids:
+            self._ops.append(lambda pipe: pipe.delete(*[f"session:{session_id}" for session_id in session_ids]))
+            self._ops.append(lambda pipe: pipe.zrem(ACTIVE_SESSIONS_KEY, *session_ids))
+        return self
+    
+    def cache_station_status(self, station_id: str, status: str, ttl: int = 300) -> "RedisBatch":
+        """Queue a station status write"""
+        self._ops.append(lambda pipe: pipe.setex(f"station:{station_id}:status", ttl, status))
+        return self
+    
+    async def execute(self) -> Optional[list]:
+        """
+        Send all queued writes in one pipeline
+        
+        Returns:
+            Per-command results, or None if Redis is unavailable or the pipeline failed
+        """
+        if not self._ops:
+            return []
+        if not self._manager.is_connected:
+            logger.debug("Redis not connected, skipping batch")
+            return None
+        
+        try:
+            async with self._manager.redis.pipeline(transaction=self._transaction) as pipe:
+                for op in self._ops:
+                    op(pipe)
+                return await pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to execute Redis batch of {len(self._ops)} command(s): {e}")
+            return None
+        finally:
+            self._ops = []
+
 class RedisManager:
-    """Manages Redis connections and caching operations"""
+    """
+    Manages the shared Redis connection pool and caching operations
+    
+    This is the only Redis client in the backend; everything (cache, leader
+    leases, event bus pub/sub) borrows connections from one pool.
+    """
     
     def __init__(self):
         self.redis: Optional[aioredis.Redis] = None
+        self.pool: Optional[aioredis.ConnectionPool] = None
         self._connected = False
+        self._last_ping_ms: Optional[float] = None
     
     async def connect(self):
         """Establish Redis connection"""
         try:
-            self.redis = await aioredis.from_url(
+            self.pool = aioredis.ConnectionPool.from_url(
                 settings.REDIS_URL,
                 encoding="utf-8",
                 decode_responses=True,
-                max_connections=50,
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
                 socket_connect_timeout=5,
                 socket_keepalive=True,
-                health_check_interval=30
+                health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL
             )
+            self.redis = aioredis.Redis(connection_pool=self.pool)
             # Test connection
             await self.redis.ping()
             self._connected = True
@@ -39,6 +150,7 @@ class RedisManager:
         """Close Redis connection"""
         if self.redis:
             await self.redis.close()
+            await self.pool.disconnect()
             self._connected = False
             logger.info("Redis disconnected")
     
@@ -47,25 +159,93 @@ class RedisManager:
         """Check if Redis is connected"""
         return self._connected and self.redis is not None
     
+    async def health_check(self) -> dict:
+        """
+        Ping Redis and update the connected flag
+        
+        A successful ping also brings back a manager whose startup connect
+        failed, so Redis can come up after the backend.
+        """
+        if self.redis is None:
+            return {"connected": False}
+        
+        try:
+            start = time.perf_counter()
+            await self.redis.ping()
+            self._last_ping_ms = round((time.perf_counter() - start) * 1000, 2)
+            if not self._connected:
+                logger.info("Redis connection restored")
+            self._connected = True
+        except Exception as e:
+            if self._connected:
+                logger.error(f"Redis health check failed: {e}")
+            self._connected = False
+        
+        return {"connected": self._connected, "ping_ms": self._last_ping_ms}
+    
+    def get_metrics(self) -> dict:
+        """Connection pool usage"""
+        if self.pool is None:
+            return {"connected": False}
+        
+        return {
+            "connected": self.is_connected,
+            "max_connections": self.pool.max_connections,
+            "created_connections": getattr(self.pool, "_created_connections", None),
+            "in_use_connections": len(getattr(self.pool, "_in_use_connections", ())),
+            "idle_connections": len(getattr(self.pool, "_available_connections", ())),
+            "last_ping_ms": self._last_ping_ms,
+        }
+    
+    async def get_live_metrics(self) -> dict:
+        """Ping Redis, then report connection pool usage"""
+        await self.health_check()
+        return self.get_metrics()
+    
+    # Batched Methods
+    def batch(self, transaction: bool = True) -> RedisBatch:
+        """Start a batch of writes sent in one pipelined round trip"""
+        return RedisBatch(self, transaction=transaction)
+    
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """Get several JSON values in one round trip (None for missing keys)"""
+        if not self.is_connected or not keys:
+            return [None] * len(keys)
+        
+        try:
+            values = await self.redis.mget(keys)
+            return [json.loads(value) if value else None for value in values]
+        except Exception as e:
+            logger.error(f"Failed to mget {len(keys)} key(s): {e}")
+            return [None] * len(keys)
+    
+    async def mset(self, values: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        """Set several JSON values (sharing one TTL) in one round trip"""
+        return await self.batch().mset(values, ttl).execute() is not None
+    
     # Session Cache Methods
-    async def cache_session(self, session_id: str, session_data: dict, ttl: int = 3600):
-        """Cache session data with TTL"""
+    async def cache_session(
+        self,
+        session_id: str,
+        session_data: dict,
+        ttl: int = 3600,
+        scheduled_end_at: Optional[datetime] = None
+    ):
+        """
+        Cache session data with TTL
+        
+        With scheduled_end_at the session is also (re)indexed in the
+        active-session sorted set, in the same transaction.
+        """
         if not self.is_connected:
             logger.warning("Redis not connected, skipping cache")
             return False
         
-        try:
-            key = f"session:{session_id}"
-            await self.redis.setex(
-                key,
-                ttl,
-                json.dumps(session_data, default=str)
-            )
-            logger.debug(f"Cached session {session_id}")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to cache session {session_id}: {e}")
+        results = await self.batch().cache_session(session_id, session_data, ttl, scheduled_end_at).execute()
+        if results is None:
             return False
+        logger.debug(f"Cached session {session_id}")
+        return True
     
     async def get_session(self, session_id: str) -> Optional[dict]:
         """Retrieve cached session data"""
@@ -83,31 +263,82 @@ class RedisManager:
             return None
     
     async def delete_session(self, session_id: str):
-        """Remove session from cache"""
+        """Remove session from cache and the active-session index"""
+        return await self.delete_sessions([session_id])
+    
+    async def delete_sessions(self, session_ids: Iterable[str]):
+        """Remove several sessions from cache and the active-session index"""
         if not self.is_connected:
             return False
         
+        session_ids = list(session_ids)
+        results = await self.batch().delete_sessions(session_ids).execute()
+        if results is None:
+            return False
+        logger.debug(f"Deleted {len(session_ids)} session(s) from cache")
+        return True
+    
+    async def claim_session_warning(self, session_id: str, deadline: int, level: str, ttl: int) -> Optional[bool]:
+        """
+        Record that a warning level was sent for a session deadline
+        
+        State is keyed by the deadline, so an extension starts a fresh set of
+        warnings. SADD makes the claim atomic across workers and restarts.
+        
+        Returns:
+            True if newly claimed, False if already sent, None if Redis is unavailable
+        """
+        if not self.is_connected:
+            return None
+        
         try:
-            key = f"session:{session_id}"
-            await self.redis.delete(key)
-            logger.debug(f"Deleted session {session_id} from cache")
-            return True
+            key = f"session_warnings:{session_id}:{deadline}"
+            added = await self.redis.sadd(key, level)
+            await self.redis.expire(key, ttl)
+            return added == 1
         except Exception as e:
-            logger.error(f"Failed to delete session {session_id}: {e}")
-            return False
+            logger.error(f"Failed to record warning for session {session_id}: {e}")
+            return None
     
     async def get_active_sessions(self) -> list:
-        """Get all active session IDs from cache"""
+        """Get all active session IDs from the index"""
         if not self.is_connected:
             return []
         
         try:
-            keys = await self.redis.keys("session:*")
-            return [key.replace("session:", "") for key in keys]
+            await self._prune_active_sessions()
+            return await self.redis.zrange(ACTIVE_SESSIONS_KEY, 0, -1)
         except Exception as e:
             logger.error(f"Failed to get active sessions: {e}")
             return []
     
+    async def get_sessions_ending_within(self, seconds: float) -> List[Tuple[str, float]]:
+        """
+        Get active sessions whose deadline is at most `seconds` away
+        
+        Overdue sessions are included. O(log N + M) on the index.
+        
+        Returns:
+            (session_id, scheduled_end_at epoch seconds) pairs, soonest first
+        """
+        if not self.is_connected:
+            return []
+        
+        try:
+            await self._prune_active_sessions()
+            return await self.redis.zrangebyscore(
+                ACTIVE_SESSIONS_KEY, "-inf", time.time() + seconds, withscores=True
+            )
+        except Exception as e:
+            logger.error(f"Failed to get sessions ending within {seconds}s: {e}")
+            return []
+    
+    async def _prune_active_sessions(self):
+        """Drop index entries whose cache key has expired without a delete"""
+        await self.redis.zremrangebyscore(
+            ACTIVE_SESSIONS_KEY, "-inf", f"({time.time() - ACTIVE_SESSION_GRACE}"
+        )
+    
     # Station Cache Methods
     async def cache_station_status(self, station_id: str, status: str, ttl: int = 300):
         """Cache station status"""
@@ -135,20 +366,19 @@ class RedisManager:
             return None
     
     # Pub/Sub for real-time events
-    async def publish_event(self, channel: str, message: dict):
-        """Publish event to Redis channel"""
+    async def publish_event(self, channel: str, message: dict) -> int:
+        """Publish event to Redis channel; returns the number of subscribers that received it"""
         if not self.is_connected:
-            return False
+            return 0
         
         try:
-            await self.redis.publish(
+            return await self.redis.publish(
                 channel,
                 json.dumps(message, default=str)
             )
-            return True
         except Exception as e:
             logger.error(f"Failed to publish to {channel}: {e}")
-            return False
+            return 0
     
     # Generic cache methods
     async def set(self, key: str, value: Any, ttl: Optional[int] = None):
@@ -205,6 +435,7 @@ class RedisManager:
 
 # Global Redis manager instance
 redis_manager = RedisManager()
+metrics_registry.register("redis", redis_manager.get_live_metrics)
 
 async def get_redis() -> RedisManager:
     """Dependency to get Redis manager"""
@@ -1,12 +1,16 @@
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
 from jose import JWTError, jwt
+import asyncio
 import bcrypt
+import time
 from fastapi import HTTPException, status
 from app.core.config import settings
+from app.core.metrics import metrics_registry
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against a hash"""
+    """Verify a password against a hash (blocking, use password_hasher in handlers)"""
     # Ensure both are bytes
     if isinstance(plain_password, str):
         plain_password = plain_password.encode('utf-8')
@@ -15,11 +19,100 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    """Hash a password"""
-    salt = bcrypt.gensalt()
+    """Hash a password (blocking, use password_hasher in handlers)"""
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Check if a hash was made with a different work factor than BCRYPT_ROUNDS"""
+    # bcrypt hashes look like $2b$12$<salt+hash>
+    parts = hashed_password.split("$")
+    try:
+        return int(parts[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+class PasswordHasher:
+    """
+    Run bcrypt on a bounded thread pool instead of the event loop
+    
+    bcrypt releases the GIL, so hashing on threads keeps the loop (and every
+    WebSocket on this worker) responsive. Work beyond PASSWORD_HASH_WORKERS
+    waits in the pool queue; once PASSWORD_HASH_MAX_QUEUE calls are waiting,
+    new ones are rejected with 503 rather than queueing without bound.
+    """
+    
+    def __init__(self):
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.in_flight = 0
+        self.max_queue_depth = 0
+        self.completed = 0
+        self.rejected = 0
+        self.last_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+    
+    @property
+    def queue_depth(self) -> int:
+        """Calls waiting for a free hashing thread"""
+        return max(0, self.in_flight - settings.PASSWORD_HASH_WORKERS)
+    
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password without blocking the event loop"""
+        return await self._run(verify_password, plain_password, hashed_password)
+    
+    async def hash(self, password: str) -> str:
+        """Hash a password without blocking the event loop"""
+        return await self._run(get_password_hash, password)
+    
+    def get_metrics(self) -> dict:
+        """Pool occupancy, queue depth and wait times"""
+        return {
+            "workers": settings.PASSWORD_HASH_WORKERS,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "last_wait_ms": round(self.last_wait_ms, 2),
+            "max_wait_ms": round(self.max_wait_ms, 2)
+        }
+    
+    async def _run(self, fn, *args):
+        if self.queue_depth >= settings.PASSWORD_HASH_MAX_QUEUE:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent sign-ins, please retry",
+                headers={"Retry-After": "1"},
+            )
+        
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                thread_name_prefix="password-hash"
+            )
+        
+        submitted = time.monotonic()
+        
+        def timed():
+            # Time spent waiting for a thread, not hashing
+            self.last_wait_ms = (time.monotonic() - submitted) * 1000
+            self.max_wait_ms = max(self.max_wait_ms, self.last_wait_ms)
+            return fn(*args)
+        
+        self.in_flight += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, timed)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+# Global password hasher instance
+password_hasher = PasswordHasher()
+metrics_registry.register("password_hasher", password_hasher.get_metrics)
+
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -10,8 +10,14 @@ from app.core.redis import redis_manager
 from app.api.v1 import api_router
 from app.websocket.manager import connection_manager
 from app.websocket.dashboard_manager import dashboard_manager
+from app.websocket.event_bus import event_bus
 from app.websocket.handlers import handle_agent_connection
-from app.scheduler.session_monitor import SessionMonitor
+from app.services.event_sink import event_sink
+from app.services.station_registry import station_registry
+from app.services.station_telemetry import telemetry_store
+from app.scheduler.session_monitor import session_monitor
+from app.scheduler.event_maintenance import event_maintenance
+from app.scheduler.heartbeat_sweeper import heartbeat_sweeper
 
 # Configure logging
 logging.basicConfig(
@@ -20,9 +26,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Session monitor instance
-session_monitor = None
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup and shutdown events"""
@@ -36,11 +39,25 @@ async def lifespan(app: FastAPI):
     # Connect to Redis
     await redis_manager.connect()
     
+    # Create event partitions, then start buffered event writer
+    await event_maintenance.start()
+    await event_sink.start()
+    
+    # Start batched agent telemetry writer
+    await telemetry_store.start()
+    
+    # Start cross-worker WebSocket event bus
+    await event_bus.start()
+    
+    # Load stations and active sessions for the agent handlers
+    await station_registry.start()
+    
     # Start session monitor
-    global session_monitor
-    session_monitor = SessionMonitor()
     await session_monitor.start()
     
+    # Start dropping agents whose heartbeats stopped
+    await heartbeat_sweeper.start()
+    
     logger.info("EVMS Backend started successfully")
     
     yield
@@ -48,14 +65,23 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down EVMS Backend...")
     
-    # Stop session monitor
-    if session_monitor:
-        await session_monitor.stop()
+    # Stop heartbeat sweeper and session monitor
+    await heartbeat_sweeper.stop()
+    await session_monitor.stop()
     
     # Close WebSocket connections
     await connection_manager.disconnect_all()
     await dashboard_manager.disconnect_all()
     
+    # Stop event bus and station registry reload
+    await event_bus.stop()
+    await station_registry.stop()
+    
+    # Flush pending telemetry and queued events
+    await telemetry_store.stop()
+    await event_sink.stop()
+    await event_maintenance.stop()
+    
     # Disconnect Redis
     await redis_manager.disconnect()
     
@@ -79,6 +105,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include API router
@@ -110,8 +137,11 @@ async def websocket_dashboard_endpoint(websocket: WebSocket):
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    redis_health = await redis_manager.health_check()
     return {
-        "status": "healthy",
+        # The backend keeps working without Redis, just without cross-worker features
+        "status": "healthy" if redis_health["connected"] else "degraded",
+        "redis": redis_health,
         "version": "1.0.0",
         "service": "evms-backend"
     }
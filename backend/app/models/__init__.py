@@ -2,6 +2,9 @@ from app.models.station import Station
 from app.models.session import Session
 from app.models.user import User
 from app.models.payment import Payment
-from app.models.event import Event
+from app.models.event import Event, EventDailyCount
+from app.models.analytics import AnalyticsHourly, AnalyticsHourlyUser
+from app.models.telemetry import StationTelemetry
 
-__all__ = ["Station", "Session", "User", "Payment", "Event"]
+__all__ = ["Station", "Session", "User", "Payment", "Event", "EventDailyCount",
+           "AnalyticsHourly", "AnalyticsHourlyUser", "StationTelemetry"]
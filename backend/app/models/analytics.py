@@ -0,0 +1,52 @@
+from sqlalchemy import Column, String, DateTime, Date, Integer, SmallInteger, Numeric
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+
+class AnalyticsHourly(Base):
+    """
+    Hourly analytics facts per station, maintained by AnalyticsRollup
+    
+    Payment metrics are bucketed by payments.created_at, session metrics by
+    sessions.started_at. The local columns are derived from bucket_start in
+    the venue timezone so reads never convert timestamps.
+    """
+    __tablename__ = "analytics_hourly"
+    
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)  # UTC hour
+    station_id = Column(UUID(as_uuid=True), primary_key=True)  # UNASSIGNED_STATION when unknown
+    shift_date = Column(Date, nullable=False, index=True)  # date the 6 AM shift started
+    local_date = Column(Date, nullable=False)
+    local_hour = Column(SmallInteger, nullable=False)
+    local_dow = Column(SmallInteger, nullable=False)  # 0 = Sunday
+    
+    # Completed payments
+    revenue = Column(Numeric(12, 2), nullable=False, default=0)
+    payment_count = Column(Integer, nullable=False, default=0)
+    paid_sessions = Column(Integer, nullable=False, default=0)  # payments linked to a session
+    
+    # Sessions started in this hour
+    session_count = Column(Integer, nullable=False, default=0)
+    session_minutes = Column(Integer, nullable=False, default=0)  # booked incl. extensions
+    session_revenue = Column(Numeric(12, 2), nullable=False, default=0)  # their completed payments
+    closed_sessions = Column(Integer, nullable=False, default=0)  # STOPPED/EXPIRED with a duration
+    closed_minutes = Column(Integer, nullable=False, default=0)
+    stopped_sessions = Column(Integer, nullable=False, default=0)
+    # Sessions started in this hour that the peak-hours heatmap counts
+    # (STOPPED/ACTIVE/EXPIRED); the columns above count every status
+    heatmap_sessions = Column(Integer, nullable=False, default=0)
+    heatmap_minutes = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<AnalyticsHourly {self.bucket_start} {self.station_id}>"
+
+class AnalyticsHourlyUser(Base):
+    """Distinct user names of heatmap-counted sessions per hour, for unique-user counts over any range"""
+    __tablename__ = "analytics_hourly_users"
+    
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    user_name = Column(String(255), primary_key=True)
+    local_hour = Column(SmallInteger, nullable=False)
+    local_dow = Column(SmallInteger, nullable=False)
+    
+    def __repr__(self):
+        return f"<AnalyticsHourlyUser {self.bucket_start} {self.user_name}>"
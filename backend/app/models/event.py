@@ -1,10 +1,12 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, JSON, BigInteger
+from sqlalchemy import Column, String, DateTime, Date, ForeignKey, JSON, BigInteger, Integer
 from sqlalchemy.dialects.postgresql import UUID, INET
 from sqlalchemy.sql import func
 from app.core.database import Base
 
 class Event(Base):
     __tablename__ = "events"
+    # Monthly range partitions are created by app.scheduler.event_maintenance
+    __table_args__ = {"postgresql_partition_by": "RANGE (timestamp)"}
     
     id = Column(BigInteger, primary_key=True, autoincrement=True)
     event_type = Column(String(50), nullable=False, index=True)
@@ -13,7 +15,19 @@ class Event(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
     data = Column(JSON)
     ip_address = Column(INET)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    # Part of the primary key because Postgres requires the partition key in it
+    timestamp = Column(DateTime(timezone=True), primary_key=True, server_default=func.now(), index=True)
     
     def __repr__(self):
         return f"<Event {self.event_type} - {self.timestamp}>"
+
+class EventDailyCount(Base):
+    """Per-day, per-type event counts kept after raw partitions are dropped"""
+    __tablename__ = "event_daily_counts"
+    
+    day = Column(Date, primary_key=True)  # UTC day
+    event_type = Column(String(50), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<EventDailyCount {self.day} {self.event_type}={self.count}>"
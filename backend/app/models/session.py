@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Integer, Enum as SQLEnum, ForeignKey, Text
+from sqlalchemy import Column, String, DateTime, Integer, Enum as SQLEnum, ForeignKey, Text, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -14,6 +14,13 @@ class SessionStatus(str, enum.Enum):
 
 class Session(Base):
     __tablename__ = "sessions"
+    # Keyset pagination on (started_at, id), alone and behind each list filter
+    __table_args__ = (
+        Index("ix_sessions_started_at_id", "started_at", "id"),
+        Index("ix_sessions_station_started_at_id", "station_id", "started_at", "id"),
+        Index("ix_sessions_status_started_at_id", "status", "started_at", "id"),
+        Index("ix_sessions_created_by_started_at_id", "created_by", "started_at", "id"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_name = Column(String(255), nullable=True, index=True)  # Store user name directly for easy tracking
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, DateTime, Integer, Float, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+
+class StationTelemetry(Base):
+    """
+    Downsampled agent status_update samples, maintained by TelemetryStore
+    
+    One row per station, tier and bucket. Sums and sample counts (rather
+    than averages) are stored so buckets merge exactly across flushes and
+    workers; averages are sum / samples.
+    """
+    __tablename__ = "station_telemetry"
+    # Retention deletes by tier and age
+    __table_args__ = (
+        Index("ix_station_telemetry_resolution_bucket", "resolution", "bucket_start"),
+    )
+    
+    station_id = Column(UUID(as_uuid=True), ForeignKey("stations.id", ondelete="CASCADE"), primary_key=True)
+    resolution = Column(Integer, primary_key=True)  # bucket width in seconds: 60, 900 or 3600
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)  # UTC
+    
+    samples = Column(Integer, nullable=False, default=0)
+    cpu_sum = Column(Float, nullable=False, default=0)
+    cpu_max = Column(Float, nullable=False, default=0)
+    memory_sum = Column(Float, nullable=False, default=0)
+    memory_max = Column(Float, nullable=False, default=0)
+    disk_sum = Column(Float, nullable=False, default=0)
+    disk_max = Column(Float, nullable=False, default=0)
+    locked_samples = Column(Integer, nullable=False, default=0)
+    unhealthy_samples = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<StationTelemetry {self.station_id} {self.resolution}s {self.bucket_start}>"
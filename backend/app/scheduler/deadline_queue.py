@@ -0,0 +1,76 @@
+"""Min-heap of keyed deadlines"""
+import heapq
+import itertools
+from typing import Dict, List, Optional, Tuple
+
+class DeadlineQueue:
+    """
+    Keyed deadlines ordered by time
+
+    Rescheduling or cancelling a key is O(1) bookkeeping plus O(log n) for
+    the new heap entry; superseded entries stay in the heap and are skipped
+    when they reach the top (lazy deletion). The heap is rebuilt when stale
+    entries outnumber live ones, so memory stays proportional to live keys.
+    """
+
+    def __init__(self):
+        # (deadline, seq, key)
+        self._heap: List[Tuple[float, int, str]] = []
+        # key -> (deadline, seq) of the live entry
+        self._live: Dict[str, Tuple[float, int]] = {}
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._live
+
+    def get(self, key: str) -> Optional[float]:
+        """Get the current deadline for a key"""
+        entry = self._live.get(key)
+        return entry[0] if entry else None
+
+    def schedule(self, key: str, deadline: float):
+        """Add a key or move it to a new deadline"""
+        seq = next(self._seq)
+        self._live[key] = (deadline, seq)
+        heapq.heappush(self._heap, (deadline, seq, key))
+        self._maybe_compact()
+
+    def cancel(self, key: str):
+        """Remove a key if present"""
+        if self._live.pop(key, None) is not None:
+            self._maybe_compact()
+
+    def clear(self):
+        """Remove all keys"""
+        self._heap.clear()
+        self._live.clear()
+
+    def next_deadline(self) -> Optional[float]:
+        """Earliest live deadline, or None when empty"""
+        self._drop_stale_head()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float) -> List[str]:
+        """Remove and return every key whose deadline is at or before now"""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, seq, key = heapq.heappop(self._heap)
+            if self._live.get(key) == (deadline, seq):
+                del self._live[key]
+                due.append(key)
+        return due
+
+    def _drop_stale_head(self):
+        while self._heap:
+            deadline, seq, key = self._heap[0]
+            if self._live.get(key) == (deadline, seq):
+                return
+            heapq.heappop(self._heap)
+
+    def _maybe_compact(self):
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._live):
+            self._heap = [(deadline, seq, key) for key, (deadline, seq) in self._live.items()]
+            heapq.heapify(self._heap)
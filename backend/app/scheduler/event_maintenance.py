@@ -0,0 +1,162 @@
+"""Monthly partition maintenance for the events table"""
+import asyncio
+import logging
+import re
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Tuple
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import engine
+from app.scheduler.leader import LeaderLease
+
+logger = logging.getLogger(__name__)
+
+# events_y2025m10 holds [2025-10-01, 2025-11-01) UTC
+PARTITION_NAME = re.compile(r"^events_y(\d{4})m(\d{2})$")
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+def _next_month(month: date) -> date:
+    return (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+def _partition_name(month: date) -> str:
+    return f"events_y{month.year:04d}m{month.month:02d}"
+
+class EventMaintenance:
+    """
+    Keep monthly partitions of the events table ahead of time and enforce retention
+
+    Each run creates partitions for the current month plus
+    EVENT_PARTITION_MONTHS_AHEAD. Partitions whose whole month is older than
+    EVENT_RETENTION_DAYS are first rolled up into event_daily_counts, then
+    dropped (or detached and kept as standalone tables when
+    EVENT_ARCHIVE_PARTITIONS is set). Rolling up and removing a partition
+    happen in one transaction and the rollup overwrites its counts, so a
+    failed or repeated run is safe.
+    """
+
+    def __init__(self):
+        self.running = False
+        self.task = None
+        self.lease = LeaderLease("event_maintenance", settings.EVENT_MAINTENANCE_INTERVAL * 2)
+
+    async def start(self):
+        """Make sure inserts have a partition, then start the periodic job"""
+        if self.running:
+            return
+
+        # Every worker does this once: event writes fail without a partition
+        try:
+            await self.ensure_partitions()
+        except Exception as e:
+            logger.error(f"Failed to create event partitions: {e}")
+
+        self.running = True
+        self.task = asyncio.create_task(self._maintenance_loop())
+        logger.info("Event maintenance started")
+
+    async def stop(self):
+        """Stop the periodic job"""
+        self.running = False
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        await self.lease.release()
+        logger.info("Event maintenance stopped")
+
+    async def run_once(self) -> dict:
+        """Create upcoming partitions and expire old ones"""
+        created = await self.ensure_partitions()
+        expired = await self.expire_partitions()
+        return {"created": created, "expired": expired}
+
+    async def ensure_partitions(self) -> List[str]:
+        """Create partitions from this month through EVENT_PARTITION_MONTHS_AHEAD"""
+        month = _month_start(datetime.now(timezone.utc).date())
+        existing = {name for name, _ in await self._list_partitions()}
+        created = []
+
+        for _ in range(settings.EVENT_PARTITION_MONTHS_AHEAD + 1):
+            name = _partition_name(month)
+            if name not in existing:
+                async with engine.begin() as conn:
+                    await conn.execute(text(
+                        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF events "
+                        f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+                        f"TO ('{_next_month(month).isoformat()} 00:00:00+00')"
+                    ))
+                created.append(name)
+                logger.info(f"Created event partition {name}")
+            month = _next_month(month)
+
+        return created
+
+    async def expire_partitions(self) -> List[str]:
+        """Roll up and remove partitions that are entirely past retention"""
+        cutoff = datetime.now(timezone.utc).date() - timedelta(days=settings.EVENT_RETENTION_DAYS)
+        expired = []
+
+        for name, month in sorted(await self._list_partitions(), key=lambda p: p[1]):
+            if _next_month(month) > cutoff:
+                continue
+
+            async with engine.begin() as conn:
+                # Recount the whole partition so re-running replaces, not adds
+                await conn.execute(text(
+                    "INSERT INTO event_daily_counts (day, event_type, count) "
+                    "SELECT (timestamp AT TIME ZONE 'UTC')::date, event_type, count(*) "
+                    f"FROM {name} GROUP BY 1, 2 "
+                    "ON CONFLICT (day, event_type) DO UPDATE SET count = EXCLUDED.count"
+                ))
+                await conn.execute(text(f"ALTER TABLE events DETACH PARTITION {name}"))
+                if settings.EVENT_ARCHIVE_PARTITIONS:
+                    await conn.execute(text(f"ALTER TABLE {name} RENAME TO archived_{name}"))
+                else:
+                    await conn.execute(text(f"DROP TABLE {name}"))
+
+            expired.append(name)
+            action = "Archived" if settings.EVENT_ARCHIVE_PARTITIONS else "Dropped"
+            logger.info(f"{action} event partition {name} after rolling up daily counts")
+
+        return expired
+
+    async def _list_partitions(self) -> List[Tuple[str, date]]:
+        """Attached partitions of events with the month they cover"""
+        async with engine.connect() as conn:
+            result = await conn.execute(text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = 'events'::regclass"
+            ))
+            names = [row[0] for row in result]
+
+        partitions = []
+        for name in names:
+            match = PARTITION_NAME.match(name)
+            if match:
+                partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+        return partitions
+
+    async def _maintenance_loop(self):
+        """Run maintenance every EVENT_MAINTENANCE_INTERVAL on one worker"""
+        while self.running:
+            try:
+                if await self.lease.acquire():
+                    result = await self.run_once()
+                    if result["created"] or result["expired"]:
+                        logger.info(f"Event maintenance: {result}")
+                await asyncio.sleep(settings.EVENT_MAINTENANCE_INTERVAL)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in event maintenance: {e}", exc_info=True)
+                await asyncio.sleep(settings.EVENT_MAINTENANCE_INTERVAL)
+
+# Global event maintenance instance
+event_maintenance = EventMaintenance()
@@ -0,0 +1,150 @@
+import asyncio
+from typing import List
+from uuid import UUID
+from sqlalchemy import select
+import logging
+import time
+
+from fastapi import WebSocket, status
+
+from app.core.database import AsyncSessionLocal
+from app.core.config import settings
+from app.core.metrics import metrics_registry
+from app.models.station import Station, StationStatus
+from app.services.event_logger import EventLogger
+from app.services.station_registry import station_registry
+from app.websocket.manager import connection_manager
+from app.websocket.dashboard_manager import dashboard_manager
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for a close frame to go out to a dead peer
+CLOSE_TIMEOUT = 5
+
+class HeartbeatSweeper:
+    """
+    Background task that drops agents whose heartbeats stopped
+    
+    ConnectionManager files every connection in a timing wheel at its last
+    heartbeat plus WS_HEARTBEAT_TIMEOUT; each heartbeat moves it to a later
+    slot. Every WS_HEARTBEAT_SWEEP_INTERVAL the sweeper pops only the slots
+    that elapsed, so a tick costs O(expired) rather than O(connections).
+    Expired (half-open) sockets are closed, the station is marked OFFLINE
+    and dashboards get the update.
+    
+    Each worker sweeps its own connections, so no leader lease is needed.
+    """
+    
+    def __init__(self):
+        self.running = False
+        self.task = None
+        
+        # Metrics
+        self.sweeps = 0
+        self.expired = 0
+        self.last_sweep_ms = 0.0
+    
+    async def start(self):
+        """Start the sweep loop"""
+        if self.running:
+            return
+        
+        self.running = True
+        self.task = asyncio.create_task(self._run())
+        logger.info(f"Heartbeat sweeper started (timeout {settings.WS_HEARTBEAT_TIMEOUT}s)")
+    
+    async def stop(self):
+        """Stop the sweep loop"""
+        self.running = False
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        logger.info("Heartbeat sweeper stopped")
+    
+    async def sweep(self) -> int:
+        """Close every connection whose heartbeat timed out; returns how many"""
+        start = time.monotonic()
+        stale = connection_manager.pop_stale(time.time())
+        self.sweeps += 1
+        
+        if stale:
+            self.expired += len(stale)
+            logger.warning(
+                f"Heartbeat timeout for {len(stale)} agent(s): "
+                f"{', '.join(station_id for station_id, _ in stale)}"
+            )
+            await asyncio.gather(
+                *(self._close(station_id, websocket) for station_id, websocket in stale)
+            )
+            await self._mark_offline([station_id for station_id, _ in stale])
+        
+        self.last_sweep_ms = (time.monotonic() - start) * 1000
+        return len(stale)
+    
+    def get_metrics(self) -> dict:
+        """Sweep counters"""
+        return {
+            "tracked_connections": len(connection_manager.heartbeat_deadlines),
+            "timeout_seconds": settings.WS_HEARTBEAT_TIMEOUT,
+            "sweeps": self.sweeps,
+            "expired": self.expired,
+            "last_sweep_ms": round(self.last_sweep_ms, 3),
+        }
+    
+    async def _close(self, station_id: str, websocket: WebSocket):
+        """Close a stale socket; the agent's handler exits without touching the status"""
+        try:
+            await asyncio.wait_for(
+                websocket.close(code=status.WS_1001_GOING_AWAY),
+                timeout=CLOSE_TIMEOUT
+            )
+        except Exception as e:
+            logger.debug(f"Error closing stale connection {station_id}: {e}")
+    
+    async def _mark_offline(self, station_ids: List[str]):
+        """Mark stations OFFLINE and broadcast the ones that changed"""
+        from app.schemas.station import StationResponse
+        
+        changed = []
+        for station_id in station_ids:
+            try:
+                if await station_registry.set_status(station_id, StationStatus.OFFLINE):
+                    changed.append(UUID(station_id))
+            except Exception as e:
+                logger.error(f"Failed to mark {station_id} offline: {e}")
+            
+            await EventLogger.log_agent_event(
+                db=None,
+                event_type="heartbeat_timeout",
+                station_id=UUID(station_id),
+                data={"timeout_seconds": settings.WS_HEARTBEAT_TIMEOUT}
+            )
+        
+        if not changed:
+            return
+        
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Station).where(Station.id.in_(changed)))
+            stations = result.scalars().all()
+        
+        for station in stations:
+            station_dict = StationResponse.model_validate(station).model_dump(mode='json')
+            await dashboard_manager.send_station_update(station_dict)
+    
+    async def _run(self):
+        """Main sweep loop"""
+        while self.running:
+            try:
+                await asyncio.sleep(settings.WS_HEARTBEAT_SWEEP_INTERVAL)
+                await self.sweep()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in heartbeat sweeper: {e}", exc_info=True)
+
+# Global heartbeat sweeper instance
+heartbeat_sweeper = HeartbeatSweeper()
+metrics_registry.register("heartbeats", heartbeat_sweeper.get_metrics)
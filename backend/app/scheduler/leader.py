@@ -0,0 +1,76 @@
+"""Cluster-wide leader lease backed by Redis"""
+import logging
+import uuid
+
+from app.core.redis import redis_manager
+
+logger = logging.getLogger(__name__)
+
+# Extend the lease only if we still own it
+RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Delete the lease only if we still own it
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+class LeaderLease:
+    """
+    Leader lease using SET NX PX
+
+    The holder renews the lease well before it expires; if the holder dies,
+    the key expires after ttl_seconds and the next worker to try takes over.
+    Without Redis (at startup or after a failed lease call, confirmed by a
+    ping) there is nothing to coordinate through, so every worker considers
+    itself leader (correct for single-worker deployments); the lease is
+    contested again once a ping succeeds.
+    """
+
+    def __init__(self, name: str, ttl_seconds: int):
+        self.key = f"evms:leader:{name}"
+        self.token = uuid.uuid4().hex
+        self.ttl_ms = ttl_seconds * 1000
+        self.is_leader = False
+
+    async def acquire(self) -> bool:
+        """Acquire or renew the lease; returns whether we are the leader"""
+        if not redis_manager.is_connected:
+            # Ping so the lease goes back to Redis once it is reachable again
+            await redis_manager.health_check()
+            if not redis_manager.is_connected:
+                self.is_leader = True
+                return True
+
+        try:
+            if self.is_leader:
+                renewed = await redis_manager.redis.eval(RENEW_SCRIPT, 1, self.key, self.token, self.ttl_ms)
+                if renewed:
+                    return True
+
+            acquired = await redis_manager.redis.set(self.key, self.token, nx=True, px=self.ttl_ms)
+            self.is_leader = bool(acquired)
+        except Exception as e:
+            logger.error(f"Leader lease {self.key} check failed: {e}")
+            health = await redis_manager.health_check()
+            # Redis is gone: nothing to coordinate through, lead locally.
+            # Otherwise we can't prove we still hold the lease, so step down.
+            self.is_leader = not health["connected"]
+
+        return self.is_leader
+
+    async def release(self):
+        """Give up the lease so another worker can take over immediately"""
+        if self.is_leader and redis_manager.is_connected:
+            try:
+                await redis_manager.redis.eval(RELEASE_SCRIPT, 1, self.key, self.token)
+            except Exception as e:
+                logger.error(f"Failed to release leader lease {self.key}: {e}")
+        self.is_leader = False
@@ -1,24 +1,85 @@
 import asyncio
 from datetime import datetime, timedelta, timezone
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Set, Tuple
+from uuid import UUID
+from sqlalchemy import select, update
 import logging
+import time
 
 from app.core.database import AsyncSessionLocal
 from app.core.config import settings
+from app.core.redis import redis_manager
 from app.models.session import Session, SessionStatus
 from app.models.station import Station, StationStatus
+from app.services.analytics_rollup import AnalyticsRollup
+from app.services.analytics_cache import analytics_cache
+from app.services.station_registry import station_registry
 from app.websocket.manager import connection_manager
 from app.websocket.dashboard_manager import dashboard_manager
+from app.websocket.event_bus import event_bus
+from app.websocket.rpc import agent_rpc
+from app.scheduler.deadline_queue import DeadlineQueue
+from app.scheduler.leader import LeaderLease
 
 logger = logging.getLogger(__name__)
 
+def _as_utc(dt: datetime) -> datetime:
+    """Make a datetime timezone-aware (UTC) if it isn't"""
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt
+
+def _warning_levels() -> List[Tuple[str, int]]:
+    """Warning levels and seconds before the deadline, least urgent first"""
+    return [
+        ("5min", settings.SESSION_WARNING_MINUTES * 60),
+        ("1min", settings.SESSION_FINAL_WARNING_MINUTES * 60),
+    ]
+
 class SessionMonitor:
-    """Background task to monitor and expire sessions"""
+    """
+    Background task to monitor and expire sessions
+    
+    Expiry is driven by a min-heap keyed on scheduled_end_at, so each session
+    expires at its deadline instead of on the next polling tick. The API
+    keeps the heap current through schedule_session/cancel_session. Every
+    SESSION_CHECK_INTERVAL the leader also reads sessions ending soon from
+    the Redis active-session index, which catches schedule changes whose
+    bus message was lost; a periodic full reconcile against the database
+    is the last safety net.
+    
+    Warnings use a second heap with one entry per (session, level) at
+    deadline minus the level's threshold. Each level is sent exactly once per
+    deadline; sent levels are recorded in Redis so restarts and other
+    workers don't repeat them.
+    
+    Every worker starts a monitor, but only the holder of the leader lease
+    tracks and expires sessions. Other workers forward schedule changes to
+    the leader over the event bus; a new leader rebuilds its heaps from the
+    database before processing.
+    """
     
     def __init__(self):
         self.running = False
         self.task = None
+        # session_id -> expiry deadline (epoch seconds)
+        self.deadlines = DeadlineQueue()
+        # "session_id:level" -> warning time (epoch seconds)
+        self.warnings = DeadlineQueue()
+        # session_id -> {"station_id": str, "scheduled_end_at": datetime}
+        self.sessions: Dict[str, dict] = {}
+        # session_id -> (deadline, levels already sent for that deadline)
+        self._sent_warnings: Dict[str, Tuple[float, Set[str]]] = {}
+        self._wakeup = asyncio.Event()
+        self._next_reconcile = 0.0
+        self._next_index_sync = 0.0
+        self._next_lease_check = 0.0
+        self.lease = LeaderLease("session_monitor", settings.SESSION_MONITOR_LEASE_TTL)
+    
+    @property
+    def is_leader(self) -> bool:
+        """Check if this worker runs the cluster's session monitor"""
+        return self.lease.is_leader
     
     async def start(self):
         """Start the session monitor"""
@@ -39,106 +100,380 @@ class SessionMonitor:
                 await self.task
             except asyncio.CancelledError:
                 pass
+        await self.lease.release()
         logger.info("Session monitor stopped")
     
+    async def schedule_session(self, session_id: str, station_id: str, scheduled_end_at: datetime):
+        """Track an active session, or move its deadline after an extension"""
+        if self.is_leader:
+            self._track_session(session_id, station_id, scheduled_end_at)
+            return
+        
+        await event_bus.publish("session_schedule", {
+            "action": "schedule",
+            "session_id": session_id,
+            "station_id": station_id,
+            "scheduled_end_at": _as_utc(scheduled_end_at).isoformat()
+        })
+    
+    async def cancel_session(self, session_id: str):
+        """Stop tracking a session that ended before its deadline"""
+        if self.is_leader:
+            self._untrack_session(session_id)
+            return
+        
+        await event_bus.publish("session_schedule", {
+            "action": "cancel",
+            "session_id": session_id
+        })
+    
+    async def _handle_bus_schedule(self, payload: dict):
+        """Apply a schedule change forwarded by another worker"""
+        if not self.is_leader:
+            return
+        
+        if payload.get("action") == "cancel":
+            self._untrack_session(payload["session_id"])
+        else:
+            self._track_session(
+                payload["session_id"],
+                payload["station_id"],
+                datetime.fromisoformat(payload["scheduled_end_at"])
+            )
+    
+    def _track_session(self, session_id: str, station_id: str, scheduled_end_at: datetime):
+        """Add a session to the heaps or move its deadline"""
+        scheduled_end_at = _as_utc(scheduled_end_at)
+        self.sessions[session_id] = {
+            "station_id": station_id,
+            "scheduled_end_at": scheduled_end_at
+        }
+        deadline = scheduled_end_at.timestamp()
+        self.deadlines.schedule(session_id, deadline)
+        for level, seconds in _warning_levels():
+            self.warnings.schedule(f"{session_id}:{level}", deadline - seconds)
+        self._wakeup.set()
+    
+    def _untrack_session(self, session_id: str):
+        """Remove a session from the heaps"""
+        self.sessions.pop(session_id, None)
+        self._sent_warnings.pop(session_id, None)
+        self.deadlines.cancel(session_id)
+        for level, _ in _warning_levels():
+            self.warnings.cancel(f"{session_id}:{level}")
+    
+    def _clear(self):
+        """Drop all tracked sessions (after losing leadership)"""
+        self.deadlines.clear()
+        self.warnings.clear()
+        self.sessions.clear()
+        self._sent_warnings.clear()
+    
+    async def _check_lease(self):
+        """Acquire or renew the leader lease"""
+        was_leader = self.is_leader
+        is_leader = await self.lease.acquire()
+        
+        if is_leader and not was_leader:
+            logger.info("Session monitor is now the leader")
+            # Rebuild from the database before processing anything
+            self._next_reconcile = 0.0
+        elif was_leader and not is_leader:
+            logger.warning("Session monitor lost leadership")
+            self._clear()
+    
     async def _monitor_loop(self):
-        """Main monitoring loop"""
+        """Main monitoring loop: sleep until the next deadline or periodic task"""
         while self.running:
             try:
-                await self._check_sessions()
-                await asyncio.sleep(settings.SESSION_CHECK_INTERVAL)
+                self._wakeup.clear()
+                now = time.time()
+                
+                if now >= self._next_lease_check:
+                    await self._check_lease()
+                    # Renew well before the lease expires
+                    self._next_lease_check = now + settings.SESSION_MONITOR_LEASE_TTL / 3
+                
+                if not self.is_leader:
+                    await asyncio.sleep(max(0, self._next_lease_check - time.time()))
+                    continue
+                
+                if now >= self._next_reconcile:
+                    await self._reconcile()
+                    self._next_reconcile = now + settings.SESSION_RECONCILE_INTERVAL
+                
+                if now >= self._next_index_sync:
+                    await self._sync_from_index()
+                    self._next_index_sync = now + settings.SESSION_CHECK_INTERVAL
+                
+                due = self.deadlines.pop_due(time.time())
+                if due:
+                    await self._expire_due(due)
+                
+                due_warnings = self.warnings.pop_due(time.time())
+                if due_warnings:
+                    await self._fire_warnings(due_warnings)
+                
+                wake_at = min(self._next_reconcile, self._next_index_sync, self._next_lease_check)
+                for next_deadline in (self.deadlines.next_deadline(), self.warnings.next_deadline()):
+                    if next_deadline is not None:
+                        wake_at = min(wake_at, next_deadline)
+                
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=max(0, wake_at - time.time()))
+                except asyncio.TimeoutError:
+                    pass
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"Error in session monitor: {e}", exc_info=True)
                 await asyncio.sleep(settings.SESSION_CHECK_INTERVAL)
     
-    async def _check_sessions(self):
-        """Check for expired and expiring sessions"""
+    async def _reconcile(self):
+        """Rebuild the deadline heap from the database (safety net)"""
         async with AsyncSessionLocal() as db:
-            now = datetime.now(timezone.utc)
-            
-            # Get all active sessions
             result = await db.execute(
-                select(Session).where(Session.status == SessionStatus.ACTIVE)
+                select(Session.id, Session.station_id, Session.scheduled_end_at)
+                .where(Session.status == SessionStatus.ACTIVE)
             )
-            active_sessions = result.scalars().all()
+            rows = result.all()
+        
+        active_ids = set()
+        for row in rows:
+            session_id = str(row.id)
+            active_ids.add(session_id)
+            scheduled_end_at = _as_utc(row.scheduled_end_at)
+            if self.deadlines.get(session_id) != scheduled_end_at.timestamp():
+                self._track_session(session_id, str(row.station_id), scheduled_end_at)
+        
+        for session_id in list(self.sessions):
+            if session_id not in active_ids:
+                self._untrack_session(session_id)
+        
+        logger.debug(f"Session monitor reconciled {len(active_ids)} active sessions")
+    
+    async def _sync_from_index(self):
+        """Track sessions from the Redis index that end before the next sync"""
+        # Look far enough ahead that the first warning level is caught too
+        horizon = _warning_levels()[0][1] + settings.SESSION_CHECK_INTERVAL
+        changed = [
+            (session_id, deadline)
+            for session_id, deadline in await redis_manager.get_sessions_ending_within(horizon)
+            if self.deadlines.get(session_id) != deadline
+        ]
+        if not changed:
+            return
+        
+        # Cache entry and index entry are written and deleted together
+        cached_sessions = await redis_manager.mget([f"session:{session_id}" for session_id, _ in changed])
+        for (session_id, deadline), cached in zip(changed, cached_sessions):
+            if not cached or not cached.get("station_id"):
+                continue
             
-            for session in active_sessions:
-                # Make scheduled_end_at timezone-aware if it isn't
-                scheduled_end = session.scheduled_end_at
-                if scheduled_end.tzinfo is None:
-                    scheduled_end = scheduled_end.replace(tzinfo=timezone.utc)
-                
-                time_remaining = (scheduled_end - now).total_seconds()
-                
-                # Session expired
-                if time_remaining <= 0:
-                    await self._expire_session(db, session)
+            self._track_session(
+                session_id,
+                cached["station_id"],
+                datetime.fromtimestamp(deadline, tz=timezone.utc)
+            )
+    
+    async def _expire_due(self, session_ids: List[str]):
+        """
+        Expire due sessions in bulk
+        
+        All due sessions are expired, their stations reset to ONLINE and
+        the analytics facts updated in one transaction with UPDATE ...
+        RETURNING, then notifications are fanned out concurrently.
+        """
+        now = datetime.now(timezone.utc)
+        
+        # Only the transaction is retried; once it commits the sessions are
+        # EXPIRED and must be announced even if a side effect below fails
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    update(Session)
+                    .where(
+                        Session.id.in_([UUID(session_id) for session_id in session_ids]),
+                        Session.status == SessionStatus.ACTIVE,
+                        Session.scheduled_end_at <= now
+                    )
+                    .values(status=SessionStatus.EXPIRED, actual_end_at=now)
+                    .returning(Session)
+                    .execution_options(synchronize_session=False)
+                )
+                expired = list(result.scalars().all())
                 
-                # 5-minute warning
-                elif time_remaining <= settings.SESSION_WARNING_MINUTES * 60:
-                    await self._send_warning(session, "5min", int(time_remaining))
+                # Update station status to ONLINE (ready for next customer)
+                stations = []
+                if expired:
+                    result = await db.execute(
+                        update(Station)
+                        .where(Station.id.in_({session.station_id for session in expired}))
+                        .values(status=StationStatus.ONLINE)
+                        .returning(Station)
+                        .execution_options(synchronize_session=False)
+                    )
+                    stations = list(result.scalars().all())
+                    
+                    await AnalyticsRollup(db).record_sessions_closed([session.id for session in expired])
                 
-                # 1-minute warning
-                elif time_remaining <= settings.SESSION_FINAL_WARNING_MINUTES * 60:
-                    await self._send_warning(session, "1min", int(time_remaining))
-    
-    async def _expire_session(self, db: AsyncSession, session: Session):
-        """Expire a session and reset station to online (ready for next customer)"""
-        logger.info(f"Expiring session {session.id} for station {session.station_id}")
-        
-        # Update session status with timezone-aware datetime
-        session.status = SessionStatus.EXPIRED
-        session.actual_end_at = datetime.now(timezone.utc)
-        
-        # Update station status to ONLINE (ready for next customer)
-        result = await db.execute(
-            select(Station).where(Station.id == session.station_id)
-        )
-        station = result.scalar_one_or_none()
-        if station:
-            station.status = StationStatus.ONLINE
-            logger.info(f"Station {station.name} ({station.id}) reset to ONLINE")
-        
-        await db.commit()
-        await db.refresh(session)
-        if station:
-            await db.refresh(station)
-        
-        # Broadcast session update to all dashboards
+                await db.commit()
+        except Exception:
+            # Retry shortly instead of waiting for the next reconcile
+            retry_at = time.time() + settings.SESSION_CHECK_INTERVAL
+            for session_id in session_ids:
+                self.deadlines.schedule(session_id, retry_at)
+            raise
+        
+        for session_id in session_ids:
+            self.sessions.pop(session_id, None)
+            self._sent_warnings.pop(session_id, None)
+        
+        if expired:
+            await self._sync_expired(expired, stations)
+        
+        # Anything not expired was extended or stopped elsewhere
+        expired_ids = {str(session.id) for session in expired}
+        remaining = [session_id for session_id in session_ids if session_id not in expired_ids]
+        if remaining:
+            await self._retrack(remaining)
+        
+        if expired:
+            logger.info(f"Expired {len(expired)} session(s), reset {len(stations)} station(s) to ONLINE")
+            await self._notify_expired(expired, stations)
+    
+    async def _sync_expired(self, sessions: List[Session], stations: List[Station]):
+        """Propagate committed expiries to the analytics cache, Redis and the station registry"""
+        steps = [
+            ("analytics cache", lambda: analytics_cache.invalidate([session.started_at for session in sessions])),
+            ("Redis", lambda: self._uncache_expired(sessions, stations)),
+        ]
+        steps += [
+            (f"registry station {station.id}", lambda station=station: station_registry.sync_station(station))
+            for station in stations
+        ]
+        steps += [
+            (f"registry session {session.id}", lambda session=session: station_registry.sync_session(session))
+            for session in sessions
+        ]
+        
+        for name, step in steps:
+            try:
+                await step()
+            except Exception as e:
+                logger.error(f"Failed to update {name} after expiring sessions: {e}")
+    
+    async def _uncache_expired(self, sessions: List[Session], stations: List[Station]):
+        batch = redis_manager.batch().delete_sessions([str(session.id) for session in sessions])
+        for station in stations:
+            batch.cache_station_status(str(station.id), station.status.value)
+        await batch.execute()
+    
+    async def _retrack(self, session_ids: List[str]):
+        """Track due sessions that are still active (extended since they were scheduled)"""
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(Session.id, Session.station_id, Session.scheduled_end_at)
+                    .where(
+                        Session.id.in_([UUID(session_id) for session_id in session_ids]),
+                        Session.status == SessionStatus.ACTIVE
+                    )
+                )
+                still_active = result.all()
+        except Exception as e:
+            logger.error(f"Failed to re-check {len(session_ids)} session(s), retrying: {e}")
+            retry_at = time.time() + settings.SESSION_CHECK_INTERVAL
+            for session_id in session_ids:
+                self.deadlines.schedule(session_id, retry_at)
+            return
+        
+        for row in still_active:
+            self._track_session(str(row.id), str(row.station_id), row.scheduled_end_at)
+    
+    async def _notify_expired(self, sessions: List[Session], stations: List[Station]):
+        """Broadcast expiries to dashboards, and enforce them on agents in the background"""
         from app.schemas.session import SessionResponse
-        session_dict = SessionResponse.model_validate(session).model_dump(mode='json')
-        await dashboard_manager.send_session_update(session_dict)
+        from app.schemas.station import StationResponse as StationResponseSchema
         
-        # Broadcast station status update to all dashboards
-        if station:
-            from app.schemas.station import StationResponse as StationResponseSchema
-            station_dict = StationResponseSchema.model_validate(station).model_dump(mode='json')
-            await dashboard_manager.send_station_update(station_dict)
-        
-        # Notify agent
-        if connection_manager.is_connected(str(session.station_id)):
-            await connection_manager.send_message(str(session.station_id), {
-                "type": "session_expired",
-                "data": {
-                    "session_id": str(session.id),
-                    "action": "logoff",
-                    "grace_period_seconds": 30
-                }
+        sends = []
+        for session in sessions:
+            session_dict = SessionResponse.model_validate(session).model_dump(mode='json')
+            sends.append(dashboard_manager.send_session_update(session_dict))
+            
+            # End it on the agent without holding up the loop; dashboards get its confirmation
+            agent_rpc.send_session_command(str(session.station_id), str(session.id), "session_expired", {
+                "session_id": str(session.id),
+                "action": "logoff",
+                "grace_period_seconds": 30
             })
         
-        logger.info(f"Session {session.id} expired successfully")
-    
-    async def _send_warning(self, session: Session, warning_level: str, remaining_seconds: int):
-        """Send warning to agent"""
-        if connection_manager.is_connected(str(session.station_id)):
-            await connection_manager.send_message(str(session.station_id), {
-                "type": "session_warning",
-                "data": {
-                    "session_id": str(session.id),
-                    "remaining_seconds": remaining_seconds,
-                    "warning_level": warning_level
-                }
-            })
-            logger.debug(f"Sent {warning_level} warning for session {session.id}")
+        for station in stations:
+            station_dict = StationResponseSchema.model_validate(station).model_dump(mode='json')
+            sends.append(dashboard_manager.send_station_update(station_dict))
+        
+        results = await asyncio.gather(*sends, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Error sending expiry notification: {result}")
+    
+    async def _fire_warnings(self, keys: List[str]):
+        """Send the most urgent due warning level for each session, once"""
+        due_levels: Dict[str, Set[str]] = {}
+        for key in keys:
+            session_id, level = key.rsplit(":", 1)
+            due_levels.setdefault(session_id, set()).add(level)
+        
+        now = time.time()
+        for session_id, levels in due_levels.items():
+            tracked = self.sessions.get(session_id)
+            if not tracked:
+                continue
+            
+            deadline = tracked["scheduled_end_at"].timestamp()
+            remaining = int(deadline - now)
+            if remaining <= 0:
+                continue
+            
+            # Levels are ordered least to most urgent. When several are due at
+            # once (e.g. after a restart), only the most urgent one is sent and
+            # the earlier ones are marked as skipped.
+            ordered = [level for level, _ in _warning_levels() if level in levels]
+            level = ordered[-1]
+            for skipped in ordered[:-1]:
+                await self._claim_warning(session_id, deadline, skipped)
+            
+            if await self._claim_warning(session_id, deadline, level):
+                await self._send_warning(session_id, tracked["station_id"], level, remaining)
+    
+    async def _claim_warning(self, session_id: str, deadline: float, level: str) -> bool:
+        """Mark a warning level as sent; False if it was already sent"""
+        sent_deadline, sent = self._sent_warnings.get(session_id, (None, set()))
+        if sent_deadline != deadline:
+            sent = set()
+            self._sent_warnings[session_id] = (deadline, sent)
+        
+        if level in sent:
+            return False
+        sent.add(level)
+        
+        ttl = max(60, int(deadline - time.time()) + 300)
+        claimed = await redis_manager.claim_session_warning(session_id, int(deadline), level, ttl)
+        # None means Redis is unavailable, fall back to the in-process state
+        return claimed is not False
+    
+    async def _send_warning(self, session_id: str, station_id: str, warning_level: str, remaining_seconds: int):
+        """Send warning to agent (advisory: the agent shows its own, so no reply is expected)"""
+        await connection_manager.send_to_station(station_id, {
+            "type": "session_warning",
+            "data": {
+                "session_id": session_id,
+                "remaining_seconds": remaining_seconds,
+                "warning_level": warning_level
+            }
+        })
+        logger.debug(f"Sent {warning_level} warning for session {session_id}")
+
+# Global session monitor instance
+session_monitor = SessionMonitor()
+event_bus.register("session_schedule", session_monitor._handle_bus_schedule)
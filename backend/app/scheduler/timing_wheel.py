@@ -0,0 +1,79 @@
+"""Hashed timing wheel of keyed deadlines"""
+import math
+from typing import Dict, List, Optional, Set
+
+class TimingWheel:
+    """
+    Keyed deadlines rounded up to fixed-width ticks
+
+    Unlike DeadlineQueue, moving a key to a later deadline is O(1) (it
+    changes slot, nothing accumulates), which suits deadlines that are
+    pushed back far more often than they fire, such as heartbeats.
+    pop_due walks only the ticks that elapsed since the last call and
+    returns the keys found there, so a sweep costs O(elapsed ticks +
+    expired keys) regardless of how many keys are scheduled.
+    """
+
+    def __init__(self, resolution: float = 1.0):
+        self.resolution = resolution
+        # tick -> keys due in that tick
+        self._slots: Dict[int, Set[str]] = {}
+        # key -> tick it is filed under
+        self._ticks: Dict[str, int] = {}
+        # First tick not yet swept (None until the first sweep)
+        self._cursor: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self._ticks)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._ticks
+
+    def schedule(self, key: str, deadline: float):
+        """Add a key or move it to a new deadline"""
+        tick = math.ceil(deadline / self.resolution)
+        # A deadline in an already swept tick fires on the next sweep
+        if self._cursor is not None:
+            tick = max(tick, self._cursor)
+
+        old_tick = self._ticks.get(key)
+        if old_tick == tick:
+            return
+        if old_tick is not None:
+            self._discard(key, old_tick)
+
+        self._ticks[key] = tick
+        self._slots.setdefault(tick, set()).add(key)
+
+    def cancel(self, key: str):
+        """Remove a key if present"""
+        tick = self._ticks.pop(key, None)
+        if tick is not None:
+            self._discard(key, tick)
+
+    def pop_due(self, now: float) -> List[str]:
+        """Remove and return every key whose tick has fully elapsed by now"""
+        last_tick = math.floor(now / self.resolution)
+        if self._cursor is None or last_tick - self._cursor > len(self._slots):
+            # First sweep or long gap: visiting occupied slots is cheaper
+            ticks = sorted(tick for tick in self._slots if tick <= last_tick)
+        else:
+            ticks = range(self._cursor, last_tick + 1)
+
+        due = []
+        for tick in ticks:
+            keys = self._slots.pop(tick, None)
+            if keys:
+                for key in keys:
+                    del self._ticks[key]
+                due.extend(keys)
+
+        self._cursor = last_tick + 1 if self._cursor is None else max(self._cursor, last_tick + 1)
+        return due
+
+    def _discard(self, key: str, tick: int):
+        slot = self._slots.get(tick)
+        if slot is not None:
+            slot.discard(key)
+            if not slot:
+                del self._slots[tick]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, validator
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Literal
 from datetime import datetime
 from uuid import UUID
 from app.models.station import StationType, ControlMethod, StationStatus
@@ -76,3 +76,26 @@ class StationResponse(StationBase):
     
     class Config:
         from_attributes = True
+
+class StationCommandRequest(BaseModel):
+    """Command sent to several station agents"""
+    station_ids: List[UUID] = Field(..., min_length=1)
+    command: Literal["lock_station", "unlock_station", "get_status", "ping"]
+    timeout: Optional[float] = Field(None, gt=0, le=30, description="Seconds per attempt")
+
+class StationCommandResult(BaseModel):
+    """One station's reply to a command"""
+    station_id: UUID
+    status: Literal["ok", "failed", "timeout", "offline", "unknown_station"]
+    ok: bool
+    reply: Optional[Dict[str, Any]] = None
+    attempts: int
+    latency_ms: float
+
+class StationCommandResponse(BaseModel):
+    """Aggregated replies to a command"""
+    command: str
+    requested: int
+    succeeded: int
+    failed: int
+    results: List[StationCommandResult]
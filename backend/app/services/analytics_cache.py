@@ -0,0 +1,91 @@
+"""
+Analytics Cache
+Caches analytics results in Redis per endpoint, period and shift
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Iterable
+
+from app.core.config import settings
+from app.core.redis import redis_manager
+from app.core.timezone import get_shift_start
+
+logger = logging.getLogger(__name__)
+
+# Results covering only completed shifts
+CLOSED = "closed"
+# Results that include the current shift
+LIVE = "live"
+
+VERSION_KEYS = {
+    CLOSED: "analytics:version:closed",
+    LIVE: "analytics:version:live",
+}
+
+
+class AnalyticsCache:
+    """
+    Versioned cache for analytics results
+
+    Keys combine endpoint, period, the current shift start and a scope
+    version. Closed-scope results only change if a session that started in
+    a completed shift is extended or closed afterwards, so they live until
+    the shift boundary moves on (the TTL only garbage-collects old shifts).
+    Live-scope results get a short TTL.
+
+    Writers call invalidate() after committing, which bumps the live
+    version (and the closed one when an older shift was touched). Readers
+    fetch the version before computing, so a result computed from
+    pre-commit data is stored under a version nobody reads any more.
+    Without Redis every call computes directly.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    async def get_or_compute(
+        self,
+        endpoint: str,
+        period: str,
+        scope: str,
+        compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Return the cached result for this endpoint/period/shift, computing it on a miss"""
+        if not redis_manager.is_connected:
+            return await compute()
+
+        version = await redis_manager.get(VERSION_KEYS[scope]) or 0
+        shift_start = get_shift_start().strftime('%Y%m%d')
+        key = f"analytics:{endpoint}:{period}:{shift_start}:{scope}:{version}"
+
+        cached = await redis_manager.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        data = await compute()
+        ttl = settings.ANALYTICS_CLOSED_CACHE_TTL if scope == CLOSED else settings.ANALYTICS_LIVE_CACHE_TTL
+        await redis_manager.set(key, data, ttl=ttl)
+        return data
+
+    async def invalidate(self, started_at: Iterable[datetime] = ()):
+        """
+        Invalidate after payments or sessions were committed
+
+        Args:
+            started_at: Start times of the sessions that changed; any before
+                the current shift also invalidates closed-shift results
+        """
+        await redis_manager.increment(VERSION_KEYS[LIVE])
+
+        shift_start = get_shift_start()
+        if any(started < shift_start for started in started_at):
+            await redis_manager.increment(VERSION_KEYS[CLOSED])
+            logger.debug("Analytics cache: closed-shift results invalidated")
+
+
+# Global analytics cache instance
+analytics_cache = AnalyticsCache()
@@ -0,0 +1,207 @@
+"""
+Analytics Rollup
+Maintains the hourly fact tables that AnalyticsService reads
+"""
+
+import logging
+from datetime import datetime
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.timezone import DEFAULT_TIMEZONE
+
+logger = logging.getLogger(__name__)
+
+# Stands in for payments without a station (station_id is part of the key)
+UNASSIGNED_STATION = UUID("00000000-0000-0000-0000-000000000000")
+
+METRICS = [
+    "revenue", "payment_count", "paid_sessions",
+    "session_count", "session_minutes", "session_revenue",
+    "closed_sessions", "closed_minutes", "stopped_sessions",
+    "heatmap_sessions", "heatmap_minutes",
+]
+
+# Statuses the peak-hours heatmap counts (the other session metrics count all)
+HEATMAP_STATUSES = "('STOPPED', 'ACTIVE', 'EXPIRED')"
+
+def _bucket(column: str) -> str:
+    """UTC hour containing a timestamp, independent of the DB session timezone"""
+    return f"(date_trunc('hour', {column} AT TIME ZONE 'UTC') AT TIME ZONE 'UTC')"
+
+# Each fact query yields bucket_start, station_id and every metric, one row per
+# source row; {where} narrows it to the rows just written (or a backfill range)
+PAYMENT_FACTS = f"""
+    SELECT
+        {_bucket('p.created_at')} AS bucket_start,
+        COALESCE(p.station_id, CAST(:unassigned AS uuid)) AS station_id,
+        p.amount AS revenue,
+        1 AS payment_count,
+        CASE WHEN s.id IS NULL THEN 0 ELSE 1 END AS paid_sessions,
+        0 AS session_count, 0 AS session_minutes, 0 AS session_revenue,
+        0 AS closed_sessions, 0 AS closed_minutes, 0 AS stopped_sessions,
+        0 AS heatmap_sessions, 0 AS heatmap_minutes
+    FROM payments p
+    LEFT JOIN sessions s ON s.payment_id = p.id
+    WHERE p.status = 'COMPLETED' {{where}}
+"""
+
+SESSION_FACTS = f"""
+    SELECT
+        {_bucket('s.started_at')} AS bucket_start,
+        s.station_id,
+        0 AS revenue, 0 AS payment_count, 0 AS paid_sessions,
+        1 AS session_count,
+        s.duration_minutes + COALESCE(s.extended_minutes, 0) AS session_minutes,
+        COALESCE(p.amount, 0) AS session_revenue,
+        0 AS closed_sessions, 0 AS closed_minutes, 0 AS stopped_sessions,
+        CASE WHEN s.status IN {HEATMAP_STATUSES} THEN 1 ELSE 0 END AS heatmap_sessions,
+        CASE WHEN s.status IN {HEATMAP_STATUSES}
+            THEN s.duration_minutes + COALESCE(s.extended_minutes, 0) ELSE 0 END AS heatmap_minutes
+    FROM sessions s
+    LEFT JOIN payments p ON s.payment_id = p.id AND p.status = 'COMPLETED'
+    WHERE TRUE {{where}}
+"""
+
+EXTENSION_FACTS = f"""
+    SELECT
+        {_bucket('s.started_at')} AS bucket_start,
+        s.station_id,
+        0 AS revenue, 0 AS payment_count, 0 AS paid_sessions,
+        0 AS session_count,
+        CAST(:additional_minutes AS integer) AS session_minutes,
+        0 AS session_revenue,
+        0 AS closed_sessions, 0 AS closed_minutes, 0 AS stopped_sessions,
+        0 AS heatmap_sessions,
+        CASE WHEN s.status IN {HEATMAP_STATUSES}
+            THEN CAST(:additional_minutes AS integer) ELSE 0 END AS heatmap_minutes
+    FROM sessions s
+    WHERE TRUE {{where}}
+"""
+
+CLOSE_FACTS = f"""
+    SELECT
+        {_bucket('s.started_at')} AS bucket_start,
+        s.station_id,
+        0 AS revenue, 0 AS payment_count, 0 AS paid_sessions,
+        0 AS session_count, 0 AS session_minutes, 0 AS session_revenue,
+        CASE WHEN s.duration_minutes > 0 THEN 1 ELSE 0 END AS closed_sessions,
+        CASE WHEN s.duration_minutes > 0
+            THEN s.duration_minutes + COALESCE(s.extended_minutes, 0) ELSE 0 END AS closed_minutes,
+        CASE WHEN s.status = 'STOPPED' THEN 1 ELSE 0 END AS stopped_sessions,
+        0 AS heatmap_sessions, 0 AS heatmap_minutes
+    FROM sessions s
+    WHERE s.status IN ('STOPPED', 'EXPIRED') {{where}}
+"""
+
+USER_FACTS = f"""
+    INSERT INTO analytics_hourly_users (bucket_start, user_name, local_hour, local_dow)
+    SELECT DISTINCT
+        b.bucket_start,
+        b.user_name,
+        EXTRACT(HOUR FROM b.bucket_start AT TIME ZONE :tz),
+        EXTRACT(DOW FROM b.bucket_start AT TIME ZONE :tz)
+    FROM (
+        SELECT {_bucket('s.started_at')} AS bucket_start, s.user_name
+        FROM sessions s
+        WHERE s.user_name IS NOT NULL AND s.status IN {HEATMAP_STATUSES} {{where}}
+    ) b
+    ON CONFLICT (bucket_start, user_name) DO NOTHING
+"""
+
+def _upsert(facts: str) -> str:
+    """Sum fact rows per bucket and add them onto analytics_hourly"""
+    columns = ", ".join(METRICS)
+    sums = ", ".join(f"SUM(f.{metric})" for metric in METRICS)
+    updates = ", ".join(f"{metric} = analytics_hourly.{metric} + EXCLUDED.{metric}" for metric in METRICS)
+    return f"""
+        INSERT INTO analytics_hourly (
+            bucket_start, station_id, shift_date, local_date, local_hour, local_dow, {columns}
+        )
+        SELECT
+            f.bucket_start,
+            f.station_id,
+            CAST(f.bucket_start AT TIME ZONE :tz - INTERVAL '6 hours' AS date),
+            CAST(f.bucket_start AT TIME ZONE :tz AS date),
+            EXTRACT(HOUR FROM f.bucket_start AT TIME ZONE :tz),
+            EXTRACT(DOW FROM f.bucket_start AT TIME ZONE :tz),
+            {sums}
+        FROM ({facts}) f
+        GROUP BY f.bucket_start, f.station_id
+        ON CONFLICT (bucket_start, station_id) DO UPDATE SET {updates}
+    """
+
+class AnalyticsRollup:
+    """
+    Incremental maintenance of analytics_hourly and analytics_hourly_users
+
+    Call the record_* methods inside the transaction that writes the
+    payment/session, after a flush, so the facts commit (or roll back) with
+    it. Each call is one statement that pre-aggregates the affected rows per
+    bucket before adding them. rebuild() recomputes everything from the raw
+    tables and is the fix for any drift.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def record_session_started(self, session_id: UUID, payment_id: Optional[UUID]):
+        """A session (and its payment) was created"""
+        if payment_id is not None:
+            await self._apply(PAYMENT_FACTS, "AND p.id = :payment_id", {'payment_id': payment_id})
+        await self._apply(SESSION_FACTS, "AND s.id = :session_id", {'session_id': session_id})
+        await self.db.execute(
+            text(USER_FACTS.format(where="AND s.id = :session_id")),
+            {'session_id': session_id, 'tz': DEFAULT_TIMEZONE}
+        )
+
+    async def record_session_extended(self, session_id: UUID, payment_id: Optional[UUID], additional_minutes: int):
+        """A session was extended (with an extension payment)"""
+        if payment_id is not None:
+            await self._apply(PAYMENT_FACTS, "AND p.id = :payment_id", {'payment_id': payment_id})
+        await self._apply(
+            EXTENSION_FACTS,
+            "AND s.id = :session_id",
+            {'session_id': session_id, 'additional_minutes': additional_minutes}
+        )
+
+    async def record_sessions_closed(self, session_ids: List[UUID]):
+        """Sessions were stopped or expired (status already updated)"""
+        if not session_ids:
+            return
+        await self._apply(CLOSE_FACTS, "AND s.id = ANY(:session_ids)", {'session_ids': list(session_ids)})
+
+    async def rebuild(self, since: Optional[datetime] = None):
+        """
+        Recompute the fact tables from payments and sessions
+
+        Args:
+            since: Only rebuild buckets from this time on (hour-aligned); all history if None
+        """
+        params = {'since': since} if since else {}
+        bucket_filter = "WHERE bucket_start >= :since" if since else ""
+
+        await self.db.execute(text(f"DELETE FROM analytics_hourly {bucket_filter}"), params)
+        await self.db.execute(text(f"DELETE FROM analytics_hourly_users {bucket_filter}"), params)
+
+        payment_where = "AND p.created_at >= :since" if since else ""
+        session_where = "AND s.started_at >= :since" if since else ""
+
+        # Full session minutes already include extensions, so no EXTENSION_FACTS here
+        await self._apply(PAYMENT_FACTS, payment_where, params)
+        await self._apply(SESSION_FACTS, session_where, params)
+        await self._apply(CLOSE_FACTS, session_where, params)
+        await self.db.execute(
+            text(USER_FACTS.format(where=session_where)),
+            {**params, 'tz': DEFAULT_TIMEZONE}
+        )
+        logger.info(f"Analytics rollup rebuilt{f' since {since.isoformat()}' if since else ''}")
+
+    async def _apply(self, facts: str, where: str, params: dict):
+        await self.db.execute(
+            text(_upsert(facts.format(where=where))),
+            {**params, 'tz': DEFAULT_TIMEZONE, 'unassigned': str(UNASSIGNED_STATION)}
+        )
@@ -3,23 +3,51 @@ Analytics Service
 Provides comprehensive analytics and business intelligence metrics
 """
 
+import asyncio
 from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Any, Optional
-from sqlalchemy import func, and_, or_, extract, case, select, text
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models.session import Session, SessionStatus
-from app.models.station import Station
-from app.models.payment import Payment, PaymentStatus
-from app.models.event import Event
-from app.core.redis import redis_manager
-from app.core.timezone import get_current_time, get_shift_start, get_shift_end
+from app.core.config import settings
+from app.services.analytics_cache import analytics_cache, CLOSED, LIVE
+from app.core.timezone import get_current_time, get_shift_start
 
 
 class AnalyticsService:
-    """Service for generating analytics and business metrics"""
+    """
+    Service for generating analytics and business metrics
+    
+    Queries run on their own pooled sessions so independent aggregates can
+    be awaited together; the semaphore caps how many connections one
+    service instance (i.e. one request) holds at a time.
+    """
     
     def __init__(self, db: AsyncSession):
         self.db = db
+        self._fanout = asyncio.Semaphore(settings.ANALYTICS_QUERY_CONCURRENCY)
+    
+    async def get_overview(self, period: str = 'day') -> Dict[str, Any]:
+        """
+        Get revenue, sessions, utilization and peak hours in one call
+        
+        Args:
+            period: 'day', 'week', or 'month' (default: 'day' for yesterday)
+        
+        Returns:
+            The four analytics payloads keyed by section
+        """
+        revenue, sessions, utilization, peak_hours = await asyncio.gather(
+            self.get_revenue_analytics(period),
+            self.get_session_analytics(period),
+            self.get_station_utilization(),
+            self.get_peak_hours_heatmap(period),
+        )
+        return {
+            'revenue': revenue,
+            'sessions': sessions,
+            'utilization': utilization,
+            'peak_hours': peak_hours,
+        }
     
     async def get_revenue_analytics(self, period: str = 'day') -> Dict[str, Any]:
         """
@@ -31,8 +59,14 @@ class AnalyticsService:
         Returns:
             Revenue data with trends, comparisons, and forecasts
         """
+        return await analytics_cache.get_or_compute(
+            'revenue', period, CLOSED,
+            lambda: self._compute_revenue_analytics(period)
+        )
+    
+    async def _compute_revenue_analytics(self, period: str = 'day') -> Dict[str, Any]:
+        """Compute revenue analytics (completed shifts only)"""
         now = get_current_time()  # Current time in CST
-        now_utc = datetime.now(timezone.utc)
         
         # Current shift start
         current_shift_start = get_shift_start(now)
@@ -45,29 +79,31 @@ class AnalyticsService:
         day_before_shift_start = yesterday_shift_start - timedelta(days=1)
         day_before_shift_end = yesterday_shift_start
         
-        # Yesterday's revenue (completed shift: 6 AM - 6 AM)
-        yesterday_revenue = await self._get_revenue_sum(yesterday_shift_start, yesterday_shift_end)
-        
-        # Day before yesterday's revenue (for comparison)
-        day_before_revenue = await self._get_revenue_sum(day_before_shift_start, day_before_shift_end)
-        
-        # Calculate change percentage
-        change_percent = 0
-        if day_before_revenue > 0:
-            change_percent = ((yesterday_revenue - day_before_revenue) / day_before_revenue) * 100
-        
         # Get time-series data based on period
         if period == 'day':
             # For "Yesterday" view, show hourly data for yesterday's completed shift
-            time_series = await self._get_hourly_revenue(yesterday_shift_start, yesterday_shift_end)
+            time_series_query = self._get_hourly_revenue(yesterday_shift_start, yesterday_shift_end)
         elif period == 'week':
             # For "Week" view, show daily data for last 7 completed days
             week_start = yesterday_shift_start - timedelta(days=6)  # 7 days total including yesterday
-            time_series = await self._get_daily_revenue(week_start, yesterday_shift_end)
+            time_series_query = self._get_daily_revenue(week_start, yesterday_shift_end)
         else:
             # For "Month" view, show weekly data for last 12 weeks
             month_start = yesterday_shift_start - timedelta(weeks=12)
-            time_series = await self._get_weekly_revenue(month_start, yesterday_shift_end)
+            time_series_query = self._get_weekly_revenue(month_start, yesterday_shift_end)
+        
+        # Yesterday's revenue (completed shift: 6 AM - 6 AM), the day before
+        # (for comparison) and the time series are independent
+        yesterday_revenue, day_before_revenue, time_series = await asyncio.gather(
+            self._get_revenue_sum(yesterday_shift_start, yesterday_shift_end),
+            self._get_revenue_sum(day_before_shift_start, day_before_shift_end),
+            time_series_query,
+        )
+        
+        # Calculate change percentage
+        change_percent = 0
+        if day_before_revenue > 0:
+            change_percent = ((yesterday_revenue - day_before_revenue) / day_before_revenue) * 100
         
         # Calculate additional metrics
         total_revenue = sum(item['revenue'] for item in time_series)
@@ -103,8 +139,19 @@ class AnalyticsService:
         Returns:
             Session metrics including duration, frequency, and patterns
         """
+        # Active sessions right now (still useful for live monitoring)
+        data, active_now = await asyncio.gather(
+            analytics_cache.get_or_compute(
+                'sessions', period, CLOSED,
+                lambda: self._compute_session_analytics(period)
+            ),
+            self._count_active_sessions(),
+        )
+        return {**data, 'active_now': active_now}
+    
+    async def _compute_session_analytics(self, period: str = 'day') -> Dict[str, Any]:
+        """Compute session analytics for completed shifts (active_now is filled in live)"""
         now = get_current_time()  # Current time in CST
-        now_utc = datetime.now(timezone.utc)
         
         # Current shift start
         current_shift_start = get_shift_start(now)
@@ -113,33 +160,29 @@ class AnalyticsService:
         yesterday_shift_start = current_shift_start - timedelta(days=1)
         yesterday_shift_end = current_shift_start
         
-        # Active sessions right now (still useful for live monitoring)
-        active_now = await self._count_active_sessions()
-        
-        # Total sessions yesterday (completed shift)
-        total_today = await self._count_sessions(yesterday_shift_start, yesterday_shift_end)
-        
-        # Average session duration for yesterday (completed sessions only)
-        avg_duration = await self._get_avg_session_duration(yesterday_shift_start, yesterday_shift_end)
-        
         # Get data based on period
         if period == 'day':
             # For "Yesterday" view, show hourly data for yesterday's completed shift
-            hourly_data = await self._get_hourly_sessions(yesterday_shift_start, yesterday_shift_end)
-            daily_data = []
+            series_query = self._get_hourly_sessions(yesterday_shift_start, yesterday_shift_end)
         elif period == 'week':
             # For "Week" view, show daily data for last 7 completed days
             week_start = yesterday_shift_start - timedelta(days=6)
-            hourly_data = []
-            daily_data = await self._get_daily_sessions(week_start, yesterday_shift_end)
+            series_query = self._get_daily_sessions(week_start, yesterday_shift_end)
         else:
             # For "Month" view, show daily data for last 30 days
             month_start = yesterday_shift_start - timedelta(days=29)
-            hourly_data = []
-            daily_data = await self._get_daily_sessions(month_start, yesterday_shift_end)
-        
-        # Session completion rate for yesterday
-        completion_rate = await self._get_completion_rate(yesterday_shift_start, yesterday_shift_end)
+            series_query = self._get_daily_sessions(month_start, yesterday_shift_end)
+        
+        # Yesterday's total sessions, average duration (completed sessions
+        # only), completion rate and the series are independent
+        total_today, avg_duration, completion_rate, series = await asyncio.gather(
+            self._count_sessions(yesterday_shift_start, yesterday_shift_end),
+            self._get_avg_session_duration(yesterday_shift_start, yesterday_shift_end),
+            self._get_completion_rate(yesterday_shift_start, yesterday_shift_end),
+            series_query,
+        )
+        hourly_data = series if period == 'day' else []
+        daily_data = series if period != 'day' else []
         
         # Average sessions per day (only for week/month views)
         if daily_data:
@@ -153,7 +196,7 @@ class AnalyticsService:
         peak_hour = max(hourly_data, key=lambda x: x['count']) if hourly_data else None
         
         return {
-            'active_now': active_now,
+            'active_now': 0,  # filled in live by get_session_analytics
             'total_today': total_today,
             'avg_duration': round(avg_duration, 1),
             'completion_rate': round(completion_rate, 1),
@@ -170,20 +213,24 @@ class AnalyticsService:
         Returns:
             Utilization data for each station with performance metrics
         """
-        # Get all stations
-        result = await self.db.execute(
-            select(Station).order_by(Station.name)
+        return await analytics_cache.get_or_compute(
+            'utilization', '30d', LIVE,
+            self._compute_station_utilization
         )
-        stations = result.scalars().all()
+    
+    async def _compute_station_utilization(self) -> Dict[str, Any]:
+        """Compute utilization over the last 30 days (includes the current shift)"""
+        # All stations with their last-30-day aggregates in one grouped query
+        rows = await self._get_all_station_metrics()
         
         station_metrics = []
         total_utilization = 0
         
-        for station in stations:
-            metrics = await self._get_station_metrics(station.id)
+        for row in rows:
+            metrics = self._station_metrics_from_row(row)
             station_metrics.append({
-                'id': station.id,
-                'name': station.name,
+                'id': row.id,
+                'name': row.name,
                 'utilization_percent': metrics['utilization'],
                 'total_sessions': metrics['total_sessions'],
                 'total_hours': metrics['total_hours'],
@@ -193,7 +240,7 @@ class AnalyticsService:
             })
             total_utilization += metrics['utilization']
         
-        overall_utilization = total_utilization / len(stations) if stations else 0
+        overall_utilization = total_utilization / len(rows) if rows else 0
         
         # Find best and worst performers
         best_performer = max(station_metrics, key=lambda x: x['revenue']) if station_metrics else None
@@ -204,7 +251,7 @@ class AnalyticsService:
             'stations': station_metrics,
             'best_performer': best_performer,
             'worst_performer': worst_performer,
-            'total_stations': len(stations),
+            'total_stations': len(rows),
         }
     
     async def get_peak_hours_heatmap(self, period: str = 'day') -> Dict[str, Any]:
@@ -217,6 +264,13 @@ class AnalyticsService:
         Returns:
             Heatmap data showing busiest times based on selected period
         """
+        return await analytics_cache.get_or_compute(
+            'peak-hours', period, CLOSED,
+            lambda: self._compute_peak_hours_heatmap(period)
+        )
+    
+    async def _compute_peak_hours_heatmap(self, period: str = 'day') -> Dict[str, Any]:
+        """Compute the heatmap for completed shifts"""
         now = get_current_time()  # Current time in CST
         current_shift_start = get_shift_start(now)
         
@@ -238,23 +292,40 @@ class AnalyticsService:
             start_date = yesterday_shift_start - timedelta(days=29)
             end_date = yesterday_shift_end
         
-        # Query sessions grouped by day of week and hour (in CST timezone)
+        # Hourly facts grouped by local day of week and hour (in CST timezone)
         query = text("""
             SELECT 
-                EXTRACT(DOW FROM started_at AT TIME ZONE 'America/Chicago') as day,
-                EXTRACT(HOUR FROM started_at AT TIME ZONE 'America/Chicago') as hour,
-                COUNT(*) as session_count,
-                SUM(duration_minutes + extended_minutes) as total_minutes,
-                COUNT(DISTINCT user_name) as unique_users
-            FROM sessions
-            WHERE started_at >= :start_date
-                AND started_at < :end_date
-                AND status IN ('STOPPED', 'ACTIVE', 'EXPIRED')
-            GROUP BY day, hour
-            ORDER BY day, hour
+                h.day,
+                h.hour,
+                h.session_count,
+                h.total_minutes,
+                COALESCE(u.unique_users, 0) as unique_users
+            FROM (
+                SELECT 
+                    local_dow as day,
+                    local_hour as hour,
+                    SUM(heatmap_sessions) as session_count,
+                    SUM(heatmap_minutes) as total_minutes
+                FROM analytics_hourly
+                WHERE bucket_start >= :start_date
+                    AND bucket_start < :end_date
+                GROUP BY local_dow, local_hour
+                HAVING SUM(heatmap_sessions) > 0
+            ) h
+            LEFT JOIN (
+                SELECT 
+                    local_dow as day,
+                    local_hour as hour,
+                    COUNT(DISTINCT user_name) as unique_users
+                FROM analytics_hourly_users
+                WHERE bucket_start >= :start_date
+                    AND bucket_start < :end_date
+                GROUP BY local_dow, local_hour
+            ) u ON u.day = h.day AND u.hour = h.hour
+            ORDER BY h.day, h.hour
         """)
         
-        result = await self.db.execute(query, {'start_date': start_date, 'end_date': end_date})
+        result = await self._execute(query, {'start_date': start_date, 'end_date': end_date})
         rows = result.fetchall()
         
         # Build heatmap data
@@ -308,17 +379,25 @@ class AnalyticsService:
         }
     
     # Helper methods
+    # These read the hourly fact tables maintained by AnalyticsRollup. Range
+    # bounds are shift starts, which fall on hour boundaries, so filtering on
+    # bucket_start is exact.
+    
+    async def _execute(self, query, params: Optional[dict] = None):
+        """Run a read-only query on its own pooled session (results are buffered)"""
+        async with self._fanout:
+            async with AsyncSession(self.db.bind, expire_on_commit=False) as db:
+                return await db.execute(query, params or {})
     
     async def _get_revenue_sum(self, start: datetime, end: datetime) -> float:
         """Get total revenue between dates"""
         query = text("""
-            SELECT COALESCE(SUM(amount), 0) as total
-            FROM payments
-            WHERE created_at >= :start 
-                AND created_at < :end
-                AND status = 'COMPLETED'
+            SELECT COALESCE(SUM(revenue), 0) as total
+            FROM analytics_hourly
+            WHERE bucket_start >= :start 
+                AND bucket_start < :end
         """)
-        result = await self.db.execute(query, {'start': start, 'end': end})
+        result = await self._execute(query, {'start': start, 'end': end})
         row = result.fetchone()
         return float(row.total) if row else 0.0
     
@@ -326,18 +405,17 @@ class AnalyticsService:
         """Get hourly revenue breakdown for today in CST timezone"""
         query = text("""
             SELECT 
-                EXTRACT(HOUR FROM p.created_at AT TIME ZONE 'America/Chicago') as hour,
-                COALESCE(SUM(p.amount), 0) as revenue,
-                COUNT(DISTINCT s.id) as sessions
-            FROM payments p
-            LEFT JOIN sessions s ON s.payment_id = p.id
-            WHERE p.created_at >= :start 
-                AND p.created_at < :end
-                AND p.status = 'COMPLETED'
-            GROUP BY EXTRACT(HOUR FROM p.created_at AT TIME ZONE 'America/Chicago')
+                local_hour as hour,
+                SUM(revenue) as revenue,
+                SUM(paid_sessions) as sessions
+            FROM analytics_hourly
+            WHERE bucket_start >= :start 
+                AND bucket_start < :end
+            GROUP BY local_hour
+            HAVING SUM(payment_count) > 0
             ORDER BY hour
         """)
-        result = await self.db.execute(query, {'start': start, 'end': end})
+        result = await self._execute(query, {'start': start, 'end': end})
         rows = result.fetchall()
         
         return [
@@ -353,18 +431,17 @@ class AnalyticsService:
         """Get daily revenue breakdown"""
         query = text("""
             SELECT 
-                DATE(p.created_at AT TIME ZONE 'America/Chicago') as date,
-                COALESCE(SUM(p.amount), 0) as revenue,
-                COUNT(DISTINCT s.id) as sessions
-            FROM payments p
-            LEFT JOIN sessions s ON s.payment_id = p.id
-            WHERE p.created_at >= :start 
-                AND p.created_at < :end
-                AND p.status = 'COMPLETED'
-            GROUP BY DATE(p.created_at AT TIME ZONE 'America/Chicago')
+                local_date as date,
+                SUM(revenue) as revenue,
+                SUM(paid_sessions) as sessions
+            FROM analytics_hourly
+            WHERE bucket_start >= :start 
+                AND bucket_start < :end
+            GROUP BY local_date
+            HAVING SUM(payment_count) > 0
             ORDER BY date
         """)
-        result = await self.db.execute(query, {'start': start, 'end': end})
+        result = await self._execute(query, {'start': start, 'end': end})
         rows = result.fetchall()
         
         return [
@@ -380,18 +457,17 @@ class AnalyticsService:
         """Get weekly revenue breakdown"""
         query = text("""
             SELECT 
-                DATE_TRUNC('week', p.created_at) as week,
-                COALESCE(SUM(p.amount), 0) as revenue,
-                COUNT(DISTINCT s.id) as sessions
-            FROM payments p
-            LEFT JOIN sessions s ON s.payment_id = p.id
-            WHERE p.created_at >= :start 
-                AND p.created_at < :end
-                AND p.status = 'COMPLETED'
+                DATE_TRUNC('week', bucket_start) as week,
+                SUM(revenue) as revenue,
+                SUM(paid_sessions) as sessions
+            FROM analytics_hourly
+            WHERE bucket_start >= :start 
+                AND bucket_start < :end
             GROUP BY week
+            HAVING SUM(payment_count) > 0
             ORDER BY week
         """)
-        result = await self.db.execute(query, {'start': start, 'end': end})
+        result = await self._execute(query, {'start': start, 'end': end})
         rows = result.fetchall()
         
         return [
@@ -407,18 +483,17 @@ class AnalyticsService:
         """Get monthly revenue breakdown"""
         query = text("""
             SELECT 
-                DATE_TRUNC('month', p.created_at) as month,
-                COALESCE(SUM(p.amount), 0) as revenue,
-                COUNT(DISTINCT s.id) as sessions
-            FROM payments p
-            LEFT JOIN sessions s ON s.payment_id = p.id
-            WHERE p.created_at >= :start 
-                AND p.created_at < :end
-                AND p.status = 'COMPLETED'
+                DATE_TRUNC('month', bucket_start) as month,
+                SUM(revenue) as revenue,
+                SUM(paid_sessions) as sessions
+            FROM analytics_hourly
+            WHERE bucket_start >= :start 
+                AND bucket_start < :end
             GROUP BY month
+            HAVING SUM(payment_count) > 0
             ORDER BY month
         """)
-        result = await self.db.execute(query, {'start': start, 'end': end})
+        result = await self._execute(query, {'start': start, 'end': end})
         rows = result.fetchall()
         
         return [
@@ -433,33 +508,30 @@ class AnalyticsService:
     async def _count_active_sessions(self) -> int:
         """Count currently active sessions"""
         query = text("SELECT COUNT(*) FROM sessions WHERE status = 'ACTIVE'")
-        result = await self.db.execute(query)
+        result = await self._execute(query)
         row = result.fetchone()
         return row[0] if row else 0
     
     async def _count_sessions(self, start: datetime, end: datetime) -> int:
         """Count sessions in date range"""
         query = text("""
-            SELECT COUNT(*) 
-            FROM sessions 
-            WHERE started_at >= :start AND started_at < :end
+            SELECT COALESCE(SUM(session_count), 0) 
+            FROM analytics_hourly 
+            WHERE bucket_start >= :start AND bucket_start < :end
         """)
-        result = await self.db.execute(query, {'start': start, 'end': end})
+        result = await self._execute(query, {'start': start, 'end': end})
         row = result.fetchone()
         return row[0] if row else 0
     
     async def _get_avg_session_duration(self, start: datetime, end: datetime) -> float:
         """Get average session duration in minutes"""
         query = text("""
-            SELECT AVG(duration_minutes + COALESCE(extended_minutes, 0)) as avg_duration
-            FROM sessions
-            WHERE started_at >= :start 
-                AND started_at < :end
-                AND status IN ('STOPPED', 'EXPIRED')
-                AND duration_minutes IS NOT NULL
-                AND duration_minutes > 0
+            SELECT SUM(closed_minutes)::numeric / NULLIF(SUM(closed_sessions), 0) as avg_duration
+            FROM analytics_hourly
+            WHERE bucket_start >= :start 
+                AND bucket_start < :end
         """)
-        result = await self.db.execute(query, {'start': start, 'end': end})
+        result = await self._execute(query, {'start': start, 'end': end})
         row = result.fetchone()
         # Return 0 if no sessions or avg is NULL
         if not row or row.avg_duration is None:
@@ -470,16 +542,16 @@ class AnalyticsService:
         """Get hourly session distribution in CST timezone"""
         query = text("""
             SELECT 
-                EXTRACT(HOUR FROM started_at AT TIME ZONE 'America/Chicago') as hour,
-                COUNT(*) as count,
-                COALESCE(SUM(p.amount), 0) as revenue
-            FROM sessions s
-            LEFT JOIN payments p ON s.payment_id = p.id AND p.status = 'COMPLETED'
-            WHERE s.started_at >= :start AND s.started_at < :end
-            GROUP BY hour
+                local_hour as hour,
+                SUM(session_count) as count,
+                SUM(session_revenue) as revenue
+            FROM analytics_hourly
+            WHERE bucket_start >= :start AND bucket_start < :end
+            GROUP BY local_hour
+            HAVING SUM(session_count) > 0
             ORDER BY hour
         """)
-        result = await self.db.execute(query, {'start': start, 'end': end})
+        result = await self._execute(query, {'start': start, 'end': end})
         rows = result.fetchall()
         
         return [
@@ -495,15 +567,16 @@ class AnalyticsService:
         """Get daily session distribution"""
         query = text("""
             SELECT 
-                DATE(started_at AT TIME ZONE 'America/Chicago') as date,
-                COUNT(*) as count,
-                AVG(duration_minutes + extended_minutes) as avg_duration
-            FROM sessions
-            WHERE started_at >= :start AND started_at < :end
-            GROUP BY DATE(started_at AT TIME ZONE 'America/Chicago')
+                local_date as date,
+                SUM(session_count) as count,
+                SUM(session_minutes)::numeric / SUM(session_count) as avg_duration
+            FROM analytics_hourly
+            WHERE bucket_start >= :start AND bucket_start < :end
+            GROUP BY local_date
+            HAVING SUM(session_count) > 0
             ORDER BY date
         """)
-        result = await self.db.execute(query, {'start': start, 'end': end})
+        result = await self._execute(query, {'start': start, 'end': end})
         rows = result.fetchall()
         
         return [
@@ -519,37 +592,53 @@ class AnalyticsService:
         """Get session completion rate percentage"""
         query = text("""
             SELECT 
-                COUNT(*) as total,
-                SUM(CASE WHEN status = 'STOPPED' THEN 1 ELSE 0 END) as completed
-            FROM sessions
-            WHERE started_at >= :start AND started_at < :end
+                COALESCE(SUM(session_count), 0) as total,
+                COALESCE(SUM(stopped_sessions), 0) as completed
+            FROM analytics_hourly
+            WHERE bucket_start >= :start AND bucket_start < :end
         """)
-        result = await self.db.execute(query, {'start': start, 'end': end})
+        result = await self._execute(query, {'start': start, 'end': end})
         row = result.fetchone()
         
         if row and row.total > 0:
             return (row.completed / row.total) * 100
         return 0.0
     
-    async def _get_station_metrics(self, station_id: str) -> Dict[str, Any]:
-        """Get metrics for a specific station"""
-        # Last 30 days
-        start_date = datetime.now(timezone.utc) - timedelta(days=30)
+    async def _get_all_station_metrics(self) -> List[Any]:
+        """Get last-30-day session aggregates for every station, ordered by name"""
+        # Window starts on the hour so it lines up with the fact buckets
+        start_date = (datetime.now(timezone.utc) - timedelta(days=30)).replace(minute=0, second=0, microsecond=0)
         
+        # Aggregate facts once per station, then attach to every station
+        # so stations without sessions still appear with zeros
         query = text("""
             SELECT 
-                COUNT(*) as total_sessions,
-                SUM(duration_minutes + extended_minutes) as total_minutes,
-                AVG(duration_minutes + extended_minutes) as avg_duration,
-                COALESCE(SUM(p.amount), 0) as revenue
-            FROM sessions s
-            LEFT JOIN payments p ON s.payment_id = p.id AND p.status = 'COMPLETED'
-            WHERE s.station_id = :station_id
-                AND s.started_at >= :start_date
+                st.id,
+                st.name,
+                COALESCE(m.total_sessions, 0) as total_sessions,
+                m.total_minutes,
+                m.avg_duration,
+                COALESCE(m.revenue, 0) as revenue
+            FROM stations st
+            LEFT JOIN (
+                SELECT 
+                    station_id,
+                    SUM(session_count) as total_sessions,
+                    SUM(session_minutes) as total_minutes,
+                    SUM(session_minutes)::numeric / NULLIF(SUM(session_count), 0) as avg_duration,
+                    SUM(session_revenue) as revenue
+                FROM analytics_hourly
+                WHERE bucket_start >= :start_date
+                GROUP BY station_id
+            ) m ON m.station_id = st.id
+            ORDER BY st.name
         """)
-        result = await self.db.execute(query, {'station_id': station_id, 'start_date': start_date})
-        row = result.fetchone()
-        
+        result = await self._execute(query, {'start_date': start_date})
+        return result.fetchall()
+    
+    @staticmethod
+    def _station_metrics_from_row(row) -> Dict[str, Any]:
+        """Derive utilization metrics from a station aggregate row"""
         total_hours = float(row.total_minutes) / 60 if row.total_minutes else 0
         
         # Calculate utilization (assuming 16 hours/day operation)
@@ -560,10 +649,10 @@ class AnalyticsService:
         downtime_hours = available_hours - total_hours
         
         return {
-            'total_sessions': row.total_sessions if row else 0,
+            'total_sessions': row.total_sessions,
             'total_hours': round(total_hours, 1),
-            'avg_duration': round(float(row.avg_duration), 1) if row and row.avg_duration else 0,
-            'revenue': round(float(row.revenue), 2) if row else 0,
+            'avg_duration': round(float(row.avg_duration), 1) if row.avg_duration else 0,
+            'revenue': round(float(row.revenue), 2),
             'utilization': round(utilization, 2),
             'downtime_hours': round(downtime_hours, 1),
         }
@@ -0,0 +1,136 @@
+"""
+Dashboard Service
+Builds the real-time dashboard snapshot in a single database round trip
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any
+from sqlalchemy import select, func, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from app.models.station import Station, StationStatus
+from app.models.session import Session, SessionStatus
+from app.models.payment import Payment, PaymentStatus
+
+
+class DashboardService:
+    """Service for building dashboard snapshots"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_snapshot(self) -> Dict[str, Any]:
+        """
+        Get the full dashboard payload
+
+        Stations, their active session, the active session count and today's
+        revenue are all fetched by one statement, so the number of queries
+        stays constant no matter how many stations are on the floor.
+
+        Returns:
+            Dashboard data with totals and per-station session state
+        """
+        now = datetime.now(timezone.utc)
+
+        result = await self.db.execute(self._snapshot_query(now))
+        rows = result.all()
+
+        # The totals row is always present, even when there are no stations
+        active_sessions = rows[0].active_sessions if rows else 0
+        revenue_today = rows[0].revenue_today if rows else 0
+
+        stations_data = []
+        available_stations = 0
+
+        for row in rows:
+            station = row.Station
+            session = row.active_session
+
+            if station is None:
+                continue
+
+            if station.status == StationStatus.ONLINE:
+                available_stations += 1
+
+            remaining_seconds = None
+            if session:
+                remaining = (session.scheduled_end_at - now).total_seconds()
+                remaining_seconds = max(0, int(remaining))
+
+            stations_data.append({
+                "station": {
+                    "id": str(station.id),
+                    "name": station.name,
+                    "station_type": station.station_type.value,
+                    "status": station.status.value,
+                    "location": station.location
+                },
+                "session": {
+                    "id": str(session.id),
+                    "started_at": session.started_at.isoformat(),
+                    "scheduled_end_at": session.scheduled_end_at.isoformat(),
+                    "duration_minutes": session.duration_minutes
+                } if session else None,
+                "remaining_seconds": remaining_seconds
+            })
+
+        return {
+            "active_sessions": active_sessions or 0,
+            "total_stations": len(stations_data),
+            "available_stations": available_stations,
+            "revenue_today": float(revenue_today or 0.0),
+            "stations": stations_data,
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
+
+    def _snapshot_query(self, now: datetime):
+        """
+        Build the snapshot statement
+
+        totals LEFT JOIN stations LEFT JOIN LATERAL (latest active session),
+        so every non-deleted station gets one row carrying the global totals.
+        """
+        # Today's revenue uses the 6AM to 6AM cycle
+        if now.hour < 6:
+            today_6am = now.replace(hour=6, minute=0, second=0, microsecond=0) - timedelta(days=1)
+        else:
+            today_6am = now.replace(hour=6, minute=0, second=0, microsecond=0)
+
+        active_count = (
+            select(func.count(Session.id))
+            .where(Session.status == SessionStatus.ACTIVE)
+            .scalar_subquery()
+        )
+        revenue = (
+            select(func.sum(Payment.amount))
+            .where(
+                Payment.status == PaymentStatus.COMPLETED,
+                Payment.created_at >= today_6am
+            )
+            .scalar_subquery()
+        )
+        totals = select(
+            active_count.label("active_sessions"),
+            revenue.label("revenue_today")
+        ).subquery("totals")
+
+        # Latest active session per station (limit 1 in case of duplicates)
+        latest_session = (
+            select(Session)
+            .where(
+                Session.station_id == Station.id,
+                Session.status == SessionStatus.ACTIVE
+            )
+            .order_by(Session.started_at.desc())
+            .limit(1)
+            .lateral("latest_session")
+        )
+        active_session = aliased(Session, latest_session, name="active_session")
+
+        return (
+            select(totals.c.active_sessions, totals.c.revenue_today, Station, active_session)
+            .select_from(totals)
+            .outerjoin(Station, Station.deleted_at.is_(None))
+            .outerjoin(latest_session, true())
+            .order_by(Station.name)
+        )
@@ -4,7 +4,9 @@ from typing import Optional, Dict, Any
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from app.core.database import AsyncSessionLocal
 from app.models.event import Event
+from app.services.event_sink import event_sink
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -14,29 +16,67 @@ class EventLogger:
     
     @staticmethod
     async def log_event(
-        db: AsyncSession,
+        db: Optional[AsyncSession],
         event_type: str,
         entity_type: Optional[str] = None,
         entity_id: Optional[UUID] = None,
         user_id: Optional[UUID] = None,
         data: Optional[Dict[str, Any]] = None,
-        ip_address: Optional[str] = None
+        ip_address: Optional[str] = None,
+        durable: bool = False
     ) -> Optional[Event]:
         """
         Log an event to the database
         
+        By default the event is queued on the event sink and written in the
+        next batch, so the caller doesn't pay for a commit. Pass durable=True
+        for audit-critical events that must be committed before returning.
+        
         Args:
-            db: Database session
+            db: Database session (only used when durable; may be None)
             event_type: Type of event (e.g., 'session_start', 'station_created')
             entity_type: Type of entity (e.g., 'session', 'station')
             entity_id: ID of the entity
             user_id: ID of the user who triggered the event
             data: Additional event data as JSON
             ip_address: IP address of the client
+            durable: Commit synchronously instead of queueing
         
         Returns:
-            Created Event object or None if failed
+            Created Event object when durable, otherwise None
         """
+        if not durable:
+            event_sink.enqueue(
+                event_type=event_type,
+                entity_type=entity_type,
+                entity_id=entity_id,
+                user_id=user_id,
+                data=data,
+                ip_address=ip_address
+            )
+            return None
+        
+        if db is None:
+            async with AsyncSessionLocal() as own_db:
+                return await EventLogger._write_event(
+                    own_db, event_type, entity_type, entity_id, user_id, data, ip_address
+                )
+        
+        return await EventLogger._write_event(
+            db, event_type, entity_type, entity_id, user_id, data, ip_address
+        )
+    
+    @staticmethod
+    async def _write_event(
+        db: AsyncSession,
+        event_type: str,
+        entity_type: Optional[str],
+        entity_id: Optional[UUID],
+        user_id: Optional[UUID],
+        data: Optional[Dict[str, Any]],
+        ip_address: Optional[str]
+    ) -> Optional[Event]:
+        """Insert and commit a single event"""
         try:
             event = Event(
                 event_type=event_type,
@@ -58,11 +98,12 @@ class EventLogger:
     
     @staticmethod
     async def log_session_event(
-        db: AsyncSession,
+        db: Optional[AsyncSession],
         event_type: str,
         session_id: UUID,
         user_id: Optional[UUID] = None,
-        data: Optional[Dict[str, Any]] = None
+        data: Optional[Dict[str, Any]] = None,
+        durable: bool = False
     ):
         """Log a session-related event"""
         return await EventLogger.log_event(
@@ -71,16 +112,18 @@ class EventLogger:
             entity_type="session",
             entity_id=session_id,
             user_id=user_id,
-            data=data
+            data=data,
+            durable=durable
         )
     
     @staticmethod
     async def log_station_event(
-        db: AsyncSession,
+        db: Optional[AsyncSession],
         event_type: str,
         station_id: UUID,
         user_id: Optional[UUID] = None,
-        data: Optional[Dict[str, Any]] = None
+        data: Optional[Dict[str, Any]] = None,
+        durable: bool = False
     ):
         """Log a station-related event"""
         return await EventLogger.log_event(
@@ -89,12 +132,13 @@ class EventLogger:
             entity_type="station",
             entity_id=station_id,
             user_id=user_id,
-            data=data
+            data=data,
+            durable=durable
         )
     
     @staticmethod
     async def log_agent_event(
-        db: AsyncSession,
+        db: Optional[AsyncSession],
         event_type: str,
         station_id: UUID,
         data: Optional[Dict[str, Any]] = None
@@ -110,7 +154,7 @@ class EventLogger:
     
     @staticmethod
     async def log_error(
-        db: AsyncSession,
+        db: Optional[AsyncSession],
         error_type: str,
         error_message: str,
         entity_type: Optional[str] = None,
@@ -0,0 +1,195 @@
+"""Buffered event writer: batches audit events off the request path"""
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import metrics_registry
+from app.models.event import Event
+
+logger = logging.getLogger(__name__)
+
+# Write attempts per batch before it is discarded
+MAX_BATCH_ATTEMPTS = 5
+
+class EventSink:
+    """
+    In-memory event queue flushed to the database in batches
+
+    Callers enqueue a row and return immediately; a background task writes
+    up to EVENT_SINK_BATCH_SIZE rows per multi-row INSERT, at most
+    EVENT_SINK_FLUSH_INTERVAL seconds after the first row arrived. The
+    timestamp is taken at enqueue so event order and times are preserved.
+
+    The queue is bounded: when it is full the new event is dropped and
+    counted rather than blocking the caller. Pending events are flushed on
+    shutdown.
+    """
+
+    def __init__(self):
+        self.queue: Deque[Dict[str, Any]] = deque()
+        self.running = False
+        self.task = None
+        self._ready = asyncio.Event()
+
+        # Metrics
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.max_queue_depth = 0
+        self.last_flush_ms = 0.0
+        self._consecutive_failures = 0
+
+    def enqueue(
+        self,
+        event_type: str,
+        entity_type=None,
+        entity_id=None,
+        user_id=None,
+        data=None,
+        ip_address=None
+    ) -> bool:
+        """
+        Queue an event for the next batch
+
+        Returns:
+            False if the queue was full and the event was dropped
+        """
+        if len(self.queue) >= settings.EVENT_SINK_QUEUE_SIZE:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning(f"Event queue full, dropped {self.dropped} events so far")
+            return False
+
+        self.queue.append({
+            "event_type": event_type,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "user_id": user_id,
+            "data": data or {},
+            "ip_address": ip_address,
+            "timestamp": datetime.now(timezone.utc)
+        })
+        self.enqueued += 1
+        self.max_queue_depth = max(self.max_queue_depth, len(self.queue))
+        self._ready.set()
+        return True
+
+    async def start(self):
+        """Start the background writer"""
+        if self.running:
+            return
+
+        self.running = True
+        self.task = asyncio.create_task(self._writer_loop())
+        logger.info("Event sink started")
+
+    async def stop(self):
+        """Stop the writer and flush whatever is still queued"""
+        self.running = False
+        if self.task:
+            # Let the writer finish its current batch rather than cancelling
+            # mid-commit, which could write the batch twice
+            self._ready.set()
+            await self.task
+
+        while self.queue:
+            if not await self._flush_batch():
+                break
+
+        if self.queue:
+            logger.error(f"Event sink stopped with {len(self.queue)} unwritten events")
+        logger.info("Event sink stopped")
+
+    def get_metrics(self) -> dict:
+        """Queue depth and write/drop counters"""
+        return {
+            "queue_depth": len(self.queue),
+            "queue_size": settings.EVENT_SINK_QUEUE_SIZE,
+            "max_queue_depth": self.max_queue_depth,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_flush_ms": round(self.last_flush_ms, 2)
+        }
+
+    async def _writer_loop(self):
+        """Wait for events, give the batch a moment to fill, then write it"""
+        while self.running:
+            try:
+                await self._ready.wait()
+
+                if len(self.queue) < settings.EVENT_SINK_BATCH_SIZE:
+                    await asyncio.sleep(settings.EVENT_SINK_FLUSH_INTERVAL)
+
+                while self.queue:
+                    if not await self._flush_batch():
+                        # Database unavailable, retry after the next interval
+                        await asyncio.sleep(settings.EVENT_SINK_FLUSH_INTERVAL)
+                        break
+
+                if not self.queue:
+                    self._ready.clear()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in event sink: {e}", exc_info=True)
+                await asyncio.sleep(settings.EVENT_SINK_FLUSH_INTERVAL)
+
+    async def _flush_batch(self) -> bool:
+        """
+        Write one batch from the head of the queue
+
+        Returns:
+            False if the write failed; the batch stays queued for a retry
+            until MAX_BATCH_ATTEMPTS is reached
+        """
+        batch: List[Dict[str, Any]] = [
+            self.queue[i] for i in range(min(len(self.queue), settings.EVENT_SINK_BATCH_SIZE))
+        ]
+
+        start = time.monotonic()
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(insert(Event), batch)
+                await db.commit()
+        except Exception as e:
+            self.failed += 1
+            self._consecutive_failures += 1
+            logger.error(f"Failed to write {len(batch)} events: {e}")
+            if self._consecutive_failures < MAX_BATCH_ATTEMPTS:
+                return False
+
+            # Don't let one bad batch block the queue forever
+            logger.error(f"Discarding {len(batch)} events after {MAX_BATCH_ATTEMPTS} failed attempts")
+            for _ in batch:
+                self.queue.popleft()
+            self.dropped += len(batch)
+            self._consecutive_failures = 0
+            return False
+
+        self._consecutive_failures = 0
+
+        # Writes only happen from one task at a time, so the head is still our batch
+        for _ in batch:
+            self.queue.popleft()
+
+        self.written += len(batch)
+        self.batches += 1
+        self.last_flush_ms = (time.monotonic() - start) * 1000
+        logger.debug(f"Wrote {len(batch)} events in {self.last_flush_ms:.1f} ms")
+        return True
+
+# Global event sink instance
+event_sink = EventSink()
+metrics_registry.register("event_sink", event_sink.get_metrics)
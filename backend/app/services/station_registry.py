@@ -0,0 +1,269 @@
+"""In-process registry of stations and their active sessions"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.session import Session, SessionStatus
+from app.models.station import Station, StationStatus
+from app.websocket.event_bus import event_bus
+
+logger = logging.getLogger(__name__)
+
+def _key(station_id: str) -> Optional[str]:
+    """Canonical (lowercase, hyphenated) form of a station ID, None if invalid"""
+    try:
+        return str(UUID(str(station_id)))
+    except ValueError:
+        return None
+
+@dataclass
+class StationEntry:
+    """What the agent handlers need to know about a station"""
+    id: str
+    name: str
+    status: StationStatus
+    specs: Optional[dict] = None
+    session_id: Optional[str] = None
+    session_end_at: Optional[datetime] = None
+
+class StationRegistry:
+    """
+    Authoritative in-memory copy of station rows and active sessions
+
+    Loaded once at startup so agent connects, hellos, status changes and
+    sync requests are answered from memory; the database is only written
+    when a value actually changes. Every write path (station and session
+    endpoints, the session monitor, agent handlers) calls sync_station /
+    sync_session after committing, which updates this worker and publishes
+    the change to the others. A periodic reload repairs anything a lost
+    bus message left stale.
+    """
+
+    def __init__(self):
+        self.stations: Dict[str, StationEntry] = {}
+        self.running = False
+        self.task = None
+
+    def get(self, station_id: str) -> Optional[StationEntry]:
+        """Get a station from memory"""
+        return self.stations.get(_key(station_id))
+
+    async def ensure(self, station_id: str) -> Optional[StationEntry]:
+        """Get a station, loading it if it was created after the last (re)load"""
+        station_id = _key(station_id)
+        entry = self.stations.get(station_id)
+        if entry is None and station_id:
+            entry = await self._load_station(station_id)
+        return entry
+
+    async def start(self):
+        """Load the registry and start the periodic reload"""
+        if self.running:
+            return
+
+        try:
+            await self.load()
+        except Exception as e:
+            logger.error(f"Failed to load station registry: {e}")
+
+        self.running = True
+        self.task = asyncio.create_task(self._reload_loop())
+        logger.info(f"Station registry started with {len(self.stations)} stations")
+
+    async def stop(self):
+        """Stop the periodic reload"""
+        self.running = False
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        logger.info("Station registry stopped")
+
+    async def load(self):
+        """Replace the registry with the current database state (two queries)"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Station.id, Station.name, Station.status, Station.specs)
+            )
+            stations = {
+                str(row.id): StationEntry(str(row.id), row.name, row.status, row.specs)
+                for row in result
+            }
+
+            result = await db.execute(
+                select(Session.id, Session.station_id, Session.scheduled_end_at)
+                .where(Session.status == SessionStatus.ACTIVE)
+            )
+            for row in result:
+                entry = stations.get(str(row.station_id))
+                if entry:
+                    entry.session_id = str(row.id)
+                    entry.session_end_at = row.scheduled_end_at
+
+        self.stations = stations
+
+    async def set_status(self, station_id: str, new_status: StationStatus) -> bool:
+        """
+        Write a station's status if it differs from the registry
+
+        Returns:
+            True if the status changed
+        """
+        entry = await self.ensure(station_id)
+        if entry is None or entry.status == new_status:
+            return False
+
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(Station).where(Station.id == UUID(entry.id)).values(status=new_status)
+            )
+            await db.commit()
+
+        entry.status = new_status
+        await self._publish_station(entry)
+        return True
+
+    async def set_specs(self, station_id: str, specs: dict) -> bool:
+        """Write a station's hardware specs if they differ from the registry"""
+        entry = await self.ensure(station_id)
+        if entry is None or entry.specs == specs:
+            return False
+
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(Station).where(Station.id == UUID(entry.id)).values(specs=specs)
+            )
+            await db.commit()
+
+        entry.specs = specs
+        await self._publish_station(entry)
+        return True
+
+    async def sync_station(self, station: Station):
+        """Record a committed station row"""
+        station_id = str(station.id)
+        entry = self.stations.get(station_id)
+        if entry is None:
+            entry = self.stations[station_id] = StationEntry(station_id, station.name, station.status)
+        entry.name = station.name
+        entry.status = station.status
+        entry.specs = station.specs
+        await self._publish_station(entry)
+
+    async def sync_session(self, session: Session):
+        """Record a committed session: active ones are attached to their station, ended ones removed"""
+        entry = self.stations.get(str(session.station_id))
+        if entry is None:
+            return
+
+        if session.status == SessionStatus.ACTIVE:
+            self._attach_session(entry, str(session.id), session.scheduled_end_at)
+        else:
+            self._detach_session(entry, str(session.id))
+
+        await event_bus.publish("station_registry", {
+            "action": "session",
+            "station_id": entry.id,
+            "session_id": str(session.id),
+            "active": session.status == SessionStatus.ACTIVE,
+            "scheduled_end_at": session.scheduled_end_at.isoformat()
+        })
+
+    async def remove_station(self, station_id: str):
+        """Forget a permanently deleted station"""
+        self.stations.pop(station_id, None)
+        await event_bus.publish("station_registry", {"action": "remove", "station_id": station_id})
+
+    @staticmethod
+    def _attach_session(entry: StationEntry, session_id: str, scheduled_end_at: datetime):
+        entry.session_id = session_id
+        entry.session_end_at = scheduled_end_at
+
+    @staticmethod
+    def _detach_session(entry: StationEntry, session_id: str):
+        if entry.session_id == session_id:
+            entry.session_id = None
+            entry.session_end_at = None
+
+    async def _publish_station(self, entry: StationEntry):
+        await event_bus.publish("station_registry", {
+            "action": "station",
+            "station_id": entry.id,
+            "name": entry.name,
+            "status": entry.status.value,
+            "specs": entry.specs
+        })
+
+    async def _handle_bus(self, payload: dict):
+        """Apply a change committed on another worker"""
+        action = payload.get("action")
+        station_id = payload.get("station_id")
+
+        if action == "remove":
+            self.stations.pop(station_id, None)
+        elif action == "station":
+            entry = self.stations.get(station_id)
+            status = StationStatus(payload["status"])
+            if entry is None:
+                self.stations[station_id] = StationEntry(station_id, payload["name"], status, payload.get("specs"))
+            else:
+                entry.name = payload["name"]
+                entry.status = status
+                entry.specs = payload.get("specs")
+        elif action == "session":
+            entry = self.stations.get(station_id)
+            if entry is None:
+                return
+            if payload.get("active"):
+                self._attach_session(entry, payload["session_id"], datetime.fromisoformat(payload["scheduled_end_at"]))
+            else:
+                self._detach_session(entry, payload["session_id"])
+
+    async def _load_station(self, station_id: str) -> Optional[StationEntry]:
+        """Load one station (and its active session) into the registry"""
+        station_uuid = UUID(station_id)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Station.id, Station.name, Station.status, Station.specs)
+                .where(Station.id == station_uuid)
+            )
+            row = result.one_or_none()
+            if row is None:
+                return None
+            entry = StationEntry(station_id, row.name, row.status, row.specs)
+
+            result = await db.execute(
+                select(Session.id, Session.scheduled_end_at)
+                .where(Session.station_id == station_uuid, Session.status == SessionStatus.ACTIVE)
+                .limit(1)
+            )
+            session = result.one_or_none()
+            if session:
+                self._attach_session(entry, str(session.id), session.scheduled_end_at)
+
+        self.stations[station_id] = entry
+        return entry
+
+    async def _reload_loop(self):
+        """Periodic full reload (safety net for missed bus messages)"""
+        while self.running:
+            try:
+                await asyncio.sleep(settings.STATION_REGISTRY_RELOAD_INTERVAL)
+                await self.load()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Failed to reload station registry: {e}")
+
+# Global station registry instance
+station_registry = StationRegistry()
+event_bus.register("station_registry", station_registry._handle_bus)
@@ -0,0 +1,374 @@
+"""Agent telemetry: batched ingest of status_update samples into downsampled tiers"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import metrics_registry
+from app.scheduler.leader import LeaderLease
+
+logger = logging.getLogger(__name__)
+
+# Bucket widths in seconds, finest first
+RESOLUTIONS = (60, 900, 3600)
+
+UPSERT = text("""
+    INSERT INTO station_telemetry (
+        station_id, resolution, bucket_start, samples,
+        cpu_sum, cpu_max, memory_sum, memory_max, disk_sum, disk_max,
+        locked_samples, unhealthy_samples
+    )
+    VALUES (
+        :station_id, :resolution, :bucket_start, :samples,
+        :cpu_sum, :cpu_max, :memory_sum, :memory_max, :disk_sum, :disk_max,
+        :locked_samples, :unhealthy_samples
+    )
+    ON CONFLICT (station_id, resolution, bucket_start) DO UPDATE SET
+        samples = station_telemetry.samples + EXCLUDED.samples,
+        cpu_sum = station_telemetry.cpu_sum + EXCLUDED.cpu_sum,
+        cpu_max = GREATEST(station_telemetry.cpu_max, EXCLUDED.cpu_max),
+        memory_sum = station_telemetry.memory_sum + EXCLUDED.memory_sum,
+        memory_max = GREATEST(station_telemetry.memory_max, EXCLUDED.memory_max),
+        disk_sum = station_telemetry.disk_sum + EXCLUDED.disk_sum,
+        disk_max = GREATEST(station_telemetry.disk_max, EXCLUDED.disk_max),
+        locked_samples = station_telemetry.locked_samples + EXCLUDED.locked_samples,
+        unhealthy_samples = station_telemetry.unhealthy_samples + EXCLUDED.unhealthy_samples
+""")
+
+def _retention() -> Dict[int, timedelta]:
+    """How long each tier is kept"""
+    return {
+        60: timedelta(hours=settings.TELEMETRY_MINUTE_RETENTION_HOURS),
+        900: timedelta(days=settings.TELEMETRY_QUARTER_RETENTION_DAYS),
+        3600: timedelta(days=settings.TELEMETRY_HOUR_RETENTION_DAYS),
+    }
+
+def _bucket(ts: float, resolution: int) -> datetime:
+    return datetime.fromtimestamp(ts - ts % resolution, tz=timezone.utc)
+
+def _percent(value) -> Optional[float]:
+    try:
+        return min(max(float(value), 0.0), 100.0)
+    except (TypeError, ValueError):
+        return None
+
+@dataclass
+class _Aggregate:
+    """Samples of one station within one minute"""
+    samples: int = 0
+    cpu_sum: float = 0.0
+    cpu_max: float = 0.0
+    memory_sum: float = 0.0
+    memory_max: float = 0.0
+    disk_sum: float = 0.0
+    disk_max: float = 0.0
+    locked_samples: int = 0
+    unhealthy_samples: int = 0
+
+    def add(self, cpu: float, memory: float, disk: float, locked: bool, healthy: bool):
+        self.samples += 1
+        self.cpu_sum += cpu
+        self.cpu_max = max(self.cpu_max, cpu)
+        self.memory_sum += memory
+        self.memory_max = max(self.memory_max, memory)
+        self.disk_sum += disk
+        self.disk_max = max(self.disk_max, disk)
+        self.locked_samples += int(locked)
+        self.unhealthy_samples += int(not healthy)
+
+    def merge(self, other: "_Aggregate"):
+        self.samples += other.samples
+        self.cpu_sum += other.cpu_sum
+        self.cpu_max = max(self.cpu_max, other.cpu_max)
+        self.memory_sum += other.memory_sum
+        self.memory_max = max(self.memory_max, other.memory_max)
+        self.disk_sum += other.disk_sum
+        self.disk_max = max(self.disk_max, other.disk_max)
+        self.locked_samples += other.locked_samples
+        self.unhealthy_samples += other.unhealthy_samples
+
+class TelemetryStore:
+    """
+    Ingests agent status_update samples into the station_telemetry tiers
+
+    Samples are folded into per-station one-minute aggregates in memory;
+    every TELEMETRY_FLUSH_INTERVAL the pending aggregates are upserted into
+    all three tiers (1 min, 15 min, 1 h) at once, so downsampling needs no
+    separate pass and a flush is a handful of rows per station. Upserts
+    add sums and take maxima, so several workers (or a late flush) merge
+    into the same bucket correctly.
+
+    Retention deletes expired buckets per tier; only the holder of the
+    telemetry lease runs it. The newest raw sample per station is also kept
+    in memory for live views.
+    """
+
+    def __init__(self):
+        self.running = False
+        self.task = None
+        # (station_id, minute bucket) -> aggregate
+        self._pending: Dict[Tuple[str, datetime], _Aggregate] = {}
+        # station_id -> (received_at, sample)
+        self._latest: Dict[str, Tuple[datetime, dict]] = {}
+        self._next_retention = 0.0
+        self.lease = LeaderLease("telemetry_retention", settings.TELEMETRY_RETENTION_INTERVAL * 2)
+
+        # Metrics
+        self.received = 0
+        self.rejected = 0
+        self.flushed_rows = 0
+        self.failed_flushes = 0
+
+    def record(self, station_id: str, data: dict) -> bool:
+        """
+        Add one status_update payload; timestamped on receipt
+
+        Returns:
+            False if the sample had no usable CPU/memory/disk values
+        """
+        system = data.get("system") or {}
+        cpu = _percent(system.get("cpu_percent"))
+        memory = _percent(system.get("memory_percent"))
+        disk = _percent(system.get("disk_percent"))
+        if cpu is None or memory is None or disk is None:
+            self.rejected += 1
+            return False
+
+        now = time.time()
+        key = (station_id, _bucket(now, RESOLUTIONS[0]))
+        aggregate = self._pending.get(key)
+        if aggregate is None:
+            aggregate = self._pending[key] = _Aggregate()
+        aggregate.add(cpu, memory, disk, bool(data.get("locked")), data.get("healthy", True) is not False)
+
+        self._latest[station_id] = (datetime.fromtimestamp(now, tz=timezone.utc), {
+            "cpu_percent": cpu,
+            "memory_percent": memory,
+            "disk_percent": disk,
+            "locked": bool(data.get("locked")),
+            "healthy": data.get("healthy", True) is not False,
+        })
+        self.received += 1
+        return True
+
+    def discard(self, station_id: str):
+        """Drop a deleted station's pending aggregates and latest sample"""
+        for key in [key for key in self._pending if key[0] == station_id]:
+            del self._pending[key]
+        self._latest.pop(station_id, None)
+
+    def get_latest(self, station_id: str) -> Optional[dict]:
+        """Newest sample received by this worker for a station"""
+        latest = self._latest.get(station_id)
+        if latest is None:
+            return None
+        received_at, sample = latest
+        return {"received_at": received_at.isoformat(), **sample}
+
+    async def start(self):
+        """Start the periodic flush"""
+        if self.running:
+            return
+
+        self.running = True
+        self.task = asyncio.create_task(self._flush_loop())
+        logger.info("Telemetry store started")
+
+    async def stop(self):
+        """Stop the periodic flush and write what is pending"""
+        self.running = False
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+        await self.lease.release()
+        logger.info("Telemetry store stopped")
+
+    async def flush(self) -> int:
+        """Upsert pending aggregates into every tier; returns rows written"""
+        if not self._pending:
+            return 0
+
+        pending, self._pending = self._pending, {}
+        # Roll minutes up into every tier before writing
+        buckets: Dict[Tuple[str, int, datetime], _Aggregate] = {}
+        for (station_id, minute), aggregate in pending.items():
+            for resolution in RESOLUTIONS:
+                key = (station_id, resolution, _bucket(minute.timestamp(), resolution))
+                buckets.setdefault(key, _Aggregate()).merge(aggregate)
+        rows = [
+            {
+                "station_id": UUID(station_id),
+                "resolution": resolution,
+                "bucket_start": bucket_start,
+                **aggregate.__dict__,
+            }
+            for (station_id, resolution, bucket_start), aggregate in buckets.items()
+        ]
+
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(UPSERT, rows)
+                await db.commit()
+        except IntegrityError as e:
+            self.failed_flushes += 1
+            logger.error(f"Failed to write {len(rows)} telemetry rows: {e}")
+            # A station was hard-deleted (possibly on another worker) while its
+            # samples were pending; drop those so the rest can be written
+            try:
+                existing = await self._existing_stations({station_id for station_id, _ in pending})
+            except Exception as lookup_error:
+                logger.error(f"Failed to look up telemetry stations: {lookup_error}")
+                existing = None
+            if existing is not None:
+                dropped = {station_id for station_id, _ in pending if station_id not in existing}
+                if dropped:
+                    logger.warning(f"Dropping telemetry for deleted station(s): {', '.join(sorted(dropped))}")
+                    pending = {key: aggregate for key, aggregate in pending.items() if key[0] in existing}
+            self._requeue(pending)
+            return 0
+        except Exception as e:
+            self.failed_flushes += 1
+            logger.error(f"Failed to write {len(rows)} telemetry rows: {e}")
+            self._requeue(pending)
+            return 0
+
+        self.flushed_rows += len(rows)
+        logger.debug(f"Flushed {len(pending)} telemetry aggregate(s) into {len(rows)} rows")
+        return len(rows)
+
+    def _requeue(self, pending: Dict[Tuple[str, datetime], _Aggregate]):
+        """Put unwritten aggregates back unless the backlog has grown past its bound"""
+        for key, aggregate in pending.items():
+            if key in self._pending:
+                self._pending[key].merge(aggregate)
+            elif len(self._pending) < settings.TELEMETRY_MAX_PENDING:
+                self._pending[key] = aggregate
+
+    async def _existing_stations(self, station_ids: Set[str]) -> Set[str]:
+        """Which of these stations still exist (soft-deleted ones included)"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                text("SELECT id FROM stations WHERE id = ANY(:ids)"),
+                {"ids": [UUID(station_id) for station_id in station_ids]}
+            )
+            return {str(row.id) for row in result}
+
+    async def expire(self) -> int:
+        """Delete buckets past each tier's retention"""
+        now = datetime.now(timezone.utc)
+        deleted = 0
+        async with AsyncSessionLocal() as db:
+            for resolution, keep in _retention().items():
+                result = await db.execute(
+                    text("DELETE FROM station_telemetry WHERE resolution = :resolution AND bucket_start < :cutoff"),
+                    {"resolution": resolution, "cutoff": now - keep}
+                )
+                deleted += result.rowcount or 0
+            await db.commit()
+        if deleted:
+            logger.info(f"Expired {deleted} telemetry bucket(s)")
+        return deleted
+
+    async def get_history(
+        self,
+        db: AsyncSession,
+        station_id: UUID,
+        start: datetime,
+        end: datetime,
+        resolution: Optional[int] = None
+    ) -> dict:
+        """
+        Get a station's telemetry between two times
+
+        Args:
+            resolution: Tier in seconds; picked from the range length if None
+        """
+        if resolution is None:
+            span = end - start
+            if span <= timedelta(hours=6):
+                resolution = 60
+            elif span <= timedelta(days=7):
+                resolution = 900
+            else:
+                resolution = 3600
+
+        result = await db.execute(
+            text("""
+                SELECT bucket_start, samples, cpu_sum, cpu_max, memory_sum, memory_max,
+                       disk_sum, disk_max, locked_samples, unhealthy_samples
+                FROM station_telemetry
+                WHERE station_id = :station_id
+                    AND resolution = :resolution
+                    AND bucket_start >= :start
+                    AND bucket_start < :end
+                ORDER BY bucket_start
+            """),
+            {"station_id": station_id, "resolution": resolution, "start": start, "end": end}
+        )
+
+        points = [
+            {
+                "bucket_start": row.bucket_start.isoformat(),
+                "samples": row.samples,
+                "cpu_avg": round(row.cpu_sum / row.samples, 1),
+                "cpu_max": round(row.cpu_max, 1),
+                "memory_avg": round(row.memory_sum / row.samples, 1),
+                "memory_max": round(row.memory_max, 1),
+                "disk_avg": round(row.disk_sum / row.samples, 1),
+                "disk_max": round(row.disk_max, 1),
+                "locked_ratio": round(row.locked_samples / row.samples, 3),
+                "unhealthy_samples": row.unhealthy_samples,
+            }
+            for row in result
+            if row.samples
+        ]
+
+        return {
+            "station_id": str(station_id),
+            "resolution": resolution,
+            "points": points,
+            "latest": self.get_latest(str(station_id)),
+        }
+
+    def get_metrics(self) -> dict:
+        """Ingest counters"""
+        return {
+            "pending_aggregates": len(self._pending),
+            "received": self.received,
+            "rejected": self.rejected,
+            "flushed_rows": self.flushed_rows,
+            "failed_flushes": self.failed_flushes,
+        }
+
+    async def _flush_loop(self):
+        while self.running:
+            try:
+                await asyncio.sleep(settings.TELEMETRY_FLUSH_INTERVAL)
+                # Shielded so stopping mid-write doesn't lose the swapped-out batch
+                await asyncio.shield(self.flush())
+
+                if time.time() >= self._next_retention:
+                    self._next_retention = time.time() + settings.TELEMETRY_RETENTION_INTERVAL
+                    if await self.lease.acquire():
+                        await self.expire()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in telemetry store: {e}", exc_info=True)
+
+# Global telemetry store instance
+telemetry_store = TelemetryStore()
+metrics_registry.register("telemetry", telemetry_store.get_metrics)
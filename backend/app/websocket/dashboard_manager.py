@@ -1,77 +1,249 @@
-from typing import Dict, Set
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
 from fastapi import WebSocket
 from datetime import datetime
-import json
+import asyncio
 import logging
+import time
+
+from app.core.config import settings
+from app.core.metrics import metrics_registry
+from app.websocket.serialization import encode_message
+from app.websocket.event_bus import event_bus
 
 logger = logging.getLogger(__name__)
 
+# Slow consumer policies
+POLICY_DROP = "drop"              # Discard the new message
+POLICY_COALESCE = "coalesce"      # Replace a queued message for the same entity
+POLICY_DISCONNECT = "disconnect"  # Close the slow dashboard
+
+def _coalesce_key(message: dict) -> tuple:
+    """Messages with the same key describe the same entity, newest wins"""
+    data = message.get("data")
+    entity_id = data.get("id") if isinstance(data, dict) else None
+    return (message.get("type"), entity_id)
+
+class DashboardClient:
+    """A dashboard connection with its own bounded send queue and writer task"""
+
+    def __init__(self, websocket: WebSocket, max_queue: int, policy: str):
+        self.websocket = websocket
+        self.max_queue = max_queue
+        self.policy = policy
+        # Each entry is [coalesce key, message type, encoded frame, enqueued at (monotonic)]
+        self.queue: Deque[List[Any]] = deque()
+        self.task: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()
+
+        # Metrics
+        self.connected_at = datetime.utcnow()
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_queue_depth = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    @property
+    def client_id(self) -> str:
+        """Readable identifier for logs and metrics"""
+        client = getattr(self.websocket, "client", None)
+        if client:
+            return f"{client.host}:{client.port}"
+        return hex(id(self.websocket))
+
+    def enqueue(self, key: tuple, message_type: str, frame: str) -> bool:
+        """
+        Queue an encoded frame without waiting for the socket
+
+        Returns:
+            False if the client is too slow and must be disconnected
+        """
+        if len(self.queue) >= self.max_queue:
+            if self.policy == POLICY_DISCONNECT:
+                return False
+
+            if self.policy == POLICY_COALESCE:
+                for pending in self.queue:
+                    if pending[0] == key:
+                        pending[2] = frame
+                        self.coalesced += 1
+                        return True
+                # Nothing to merge with, make room by dropping the oldest update
+                self.queue.popleft()
+                self.dropped += 1
+            else:
+                self.dropped += 1
+                return True
+
+        self.queue.append([key, message_type, frame, time.monotonic()])
+        self.max_queue_depth = max(self.max_queue_depth, len(self.queue))
+        self._ready.set()
+        return True
+
+    async def run(self, on_error):
+        """Drain the queue into the socket until cancelled or the send fails"""
+        try:
+            while True:
+                if not self.queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+
+                _, message_type, frame, enqueued_at = self.queue.popleft()
+                await self.websocket.send_text(frame)
+
+                self.sent += 1
+                self.last_lag = time.monotonic() - enqueued_at
+                self.max_lag = max(self.max_lag, self.last_lag)
+                logger.debug(f"Broadcast to dashboard: {message_type}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error broadcasting to dashboard {self.client_id}: {e}")
+            on_error(self.websocket)
+
+    def get_metrics(self) -> dict:
+        """Queue depth and lag for this client"""
+        return {
+            "client": self.client_id,
+            "connected_at": self.connected_at.isoformat(),
+            "queue_depth": len(self.queue),
+            "max_queue_depth": self.max_queue_depth,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "last_lag_ms": round(self.last_lag * 1000, 2),
+            "max_lag_ms": round(self.max_lag * 1000, 2),
+        }
+
 class DashboardConnectionManager:
     """Manage WebSocket connections for dashboard clients"""
-    
+
     def __init__(self):
-        # Set of active dashboard WebSocket connections
-        self.active_connections: Set[WebSocket] = set()
-    
+        # Active dashboard WebSocket connections and their send queues
+        self.active_connections: Dict[WebSocket, DashboardClient] = {}
+
     async def connect(self, websocket: WebSocket):
         """Accept and register a new dashboard connection"""
         await websocket.accept()
-        self.active_connections.add(websocket)
+        client = DashboardClient(
+            websocket,
+            max_queue=settings.DASHBOARD_SEND_QUEUE_SIZE,
+            policy=settings.DASHBOARD_SLOW_CONSUMER_POLICY
+        )
+        client.task = asyncio.create_task(client.run(self.disconnect))
+        self.active_connections[websocket] = client
         logger.info(f"Dashboard client connected. Total: {len(self.active_connections)}")
-    
+
     def disconnect(self, websocket: WebSocket):
-        """Remove a dashboard connection"""
-        self.active_connections.discard(websocket)
+        """Remove a dashboard connection and stop its writer"""
+        client = self.active_connections.pop(websocket, None)
+        if client is None:
+            return
+
+        if client.task and client.task is not asyncio.current_task():
+            client.task.cancel()
         logger.info(f"Dashboard client disconnected. Total: {len(self.active_connections)}")
-    
+
+    async def _close_slow_client(self, websocket: WebSocket):
+        """Close a dashboard that fell too far behind"""
+        try:
+            await websocket.close()
+        except Exception as e:
+            logger.debug(f"Error closing slow dashboard: {e}")
+
     async def broadcast(self, message: dict):
-        """Broadcast message to all connected dashboards"""
+        """
+        Broadcast message to all connected dashboards
+
+        The message is encoded once and the same frame is queued per client
+        and written by each client's writer task, so this returns immediately
+        even if a dashboard is slow. Dashboards connected to other workers
+        receive the frame over the event bus.
+        """
+        message = {**message, "timestamp": datetime.utcnow().isoformat()}
+        key = _coalesce_key(message)
+        message_type = message.get("type")
+        frame = encode_message(message)
+
+        self._fan_out(key, message_type, frame)
+        await event_bus.publish("dashboard_broadcast", {
+            "key": list(key),
+            "type": message_type,
+            "frame": frame
+        })
+
+    async def _handle_bus_broadcast(self, payload: dict):
+        """Deliver a broadcast published by another worker"""
+        self._fan_out(tuple(payload["key"]), payload.get("type"), payload["frame"])
+
+    def _fan_out(self, key: tuple, message_type: str, frame: str):
+        """Queue an encoded frame for every local dashboard"""
         if not self.active_connections:
             return
-        
-        message["timestamp"] = datetime.utcnow().isoformat()
-        disconnected = []
-        
-        for websocket in self.active_connections:
-            try:
-                await websocket.send_json(message)
-                logger.debug(f"Broadcast to dashboard: {message.get('type')}")
-            except Exception as e:
-                logger.error(f"Error broadcasting to dashboard: {e}")
-                disconnected.append(websocket)
-        
-        # Clean up disconnected clients
-        for websocket in disconnected:
+
+        slow = []
+
+        for websocket, client in self.active_connections.items():
+            if not client.enqueue(key, message_type, frame):
+                slow.append(websocket)
+
+        for websocket in slow:
+            client = self.active_connections.get(websocket)
+            logger.warning(
+                f"Disconnecting slow dashboard {client.client_id} "
+                f"({len(client.queue)} messages queued)"
+            )
             self.disconnect(websocket)
-    
+            asyncio.create_task(self._close_slow_client(websocket))
+
     async def send_station_update(self, station_data: dict):
         """Send station status update to all dashboards"""
         await self.broadcast({
             "type": "station_update",
             "data": station_data
         })
-    
+
     async def send_session_update(self, session_data: dict):
         """Send session update to all dashboards"""
         await self.broadcast({
             "type": "session_update",
             "data": session_data
         })
-    
+
+    async def send_session_command_result(self, result_data: dict):
+        """Send an agent's confirmation (or failure) of a session command"""
+        await self.broadcast({
+            "type": "session_command_result",
+            "data": result_data
+        })
+
     async def send_stats_update(self, stats_data: dict):
         """Send dashboard stats update"""
         await self.broadcast({
             "type": "stats_update",
             "data": stats_data
         })
-    
+
     def get_connection_count(self) -> int:
         """Get number of active dashboard connections"""
         return len(self.active_connections)
-    
+
+    def get_metrics(self) -> dict:
+        """Per-client queue depth and lag metrics"""
+        return {
+            "connections": len(self.active_connections),
+            "policy": settings.DASHBOARD_SLOW_CONSUMER_POLICY,
+            "max_queue": settings.DASHBOARD_SEND_QUEUE_SIZE,
+            "clients": [client.get_metrics() for client in self.active_connections.values()],
+        }
+
     async def disconnect_all(self):
         """Disconnect all dashboards (shutdown)"""
         for websocket in list(self.active_connections):
+            self.disconnect(websocket)
             try:
                 await websocket.send_json({
                     "type": "server_shutdown",
@@ -80,8 +252,8 @@ class DashboardConnectionManager:
                 await websocket.close()
             except Exception as e:
                 logger.error(f"Error disconnecting dashboard: {e}")
-            finally:
-                self.disconnect(websocket)
 
 # Global dashboard connection manager instance
 dashboard_manager = DashboardConnectionManager()
+event_bus.register("dashboard_broadcast", dashboard_manager._handle_bus_broadcast)
+metrics_registry.register("dashboard_connections", dashboard_manager.get_metrics)
@@ -0,0 +1,169 @@
+from typing import Awaitable, Callable, Dict, Set, Union
+import asyncio
+import inspect
+import logging
+import time
+
+from app.core.config import settings
+from app.core.metrics import LatencyHistogram, metrics_registry
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[str, dict], Union[None, Awaitable[None]]]
+
+# Cheap, in-memory message types handled inline by the receive loop, so a
+# slow database write can never delay them
+IMMEDIATE_TYPES = {
+    "heartbeat", "status_update",
+    "status_report", "lock_station_response", "unlock_station_response", "pong",
+}
+
+# Message types that must be processed in arrival order, by lane; each lane
+# has one worker and lanes run concurrently. Types not listed (e.g. error
+# reports) run as independent tasks.
+ORDERED_LANES = {
+    "session_event": "state",
+    "status_change": "state",
+    "agent_hello": "control",
+    "sync_request": "control",
+}
+
+class DispatchMetrics:
+    """Receive-to-done latency per message type, across all agent connections"""
+
+    def __init__(self):
+        self.latency: Dict[str, LatencyHistogram] = {}
+        self.errors: Dict[str, int] = {}
+        self.unknown = 0
+        self.in_flight = 0
+        self.queued = 0
+
+    def observe(self, message_type: str, ms: float, failed: bool):
+        histogram = self.latency.get(message_type)
+        if histogram is None:
+            histogram = self.latency[message_type] = LatencyHistogram()
+        histogram.observe(ms)
+        if failed:
+            self.errors[message_type] = self.errors.get(message_type, 0) + 1
+
+    def get_metrics(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "unknown_messages": self.unknown,
+            "types": {
+                message_type: {**histogram.snapshot(), "errors": self.errors.get(message_type, 0)}
+                for message_type, histogram in sorted(self.latency.items())
+            },
+        }
+
+class AgentDispatcher:
+    """
+    Dispatches one agent connection's messages without blocking its receive loop
+
+    Immediate types (heartbeats, telemetry) run inline. Ordered types are
+    queued to their lane's worker, so e.g. session events are applied in
+    the order the agent sent them; everything else gets its own task. Lane
+    workers and unordered tasks share AGENT_MAX_IN_FLIGHT slots, and the
+    receive loop waits (stops reading the socket) when the slots or a
+    lane's AGENT_MAX_QUEUED_MESSAGES queue are full.
+    """
+
+    def __init__(self, station_id: str, handlers: Dict[str, Handler]):
+        self.station_id = station_id
+        self.handlers = handlers
+        self._slots = asyncio.Semaphore(settings.AGENT_MAX_IN_FLIGHT)
+        self._lanes: Dict[str, asyncio.Queue] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def dispatch(self, message: dict):
+        """Route one received message"""
+        received = time.monotonic()
+        message_type = message.get("type")
+        handler = self.handlers.get(message_type)
+        if handler is None:
+            agent_dispatch_metrics.unknown += 1
+            logger.warning(f"Unknown message type from {self.station_id}: {message_type}")
+            return
+
+        if message_type in IMMEDIATE_TYPES:
+            await self._run(message_type, handler, message, received)
+            return
+
+        lane = ORDERED_LANES.get(message_type)
+        if lane is not None:
+            await self._lane(lane).put((message_type, handler, message, received))
+            agent_dispatch_metrics.queued += 1
+            return
+
+        await self._slots.acquire()
+        self._spawn(self._run_in_slot(message_type, handler, message, received))
+
+    async def close(self):
+        """Let queued and running handlers finish (up to AGENT_DRAIN_TIMEOUT), then cancel the rest"""
+        for queue in self._lanes.values():
+            # Stop marker goes in behind the queued messages, even if the lane is full
+            self._spawn(queue.put(None))
+
+        if self._tasks:
+            _, pending = await asyncio.wait(self._tasks, timeout=settings.AGENT_DRAIN_TIMEOUT)
+            for task in pending:
+                task.cancel()
+            if pending:
+                logger.warning(f"Cancelled {len(pending)} unfinished handler(s) for {self.station_id}")
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        # Messages a cancelled lane worker never reached
+        for queue in self._lanes.values():
+            while not queue.empty():
+                if queue.get_nowait() is not None:
+                    agent_dispatch_metrics.queued -= 1
+        self._lanes.clear()
+
+    def _lane(self, lane: str) -> asyncio.Queue:
+        queue = self._lanes.get(lane)
+        if queue is None:
+            queue = self._lanes[lane] = asyncio.Queue(maxsize=settings.AGENT_MAX_QUEUED_MESSAGES)
+            self._spawn(self._lane_worker(queue))
+        return queue
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _lane_worker(self, queue: asyncio.Queue):
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            agent_dispatch_metrics.queued -= 1
+            async with self._slots:
+                await self._run(*item)
+
+    async def _run_in_slot(self, message_type: str, handler: Handler, message: dict, received: float):
+        try:
+            await self._run(message_type, handler, message, received)
+        finally:
+            self._slots.release()
+
+    async def _run(self, message_type: str, handler: Handler, message: dict, received: float):
+        failed = False
+        agent_dispatch_metrics.in_flight += 1
+        try:
+            result = handler(self.station_id, message)
+            if inspect.isawaitable(result):
+                await result
+        except asyncio.CancelledError:
+            failed = True
+            raise
+        except Exception as e:
+            failed = True
+            logger.error(f"Error handling {message_type} from {self.station_id}: {e}", exc_info=True)
+        finally:
+            agent_dispatch_metrics.in_flight -= 1
+            agent_dispatch_metrics.observe(message_type, (time.monotonic() - received) * 1000, failed)
+
+# Global agent dispatch metrics
+agent_dispatch_metrics = DispatchMetrics()
+metrics_registry.register("agent_dispatch", agent_dispatch_metrics.get_metrics)
@@ -0,0 +1,206 @@
+"""Cross-worker WebSocket event bus over Redis pub/sub"""
+import asyncio
+import json
+import logging
+import uuid
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set, Tuple
+
+from app.core.redis import redis_manager
+
+logger = logging.getLogger(__name__)
+
+# Single channel shared by all workers, messages carry their topic
+CHANNEL = "evms:ws_events"
+
+# Seconds to wait before re-subscribing after Redis goes away
+RESUBSCRIBE_DELAY = 5
+
+# Events received but not yet handled, across all lanes, before new ones are dropped
+MAX_PENDING = 10000
+
+class EventBus:
+    """
+    Route WebSocket deliveries to whichever worker owns the socket
+
+    Every worker delivers to its own sockets first and then publishes the
+    event; the other workers pick it up and deliver to theirs. When Redis is
+    down, publishing is skipped and delivery stays local to this worker.
+
+    Received events are handled off the subscriber loop in lanes: events in
+    the same lane run in order, lanes run concurrently. A topic is one lane
+    unless it registers an order_key, so e.g. a slow agent socket only holds
+    up further messages for that station.
+    """
+
+    def __init__(self):
+        self.worker_id = uuid.uuid4().hex
+        self.handlers: Dict[str, Callable[[dict], Awaitable[None]]] = {}
+        self.order_keys: Dict[str, Callable[[dict], Any]] = {}
+        self.running = False
+        self.task = None
+        self._subscribed = False
+        # (topic, order key) -> events waiting for that lane's worker
+        self._lanes: Dict[Tuple[str, Any], Deque[dict]] = {}
+        self._lane_tasks: Set[asyncio.Task] = set()
+        self._pending = 0
+        self.dropped = 0
+
+    def register(
+        self,
+        topic: str,
+        handler: Callable[[dict], Awaitable[None]],
+        order_key: Optional[Callable[[dict], Any]] = None
+    ):
+        """
+        Register the local delivery handler for a topic
+
+        Args:
+            order_key: Maps a payload to the key events must stay ordered by;
+                events with different keys are handled concurrently
+        """
+        self.handlers[topic] = handler
+        if order_key is not None:
+            self.order_keys[topic] = order_key
+
+    @property
+    def is_active(self) -> bool:
+        """Check if this worker is currently receiving bus events"""
+        return self._subscribed and redis_manager.is_connected
+
+    async def start(self):
+        """Start listening for events from other workers"""
+        if self.running:
+            return
+
+        self.running = True
+        self.task = asyncio.create_task(self._listen_loop())
+        logger.info(f"Event bus started (worker {self.worker_id})")
+
+    async def stop(self):
+        """Stop listening"""
+        self.running = False
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        for task in list(self._lane_tasks):
+            task.cancel()
+        await asyncio.gather(*self._lane_tasks, return_exceptions=True)
+        self._lanes.clear()
+        self._pending = 0
+        logger.info("Event bus stopped")
+
+    async def publish(self, topic: str, payload: dict) -> bool:
+        """
+        Publish an event to the other workers
+
+        Returns:
+            True if at least one other worker received it. That only means it
+            was delivered to the bus, not that any worker owns the target
+            socket. False if Redis is unavailable or no other worker is
+            subscribed (local-only delivery).
+        """
+        if not redis_manager.is_connected:
+            return False
+
+        receivers = await redis_manager.publish_event(CHANNEL, {
+            "topic": topic,
+            "origin": self.worker_id,
+            "payload": payload
+        })
+        # PUBLISH counts this worker's own subscription too
+        return receivers - int(self._subscribed) > 0
+
+    async def _listen_loop(self):
+        """Subscribe to the bus channel, re-subscribing if Redis drops"""
+        while self.running:
+            if not redis_manager.is_connected:
+                await asyncio.sleep(RESUBSCRIBE_DELAY)
+                continue
+
+            pubsub = redis_manager.redis.pubsub()
+            try:
+                await pubsub.subscribe(CHANNEL)
+                self._subscribed = True
+                logger.info(f"Event bus subscribed to {CHANNEL}")
+
+                async for raw in pubsub.listen():
+                    if raw.get("type") != "message":
+                        continue
+                    await self._dispatch(raw["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Event bus subscription error: {e}")
+            finally:
+                self._subscribed = False
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+
+            if self.running:
+                await asyncio.sleep(RESUBSCRIBE_DELAY)
+
+    async def _dispatch(self, data: str):
+        """Hand an event from another worker to its local handler"""
+        try:
+            event = json.loads(data)
+        except (TypeError, ValueError):
+            logger.warning("Dropping malformed event bus message")
+            return
+
+        # This worker already delivered its own events locally
+        if event.get("origin") == self.worker_id:
+            return
+
+        topic = event.get("topic")
+        handler = self.handlers.get(topic)
+        if handler is None:
+            return
+
+        if self._pending >= MAX_PENDING:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(f"Event bus backlog full, dropped {self.dropped} event(s)")
+            return
+
+        payload = event.get("payload") or {}
+        order_key = self.order_keys.get(topic)
+        lane_key = (topic, order_key(payload) if order_key else None)
+
+        self._pending += 1
+        lane = self._lanes.get(lane_key)
+        if lane is not None:
+            lane.append(payload)
+            return
+
+        lane = self._lanes[lane_key] = deque([payload])
+        task = asyncio.create_task(self._drain_lane(lane_key, handler, lane))
+        self._lane_tasks.add(task)
+        task.add_done_callback(self._lane_tasks.discard)
+
+    async def _drain_lane(
+        self,
+        lane_key: Tuple[str, Any],
+        handler: Callable[[dict], Awaitable[None]],
+        lane: Deque[dict]
+    ):
+        """Handle a lane's events in order; the lane is removed once empty"""
+        while lane:
+            payload = lane.popleft()
+            try:
+                await handler(payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error handling bus event {lane_key[0]}: {e}", exc_info=True)
+            finally:
+                self._pending -= 1
+        del self._lanes[lane_key]
+
+# Global event bus instance
+event_bus = EventBus()
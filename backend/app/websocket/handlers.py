@@ -1,15 +1,17 @@
 from fastapi import WebSocket, WebSocketDisconnect, Depends, status
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from uuid import UUID
 import logging
 
 from app.websocket.manager import connection_manager
-from app.core.database import AsyncSessionLocal
+from app.websocket.dispatcher import AgentDispatcher
+from app.websocket.rpc import agent_rpc
+from app.core.config import settings
 from app.core.security import verify_token
-from app.models.station import Station, StationStatus
+from app.models.station import StationStatus
 from app.services.event_logger import EventLogger, EventType
-from datetime import datetime
+from app.services.station_registry import station_registry
+from app.services.station_telemetry import telemetry_store
+from datetime import datetime, timezone
 
 logger = logging.getLogger(__name__)
 
@@ -35,39 +37,32 @@ async def handle_agent_connection(websocket: WebSocket, station_id: str, token:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
     
-    # Get station from database
-    async with AsyncSessionLocal() as db:
-        result = await db.execute(
-            select(Station).where(Station.id == UUID(station_id))
-        )
-        station = result.scalar_one_or_none()
-        
-        if not station:
-            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
-            return
-        
-        # Update station status to ONLINE
-        station.status = StationStatus.ONLINE
-        await db.commit()
+    # Look up station in the registry (no query unless it is new to this worker)
+    station = await station_registry.ensure(station_id)
+    if not station:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    # Update station status to ONLINE (written only if it changed)
+    await station_registry.set_status(station_id, StationStatus.ONLINE)
     
     # Accept connection
     await connection_manager.connect(station_id, websocket)
     
     # Log agent connection event
-    async with AsyncSessionLocal() as db:
-        await EventLogger.log_agent_event(
-            db=db,
-            event_type="connected",
-            station_id=UUID(station_id),
-            data={"station_name": station.name}
-        )
+    await EventLogger.log_agent_event(
+        db=None,
+        event_type="connected",
+        station_id=UUID(station_id),
+        data={"station_name": station.name}
+    )
     
     # Send server_hello
     await connection_manager.send_message(station_id, {
         "type": "server_hello",
         "data": {
             "server_version": "1.0.0",
-            "heartbeat_interval": 30,
+            "heartbeat_interval": settings.WS_HEARTBEAT_INTERVAL,
             "station": {
                 "id": str(station.id),
                 "name": station.name,
@@ -76,74 +71,52 @@ async def handle_agent_connection(websocket: WebSocket, station_id: str, token:
         }
     })
     
+    # Handlers run off the receive loop so slow writes can't hold up heartbeats
+    dispatcher = AgentDispatcher(station_id, MESSAGE_HANDLERS)
+    
     try:
         while True:
             # Receive message from agent
             data = await websocket.receive_json()
             
-            # Handle different message types
-            message_type = data.get("type")
-            
-            if message_type == "agent_hello":
-                await handle_agent_hello(station_id, data)
-            
-            elif message_type == "heartbeat":
-                await handle_heartbeat(station_id, data)
-            
-            elif message_type == "session_event":
-                await handle_session_event(station_id, data)
+            # Replies to server commands complete their call right away
+            if data.get("request_id"):
+                await agent_rpc.handle_reply(station_id, data)
             
-            elif message_type == "status_change":
-                await handle_status_change(station_id, data)
-            
-            elif message_type == "error":
-                await handle_agent_error(station_id, data)
-            
-            elif message_type == "sync_request":
-                await handle_sync_request(station_id, data)
-            
-            else:
-                logger.warning(f"Unknown message type from {station_id}: {message_type}")
+            await dispatcher.dispatch(data)
     
     except WebSocketDisconnect:
         logger.info(f"Agent {station_id} disconnected")
     except Exception as e:
         logger.error(f"Error in agent connection {station_id}: {e}")
     finally:
-        connection_manager.disconnect(station_id)
+        # Let queued session events and other handlers finish
+        await dispatcher.close()
         
-        # Update station status to OFFLINE and log disconnection
-        async with AsyncSessionLocal() as db:
-            result = await db.execute(
-                select(Station).where(Station.id == UUID(station_id))
-            )
-            station = result.scalar_one_or_none()
-            if station:
-                station.status = StationStatus.OFFLINE
-                await db.commit()
-                
-                # Log agent disconnection event
-                await EventLogger.log_agent_event(
-                    db=db,
-                    event_type="disconnected",
-                    station_id=UUID(station_id),
-                    data={"station_name": station.name}
-                )
+        # Mark OFFLINE only if this socket was still the station's connection;
+        # otherwise the agent already reconnected or the heartbeat sweeper
+        # closed it and handled the status
+        if connection_manager.disconnect(station_id, websocket):
+            try:
+                await station_registry.set_status(station_id, StationStatus.OFFLINE)
+            except Exception as e:
+                logger.error(f"Failed to mark {station_id} offline: {e}")
+        
+        # Log agent disconnection event
+        await EventLogger.log_agent_event(
+            db=None,
+            event_type="disconnected",
+            station_id=UUID(station_id),
+            data={"station_name": station.name}
+        )
 
 async def handle_agent_hello(station_id: str, data: dict):
     """Handle agent_hello message"""
     logger.info(f"Agent hello from {station_id}: {data.get('data', {}).get('agent_version')}")
     
-    # Update station specs in database
-    async with AsyncSessionLocal() as db:
-        result = await db.execute(
-            select(Station).where(Station.id == UUID(station_id))
-        )
-        station = result.scalar_one_or_none()
-        if station:
-            agent_data = data.get("data", {})
-            station.specs = agent_data.get("specs", {})
-            await db.commit()
+    # Update station specs in database (only if they changed)
+    agent_data = data.get("data", {})
+    await station_registry.set_specs(station_id, agent_data.get("specs", {}))
 
 async def handle_heartbeat(station_id: str, data: dict):
     """Handle heartbeat message"""
@@ -162,95 +135,102 @@ async def handle_session_event(station_id: str, data: dict):
     logger.info(f"Session event from {station_id}: {data}")
     
     # Log event to database
-    async with AsyncSessionLocal() as db:
-        event_data = data.get("data", {})
-        await EventLogger.log_agent_event(
-            db=db,
-            event_type="session_event",
-            station_id=UUID(station_id),
-            data=event_data
-        )
+    event_data = data.get("data", {})
+    await EventLogger.log_agent_event(
+        db=None,
+        event_type="session_event",
+        station_id=UUID(station_id),
+        data=event_data
+    )
 
 async def handle_status_change(station_id: str, data: dict):
     """Handle station status change"""
     logger.info(f"Status change from {station_id}: {data}")
     
-    # Update station status in database
-    async with AsyncSessionLocal() as db:
-        result = await db.execute(
-            select(Station).where(Station.id == UUID(station_id))
+    station = station_registry.get(station_id)
+    if station:
+        old_status = station.status.value
+        new_status = data.get("data", {}).get("status")
+        
+        # Log status change event
+        await EventLogger.log_station_event(
+            db=None,
+            event_type=EventType.STATION_STATUS_CHANGED,
+            station_id=UUID(station_id),
+            data={
+                "old_status": old_status,
+                "new_status": new_status,
+                "reason": data.get("data", {}).get("reason")
+            }
         )
-        station = result.scalar_one_or_none()
-        if station:
-            old_status = station.status.value
-            new_status = data.get("data", {}).get("status")
-            
-            # Log status change event
-            await EventLogger.log_station_event(
-                db=db,
-                event_type=EventType.STATION_STATUS_CHANGED,
-                station_id=UUID(station_id),
-                data={
-                    "old_status": old_status,
-                    "new_status": new_status,
-                    "reason": data.get("data", {}).get("reason")
-                }
-            )
+
+def handle_status_update(station_id: str, data: dict):
+    """Handle periodic telemetry (CPU, memory, disk, lock state)"""
+    if not telemetry_store.record(station_id, data.get("data", {})):
+        logger.debug(f"Ignored status update without system metrics from {station_id}")
+
+def handle_command_reply(station_id: str, data: dict):
+    """Handle a reply-only message (already matched to its call by agent_rpc)"""
+    if not data.get("request_id"):
+        logger.debug(f"Uncorrelated {data.get('type')} from {station_id}")
 
 async def handle_agent_error(station_id: str, data: dict):
     """Handle error reported by agent"""
     logger.error(f"Agent error from {station_id}: {data}")
     
     # Log error to database
-    async with AsyncSessionLocal() as db:
-        error_data = data.get("data", {})
-        await EventLogger.log_error(
-            db=db,
-            error_type="agent_error",
-            error_message=error_data.get("message", "Unknown error"),
-            entity_type="station",
-            entity_id=UUID(station_id),
-            stack_trace=error_data.get("stack_trace")
-        )
+    error_data = data.get("data", {})
+    await EventLogger.log_error(
+        db=None,
+        error_type="agent_error",
+        error_message=error_data.get("message", "Unknown error"),
+        entity_type="station",
+        entity_id=UUID(station_id),
+        stack_trace=error_data.get("stack_trace")
+    )
 
 async def handle_sync_request(station_id: str, data: dict):
     """Handle sync request after reconnection"""
     logger.info(f"Sync request from {station_id}")
     
-    # Get current session for station
-    async with AsyncSessionLocal() as db:
-        from app.models.session import Session, SessionStatus
-        from datetime import datetime
-        
-        result = await db.execute(
-            select(Session).where(
-                Session.station_id == UUID(station_id),
-                Session.status == SessionStatus.ACTIVE
-            )
-        )
-        session = result.scalar_one_or_none()
-        
-        if session:
-            remaining = (session.scheduled_end_at - datetime.utcnow()).total_seconds()
-            await connection_manager.send_message(station_id, {
-                "type": "sync_response",
-                "data": {
-                    "has_active_session": True,
-                    "session": {
-                        "session_id": str(session.id),
-                        "remaining_seconds": max(0, int(remaining)),
-                        "scheduled_end_at": session.scheduled_end_at.isoformat()
-                    },
-                    "server_time": datetime.utcnow().isoformat()
-                }
-            })
-        else:
-            await connection_manager.send_message(station_id, {
-                "type": "sync_response",
-                "data": {
-                    "has_active_session": False,
-                    "server_time": datetime.utcnow().isoformat()
-                }
-            })
+    # Current session for station, from the registry
+    station = station_registry.get(station_id)
+    now = datetime.now(timezone.utc)
+    
+    if station and station.session_id:
+        remaining = (station.session_end_at - now).total_seconds()
+        await connection_manager.send_message(station_id, {
+            "type": "sync_response",
+            "data": {
+                "has_active_session": True,
+                "session": {
+                    "session_id": station.session_id,
+                    "remaining_seconds": max(0, int(remaining)),
+                    "scheduled_end_at": station.session_end_at.isoformat()
+                },
+                "server_time": now.isoformat()
+            }
+        })
+    else:
+        await connection_manager.send_message(station_id, {
+            "type": "sync_response",
+            "data": {
+                "has_active_session": False,
+                "server_time": now.isoformat()
+            }
+        })
 
-from datetime import datetime
+# Agent message type -> handler (see AgentDispatcher for ordering)
+MESSAGE_HANDLERS = {
+    "agent_hello": handle_agent_hello,
+    "heartbeat": handle_heartbeat,
+    "session_event": handle_session_event,
+    "status_change": handle_status_change,
+    "status_update": handle_status_update,
+    "error": handle_agent_error,
+    "sync_request": handle_sync_request,
+    "status_report": handle_command_reply,
+    "lock_station_response": handle_command_reply,
+    "unlock_station_response": handle_command_reply,
+    "pong": handle_command_reply,
+}
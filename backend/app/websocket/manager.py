@@ -1,9 +1,15 @@
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 from fastapi import WebSocket, WebSocketDisconnect
 from datetime import datetime
 import json
 import logging
 import asyncio
+import time
+
+from app.core.config import settings
+from app.scheduler.timing_wheel import TimingWheel
+from app.websocket.serialization import encode_message
+from app.websocket.event_bus import event_bus
 
 logger = logging.getLogger(__name__)
 
@@ -15,60 +21,123 @@ class ConnectionManager:
         self.active_connections: Dict[str, WebSocket] = {}
         # station_id -> last heartbeat timestamp
         self.last_heartbeat: Dict[str, datetime] = {}
+        # station_id -> heartbeat deadline (epoch seconds)
+        self.heartbeat_deadlines = TimingWheel()
     
     async def connect(self, station_id: str, websocket: WebSocket):
         """Accept and register a new connection"""
         await websocket.accept()
         self.active_connections[station_id] = websocket
-        self.last_heartbeat[station_id] = datetime.utcnow()
+        self.update_heartbeat(station_id)
         logger.info(f"Agent connected: {station_id}")
     
-    def disconnect(self, station_id: str):
-        """Remove a connection"""
-        if station_id in self.active_connections:
-            del self.active_connections[station_id]
-        if station_id in self.last_heartbeat:
-            del self.last_heartbeat[station_id]
+    def disconnect(self, station_id: str, websocket: Optional[WebSocket] = None) -> bool:
+        """
+        Remove a connection
+        
+        Args:
+            websocket: Only remove the station's connection if it is this
+                socket, so a closing socket can't drop the agent's reconnect
+        
+        Returns:
+            True if a connection was removed
+        """
+        current = self.active_connections.get(station_id)
+        if current is None or (websocket is not None and current is not websocket):
+            return False
+        
+        del self.active_connections[station_id]
+        self.last_heartbeat.pop(station_id, None)
+        self.heartbeat_deadlines.cancel(station_id)
         logger.info(f"Agent disconnected: {station_id}")
+        return True
     
-    async def send_message(self, station_id: str, message: dict):
-        """Send message to a specific agent"""
-        if station_id in self.active_connections:
-            try:
-                message["timestamp"] = datetime.utcnow().isoformat()
-                await self.active_connections[station_id].send_json(message)
-                logger.debug(f"Sent message to {station_id}: {message['type']}")
-            except Exception as e:
-                logger.error(f"Error sending message to {station_id}: {e}")
-                self.disconnect(station_id)
+    async def send_message(self, station_id: str, message: dict) -> bool:
+        """
+        Send message to a specific agent connected to this worker
+        
+        Returns:
+            True if the message was written to the agent's socket; False if
+            the agent isn't connected here or the send failed (the socket is
+            then dropped)
+        """
+        websocket = self.active_connections.get(station_id)
+        if websocket is None:
+            return False
+        
+        try:
+            message["timestamp"] = datetime.utcnow().isoformat()
+            await websocket.send_text(encode_message(message))
+            logger.debug(f"Sent message to {station_id}: {message['type']}")
+            return True
+        except Exception as e:
+            logger.error(f"Error sending message to {station_id}: {e}")
+            self.disconnect(station_id, websocket)
+            return False
     
-    async def send_to_station(self, station_id: str, message: dict):
-        """Alias for send_message - send message to a specific station"""
-        await self.send_message(station_id, message)
+    async def send_to_station(self, station_id: str, message: dict) -> bool:
+        """
+        Send message to a specific station, wherever its agent is connected
+        
+        Delivers directly if the agent is connected to this worker, otherwise
+        routes the message over the event bus to the worker that owns it.
+        
+        Returns:
+            False if the message was dropped (local send failed, or agent not
+            here and no other worker listening); True does not guarantee
+            another worker owns it
+        """
+        if self.is_connected(station_id):
+            return await self.send_message(station_id, message)
+        
+        published = await event_bus.publish("station_message", {
+            "station_id": station_id,
+            "message": message
+        })
+        if not published:
+            logger.debug(f"Agent {station_id} not connected to this worker, message dropped")
+        return published
+    
+    async def _handle_bus_message(self, payload: dict):
+        """Deliver a station message routed from another worker"""
+        station_id = payload.get("station_id")
+        if station_id and self.is_connected(station_id):
+            await self.send_message(station_id, payload.get("message") or {})
     
     async def broadcast(self, message: dict):
-        """Broadcast message to all connected agents"""
-        message["timestamp"] = datetime.utcnow().isoformat()
+        """Broadcast message to all connected agents (encoded once for all sockets)"""
+        message = {**message, "timestamp": datetime.utcnow().isoformat()}
+        frame = encode_message(message)
         disconnected = []
         
-        for station_id, websocket in self.active_connections.items():
+        for station_id, websocket in list(self.active_connections.items()):
             try:
-                await websocket.send_json(message)
+                await websocket.send_text(frame)
             except Exception as e:
                 logger.error(f"Error broadcasting to {station_id}: {e}")
-                disconnected.append(station_id)
+                disconnected.append((station_id, websocket))
         
         # Clean up disconnected clients
-        for station_id in disconnected:
-            self.disconnect(station_id)
+        for station_id, websocket in disconnected:
+            self.disconnect(station_id, websocket)
     
     def is_connected(self, station_id: str) -> bool:
         """Check if agent is connected"""
         return station_id in self.active_connections
     
     def update_heartbeat(self, station_id: str):
-        """Update last heartbeat timestamp"""
+        """Update last heartbeat timestamp and push back the station's timeout"""
         self.last_heartbeat[station_id] = datetime.utcnow()
+        self.heartbeat_deadlines.schedule(station_id, time.time() + settings.WS_HEARTBEAT_TIMEOUT)
+    
+    def pop_stale(self, now: float) -> List[Tuple[str, WebSocket]]:
+        """Remove and return connections whose heartbeat timed out by now"""
+        stale = []
+        for station_id in self.heartbeat_deadlines.pop_due(now):
+            websocket = self.active_connections.get(station_id)
+            if websocket is not None and self.disconnect(station_id, websocket):
+                stale.append((station_id, websocket))
+        return stale
     
     def get_connection_count(self) -> int:
         """Get number of active connections"""
@@ -90,3 +159,8 @@ class ConnectionManager:
 
 # Global connection manager instance
 connection_manager = ConnectionManager()
+event_bus.register(
+    "station_message",
+    connection_manager._handle_bus_message,
+    order_key=lambda payload: payload.get("station_id")
+)
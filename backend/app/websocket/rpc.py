@@ -0,0 +1,214 @@
+from typing import Any, Dict, Iterable, List, Optional, Set
+import asyncio
+import logging
+import time
+import uuid
+
+from app.core.config import settings
+from app.core.metrics import metrics_registry
+from app.models.station import StationStatus
+from app.services.station_registry import station_registry
+from app.websocket.dashboard_manager import dashboard_manager
+from app.websocket.event_bus import event_bus
+from app.websocket.manager import connection_manager
+
+logger = logging.getLogger(__name__)
+
+# Commands that are safe to send again if the first reply is late
+IDEMPOTENT_COMMANDS = {"get_status", "lock_station", "unlock_station", "ping"}
+
+class AgentRPC:
+    """
+    Request/response calls to PC agents
+
+    Each call sends the command with a request_id and waits on a future
+    that the agent's reply resolves; the agent echoes the request_id on
+    every message it sends while handling the command. Request IDs start
+    with the calling worker's ID, so a reply that arrives on another worker
+    (where the agent is connected) is forwarded back over the event bus.
+
+    Idempotent commands are re-sent with the same request_id if a reply is
+    late, so a late reply to an earlier attempt still completes the call.
+
+    Session commands (start, extend, end, expiry) are sent through
+    send_session_command: the caller doesn't wait, and the agent's
+    confirmation is broadcast to dashboards when it arrives.
+    """
+
+    def __init__(self):
+        # request_id -> future resolved with the reply message
+        self._pending: Dict[str, asyncio.Future] = {}
+        # Session command calls still waiting for their reply
+        self._session_calls: Set[asyncio.Task] = set()
+
+        # Metrics
+        self.calls = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.unreachable = 0
+
+    async def call(
+        self,
+        station_id: str,
+        command: str,
+        data: Optional[dict] = None,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Send a command to a station's agent and wait for its reply
+
+        Args:
+            timeout: Seconds to wait per attempt (AGENT_RPC_TIMEOUT if None)
+            retries: Extra attempts after a timeout; defaults to
+                AGENT_RPC_RETRIES for idempotent commands and 0 otherwise
+
+        Returns:
+            Result with status 'ok', 'failed' (agent reported failure),
+            'timeout', 'offline' or 'unknown_station', and the reply data
+        """
+        if timeout is None:
+            timeout = settings.AGENT_RPC_TIMEOUT
+        if retries is None:
+            retries = settings.AGENT_RPC_RETRIES if command in IDEMPOTENT_COMMANDS else 0
+
+        self.calls += 1
+        start = time.monotonic()
+
+        def result(status: str, reply: Optional[dict] = None, attempts: int = 0) -> Dict[str, Any]:
+            return {
+                "station_id": station_id,
+                "status": status,
+                "ok": status == "ok",
+                "reply": reply,
+                "attempts": attempts,
+                "latency_ms": round((time.monotonic() - start) * 1000, 2),
+            }
+
+        station = station_registry.get(station_id)
+        if station is None:
+            self.unreachable += 1
+            return result("unknown_station")
+        if station.status == StationStatus.OFFLINE and not connection_manager.is_connected(station_id):
+            self.unreachable += 1
+            return result("offline")
+
+        request_id = f"{event_bus.worker_id}.{uuid.uuid4().hex}"
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        message = {"type": command, "request_id": request_id, "data": data or {}}
+
+        try:
+            for attempt in range(1, retries + 2):
+                if not await connection_manager.send_to_station(station_id, dict(message)):
+                    self.unreachable += 1
+                    return result("offline", attempts=attempt)
+
+                try:
+                    reply = await asyncio.wait_for(asyncio.shield(future), timeout)
+                except asyncio.TimeoutError:
+                    logger.debug(f"RPC {command} to {station_id} timed out (attempt {attempt})")
+                    continue
+
+                reply_data = reply.get("data") or {}
+                if reply.get("type") == "error" or reply_data.get("success") is False:
+                    self.failed += 1
+                    return result("failed", reply_data, attempt)
+                self.succeeded += 1
+                return result("ok", reply_data, attempt)
+
+            self.timed_out += 1
+            return result("timeout", attempts=retries + 1)
+        finally:
+            self._pending.pop(request_id, None)
+            future.cancel()
+
+    async def call_many(
+        self,
+        station_ids: Iterable[str],
+        command: str,
+        data: Optional[dict] = None,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Send a command to several stations concurrently; one result per station, in order"""
+        return await asyncio.gather(*(
+            self.call(station_id, command, data, timeout, retries)
+            for station_id in station_ids
+        ))
+
+    def send_session_command(self, station_id: str, session_id: str, command: str, data: dict) -> asyncio.Task:
+        """
+        Send a session command in the background and report the agent's reply
+
+        The outcome is broadcast to dashboards as a session_command_result.
+        Session commands are not idempotent, so they are never retried.
+        """
+        task = asyncio.create_task(self._confirm_session_command(station_id, session_id, command, data))
+        self._session_calls.add(task)
+        task.add_done_callback(self._session_calls.discard)
+        return task
+
+    async def _confirm_session_command(self, station_id: str, session_id: str, command: str, data: dict):
+        try:
+            result = await self.call(station_id, command, data, retries=0)
+            if not result["ok"]:
+                logger.warning(f"Agent {station_id} did not confirm {command} for session {session_id}: {result['status']}")
+
+            await dashboard_manager.send_session_command_result({
+                "id": session_id,
+                "station_id": station_id,
+                "command": command,
+                "status": result["status"],
+                "ok": result["ok"],
+                "latency_ms": result["latency_ms"],
+            })
+        except Exception as e:
+            logger.error(f"Error sending {command} for session {session_id}: {e}", exc_info=True)
+
+    async def handle_reply(self, station_id: str, message: dict):
+        """Complete the call a message carrying a request_id answers, wherever it was made"""
+        request_id = message.get("request_id")
+        if not isinstance(request_id, str):
+            return
+
+        if request_id in self._pending:
+            self._resolve(request_id, message)
+        elif not request_id.startswith(f"{event_bus.worker_id}."):
+            await event_bus.publish("agent_rpc_reply", {"request_id": request_id, "message": message})
+        else:
+            logger.debug(f"Late or unknown RPC reply {request_id} from {station_id}")
+
+    def get_metrics(self) -> dict:
+        """Call counters"""
+        return {
+            "pending": len(self._pending),
+            "session_calls": len(self._session_calls),
+            "calls": self.calls,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "unreachable": self.unreachable,
+        }
+
+    def _resolve(self, request_id: str, message: dict):
+        future = self._pending.get(request_id)
+        # First reply wins (e.g. session_event before a follow-up message)
+        if future is not None and not future.done():
+            future.set_result(message)
+
+    async def _handle_bus_reply(self, payload: dict):
+        """Complete a call whose reply arrived on another worker"""
+        request_id = payload.get("request_id")
+        if request_id in self._pending:
+            self._resolve(request_id, payload.get("message") or {})
+
+# Global agent RPC instance
+agent_rpc = AgentRPC()
+event_bus.register(
+    "agent_rpc_reply",
+    agent_rpc._handle_bus_reply,
+    order_key=lambda payload: payload.get("request_id")
+)
+metrics_registry.register("agent_rpc", agent_rpc.get_metrics)
@@ -0,0 +1,18 @@
+"""JSON encoding for WebSocket frames"""
+import json
+
+try:
+    import orjson
+except ImportError:  # Fall back to the stdlib encoder
+    orjson = None
+
+def encode_message(message: dict) -> str:
+    """
+    Encode a message into a JSON text frame
+    
+    Broadcasts call this once and send the same text to every socket
+    instead of letting send_json re-encode the message per connection.
+    """
+    if orjson is not None:
+        return orjson.dumps(message, default=str).decode("utf-8")
+    return json.dumps(message, separators=(",", ":"), default=str)
@@ -0,0 +1,24 @@
+-- Migration: Keyset pagination indexes for the session list
+-- Date: 2025-10-27
+-- Description: 
+--   GET /api/v1/sessions pages on (started_at, id) newest first, optionally
+--   filtered by station, status or the staff user who started the session.
+--   Each index serves one filter plus the ordering, so a page is an index
+--   range scan of `limit` rows however deep the history is.
+--
+-- CONCURRENTLY avoids locking sessions while the indexes build; run this
+-- file outside a transaction (psql -f does by default).
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sessions_started_at_id
+    ON sessions (started_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sessions_station_started_at_id
+    ON sessions (station_id, started_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sessions_status_started_at_id
+    ON sessions (status, started_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sessions_created_by_started_at_id
+    ON sessions (created_by, started_at, id);
+
+ANALYZE sessions;
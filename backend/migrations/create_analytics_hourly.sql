@@ -0,0 +1,54 @@
+-- Migration: Hourly analytics fact tables
+-- Date: 2025-10-26
+-- Description: 
+--   1. analytics_hourly: per (UTC hour, station) revenue and session facts
+--   2. analytics_hourly_users: distinct session user names per hour
+--
+-- heatmap_sessions/heatmap_minutes and analytics_hourly_users only count
+-- STOPPED, ACTIVE and EXPIRED sessions, as the peak-hours heatmap always
+-- has; session_count and the other session metrics count every status.
+--
+-- The backend keeps both tables current as payments and sessions are
+-- written. After applying, populate history with:
+--   python scripts/backfill_analytics.py
+
+-- ============================================
+-- Part 1: Hourly facts
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS analytics_hourly (
+    bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    station_id UUID NOT NULL,
+    shift_date DATE NOT NULL,
+    local_date DATE NOT NULL,
+    local_hour SMALLINT NOT NULL,
+    local_dow SMALLINT NOT NULL,
+    revenue NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    payment_count INTEGER NOT NULL DEFAULT 0,
+    paid_sessions INTEGER NOT NULL DEFAULT 0,
+    session_count INTEGER NOT NULL DEFAULT 0,
+    session_minutes INTEGER NOT NULL DEFAULT 0,
+    session_revenue NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    closed_sessions INTEGER NOT NULL DEFAULT 0,
+    closed_minutes INTEGER NOT NULL DEFAULT 0,
+    stopped_sessions INTEGER NOT NULL DEFAULT 0,
+    heatmap_sessions INTEGER NOT NULL DEFAULT 0,
+    heatmap_minutes INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket_start, station_id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_analytics_hourly_shift_date ON analytics_hourly(shift_date);
+
+COMMENT ON TABLE analytics_hourly IS 'Hourly revenue/session facts per station; station 00000000-0000-0000-0000-000000000000 = payments without a station';
+
+-- ============================================
+-- Part 2: Distinct users per hour
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS analytics_hourly_users (
+    bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    user_name VARCHAR(255) NOT NULL,
+    local_hour SMALLINT NOT NULL,
+    local_dow SMALLINT NOT NULL,
+    PRIMARY KEY (bucket_start, user_name)
+);
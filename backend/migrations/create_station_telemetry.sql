@@ -0,0 +1,29 @@
+-- Migration: Station telemetry tiers
+-- Date: 2025-10-27
+-- Description: 
+--   Stores agent status_update samples (CPU, memory, disk, lock state)
+--   downsampled into 1-minute, 15-minute and 1-hour buckets. Sums and
+--   sample counts are kept instead of averages so buckets merge exactly.
+--
+-- The backend writes all three tiers on each flush and deletes buckets
+-- past TELEMETRY_*_RETENTION_* on its own.
+
+CREATE TABLE IF NOT EXISTS station_telemetry (
+    station_id UUID NOT NULL REFERENCES stations(id) ON DELETE CASCADE,
+    resolution INTEGER NOT NULL,
+    bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    samples INTEGER NOT NULL DEFAULT 0,
+    cpu_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    cpu_max DOUBLE PRECISION NOT NULL DEFAULT 0,
+    memory_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    memory_max DOUBLE PRECISION NOT NULL DEFAULT 0,
+    disk_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    disk_max DOUBLE PRECISION NOT NULL DEFAULT 0,
+    locked_samples INTEGER NOT NULL DEFAULT 0,
+    unhealthy_samples INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (station_id, resolution, bucket_start)
+);
+
+-- Retention deletes by tier and age
+CREATE INDEX IF NOT EXISTS ix_station_telemetry_resolution_bucket
+    ON station_telemetry (resolution, bucket_start);
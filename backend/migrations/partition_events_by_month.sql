@@ -0,0 +1,107 @@
+-- Migration: Partition events table by month
+-- Date: 2025-10-26
+-- Description:
+--   1. Recreate events as a table range-partitioned on timestamp
+--   2. Create monthly partitions covering existing rows plus two months ahead
+--   3. Copy existing rows and keep the id sequence
+--   4. Add event_daily_counts for rolled-up history
+--
+-- Future partitions and retention are handled by the backend
+-- (app/scheduler/event_maintenance.py) or scripts/maintain_event_partitions.py.
+
+BEGIN;
+
+-- ============================================
+-- Part 1: Move the old table aside
+-- ============================================
+
+ALTER TABLE events RENAME TO events_unpartitioned;
+ALTER SEQUENCE IF EXISTS events_id_seq RENAME TO events_unpartitioned_id_seq;
+ALTER INDEX IF EXISTS events_pkey RENAME TO events_unpartitioned_pkey;
+ALTER INDEX IF EXISTS ix_events_event_type RENAME TO ix_events_unpartitioned_event_type;
+ALTER INDEX IF EXISTS ix_events_entity_id RENAME TO ix_events_unpartitioned_entity_id;
+ALTER INDEX IF EXISTS ix_events_timestamp RENAME TO ix_events_unpartitioned_timestamp;
+
+-- ============================================
+-- Part 2: Partitioned events table
+-- ============================================
+
+-- The partition key must be part of the primary key
+CREATE TABLE events (
+    id BIGSERIAL NOT NULL,
+    event_type VARCHAR(50) NOT NULL,
+    entity_type VARCHAR(50),
+    entity_id UUID,
+    user_id UUID REFERENCES users(id),
+    data JSON,
+    ip_address INET,
+    timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+CREATE INDEX ix_events_event_type ON events(event_type);
+CREATE INDEX ix_events_entity_id ON events(entity_id);
+CREATE INDEX ix_events_timestamp ON events(timestamp);
+
+-- Monthly partitions named events_yYYYYmMM, bounds in UTC
+DO $$
+DECLARE
+    month DATE;
+    last_month DATE;
+BEGIN
+    SELECT date_trunc('month', COALESCE(MIN(timestamp), now()) AT TIME ZONE 'UTC')::date
+    INTO month
+    FROM events_unpartitioned;
+
+    last_month := (date_trunc('month', now() AT TIME ZONE 'UTC') + INTERVAL '2 months')::date;
+
+    WHILE month <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF events FOR VALUES FROM (%L) TO (%L)',
+            'events_y' || to_char(month, 'YYYY') || 'm' || to_char(month, 'MM'),
+            month::text || ' 00:00:00+00',
+            (month + INTERVAL '1 month')::date::text || ' 00:00:00+00'
+        );
+        month := (month + INTERVAL '1 month')::date;
+    END LOOP;
+END $$;
+
+-- ============================================
+-- Part 3: Copy existing rows
+-- ============================================
+
+INSERT INTO events (id, event_type, entity_type, entity_id, user_id, data, ip_address, timestamp)
+SELECT id, event_type, entity_type, entity_id, user_id, data, ip_address, COALESCE(timestamp, now())
+FROM events_unpartitioned;
+
+SELECT setval(
+    pg_get_serial_sequence('events', 'id'),
+    GREATEST((SELECT COALESCE(MAX(id), 0) FROM events), 1)
+);
+
+DROP TABLE events_unpartitioned;
+
+-- ============================================
+-- Part 4: Daily rollups
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS event_daily_counts (
+    day DATE NOT NULL,
+    event_type VARCHAR(50) NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, event_type)
+);
+
+COMMENT ON TABLE event_daily_counts IS 'Per-day event counts by type, kept after raw event partitions expire';
+
+COMMIT;
+
+-- ============================================
+-- Verification
+-- ============================================
+
+-- List partitions and their bounds
+-- SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+-- FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+-- WHERE i.inhparent = 'events'::regclass
+-- ORDER BY c.relname;
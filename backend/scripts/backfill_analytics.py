@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Rebuild the hourly analytics fact tables from payments and sessions
+
+Run after applying migrations/create_analytics_hourly.sql, or any time the
+facts are suspected to have drifted. Rebuilds in a single transaction, so
+analytics keep serving the old facts until it commits.
+
+Usage:
+    python scripts/backfill_analytics.py              # all history
+    python scripts/backfill_analytics.py --days 7     # shifts from the last 7 days
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import AsyncSessionLocal, engine
+from app.core.timezone import get_shift_start
+from app.services.analytics_rollup import AnalyticsRollup
+
+async def main():
+    parser = argparse.ArgumentParser(description="Rebuild analytics_hourly from raw tables")
+    parser.add_argument("--days", type=int, default=None, help="Only rebuild the last N shifts")
+    args = parser.parse_args()
+    
+    # Shift starts are on the hour, as rebuild() requires
+    since = get_shift_start() - timedelta(days=args.days) if args.days else None
+    
+    print(f"Rebuilding analytics facts {'since ' + since.isoformat() if since else 'for all history'}...")
+    start = time.perf_counter()
+    try:
+        async with AsyncSessionLocal() as db:
+            await AnalyticsRollup(db).rebuild(since)
+            await db.commit()
+    finally:
+        await engine.dispose()
+    
+    print(f"✓ Analytics facts rebuilt in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-socket send_json vs serialize-once broadcast
+
+Compares the CPU spent encoding a typical session_update broadcast when
+every socket re-encodes the message (Starlette's send_json) against
+encoding it once and sending the same text frame to every socket.
+"""
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.websocket.serialization import encode_message
+
+CLIENT_COUNTS = [50, 200, 1000]
+ROUNDS = 200
+
+MESSAGE = {
+    "type": "session_update",
+    "data": {
+        "id": "6f1c1f4e-3a53-4b0e-9a47-1d0d3f7f5c21",
+        "station_id": "0c2b5a8e-1e7b-4d51-8d0f-5b7d6a0c9e13",
+        "station_name": "PC-01",
+        "user_name": "front_desk",
+        "started_at": "2025-10-19T18:00:00+00:00",
+        "scheduled_end_at": "2025-10-19T20:00:00+00:00",
+        "actual_end_at": None,
+        "duration_minutes": 120,
+        "extended_minutes": 0,
+        "status": "ACTIVE",
+        "payment_id": "3d4c2b1a-0f9e-4d8c-b7a6-5e4d3c2b1a09",
+        "created_by": "9a8b7c6d-5e4f-4a3b-2c1d-0e9f8a7b6c5d",
+        "notes": "Tournament block",
+    },
+    "timestamp": "2025-10-19T18:00:00.123456",
+}
+
+class FakeWebSocket:
+    """Stands in for a socket; only the encoding cost is measured"""
+
+    def send_json(self, data):
+        # Same encoding Starlette performs inside WebSocket.send_json
+        self.send_text(json.dumps(data, separators=(",", ":"), ensure_ascii=False))
+
+    def send_text(self, text):
+        self.last = text
+
+def per_socket(sockets):
+    for websocket in sockets:
+        websocket.send_json(MESSAGE)
+
+def serialize_once(sockets):
+    frame = encode_message(MESSAGE)
+    for websocket in sockets:
+        websocket.send_text(frame)
+
+def measure(fn, sockets) -> float:
+    """CPU seconds per broadcast"""
+    start = time.process_time()
+    for _ in range(ROUNDS):
+        fn(sockets)
+    return (time.process_time() - start) / ROUNDS
+
+def main():
+    print(f"{'clients':>8} {'send_json (ms)':>15} {'encode once (ms)':>17} {'saved':>7}")
+    for count in CLIENT_COUNTS:
+        sockets = [FakeWebSocket() for _ in range(count)]
+        before = measure(per_socket, sockets)
+        after = measure(serialize_once, sockets)
+        saved = (1 - after / before) * 100 if before else 0
+        print(f"{count:>8} {before * 1000:>15.3f} {after * 1000:>17.3f} {saved:>6.1f}%")
+
+if __name__ == "__main__":
+    main()
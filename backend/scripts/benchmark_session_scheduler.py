@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Benchmark: deadline heap vs full scan for session expiry at 10k sessions
+
+The full scan mirrors the old monitor tick (recompute time remaining for
+every active session every SESSION_CHECK_INTERVAL, before counting the
+database round trip that loaded them). The heap only touches sessions
+whose deadline has passed.
+
+Wake lateness is then measured on a real SessionMonitor loop: sessions
+with deadlines a few seconds out are tracked and the time each expiry and
+warning is dispatched is compared with its deadline. Only the database
+work behind dispatch (expiry transaction, reconcile, sending warnings) is
+replaced with recorders; Redis is not needed.
+"""
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.scheduler.deadline_queue import DeadlineQueue
+from app.scheduler.session_monitor import SessionMonitor, _warning_levels
+
+SESSIONS = 10_000
+TICK_SECONDS = 10
+SIMULATED_SECONDS = 8 * 3600
+
+# Live wake-lateness run
+LIVE_SESSIONS = 2_000
+LIVE_WINDOW_SECONDS = 20
+
+def build_deadlines(now: float) -> dict:
+    return {
+        f"session-{i}": now + random.uniform(15 * 60, 8 * 3600)
+        for i in range(SESSIONS)
+    }
+
+def full_scan(deadlines: dict, start: float):
+    """Old behaviour: every tick looks at every remaining session"""
+    remaining = dict(deadlines)
+    work = 0
+    lateness = []
+    now = start
+    while now < start + SIMULATED_SECONDS:
+        now += TICK_SECONDS
+        for session_id, deadline in list(remaining.items()):
+            work += 1
+            if deadline - now <= 0:
+                lateness.append(now - deadline)
+                del remaining[session_id]
+    return work, lateness
+
+def heap_driven(deadlines: dict, start: float):
+    """New behaviour: wake at the next deadline, pop only what is due"""
+    queue = DeadlineQueue()
+    for session_id, deadline in deadlines.items():
+        queue.schedule(session_id, deadline)
+
+    # 10% of sessions get extended once
+    for session_id in random.sample(list(deadlines), SESSIONS // 10):
+        queue.schedule(session_id, deadlines[session_id] + 30 * 60)
+
+    work = 0
+    while True:
+        next_deadline = queue.next_deadline()
+        if next_deadline is None or next_deadline > start + SIMULATED_SECONDS + 1800:
+            break
+        due = queue.pop_due(next_deadline)
+        work += len(due)
+    return work
+
+class RecordingMonitor(SessionMonitor):
+    """SessionMonitor whose database-backed dispatch records lateness instead"""
+
+    def __init__(self, deadlines: dict):
+        super().__init__()
+        self.expected = deadlines
+        self.expiry_lateness: List[float] = []
+        self.warning_lateness: List[float] = []
+
+    async def _reconcile(self):
+        """No database: the heaps are filled directly"""
+
+    async def _expire_due(self, session_ids: List[str]):
+        now = time.time()
+        for session_id in session_ids:
+            self.expiry_lateness.append(now - self.expected[session_id])
+            self._untrack_session(session_id)
+
+    async def _send_warning(self, session_id: str, station_id: str, warning_level: str, remaining_seconds: int):
+        seconds = dict(_warning_levels())[warning_level]
+        self.warning_lateness.append(time.time() - (self.expected[session_id] - seconds))
+
+def _summary(lateness: List[float]) -> str:
+    lateness = sorted(lateness)
+    p = lambda q: lateness[min(len(lateness) - 1, int(q * len(lateness)))] * 1000
+    return f"p50 {p(0.5):.1f} ms, p99 {p(0.99):.1f} ms, max {lateness[-1] * 1000:.1f} ms (n={len(lateness):,})"
+
+async def live_lateness():
+    """Run the monitor loop against real deadlines and measure how late it fires"""
+    # Shrink warning thresholds to seconds so both levels fall inside the window
+    settings.SESSION_WARNING_MINUTES = 6 / 60
+    settings.SESSION_FINAL_WARNING_MINUTES = 3 / 60
+
+    start = time.time()
+    deadlines = {
+        f"session-{i}": start + random.uniform(8, 8 + LIVE_WINDOW_SECONDS)
+        for i in range(LIVE_SESSIONS)
+    }
+    monitor = RecordingMonitor(deadlines)
+    await monitor.start()
+    for session_id, deadline in deadlines.items():
+        monitor._track_session(session_id, "station", datetime.fromtimestamp(deadline, tz=timezone.utc))
+
+    while len(monitor.expiry_lateness) < LIVE_SESSIONS and time.time() < start + LIVE_WINDOW_SECONDS + 20:
+        await asyncio.sleep(0.5)
+    await monitor.stop()
+    return monitor
+
+def main():
+    random.seed(42)
+    start = time.time()
+    deadlines = build_deadlines(start)
+
+    t0 = time.process_time()
+    scan_work, lateness = full_scan(deadlines, start)
+    scan_cpu = time.process_time() - t0
+
+    t0 = time.process_time()
+    queue = DeadlineQueue()
+    for session_id, deadline in deadlines.items():
+        queue.schedule(session_id, deadline)
+    build_cpu = time.process_time() - t0
+
+    t0 = time.process_time()
+    heap_work = heap_driven(deadlines, start)
+    heap_cpu = time.process_time() - t0
+
+    print(f"Active sessions:           {SESSIONS}")
+    print(f"Simulated window:          {SIMULATED_SECONDS // 3600} h")
+    print(f"Full scan session checks:  {scan_work:,} ({scan_cpu:.2f}s CPU, "
+          f"{SIMULATED_SECONDS // TICK_SECONDS:,} DB loads of all active sessions)")
+    print(f"Full scan mean lateness:   {sum(lateness) / len(lateness):.2f}s "
+          f"(max {max(lateness):.2f}s)")
+    print(f"Heap build (10k schedule): {build_cpu * 1000:.1f} ms CPU")
+    print(f"Heap expiries processed:   {heap_work:,} ({heap_cpu:.2f}s CPU, incl. build and 1k extensions)")
+
+    print(f"\nLive SessionMonitor run:   {LIVE_SESSIONS:,} sessions over {LIVE_WINDOW_SECONDS}s")
+    monitor = asyncio.run(live_lateness())
+    print(f"Expiry lateness:           {_summary(monitor.expiry_lateness)}")
+    print(f"Warning lateness:          {_summary(monitor.warning_lateness)}")
+
+if __name__ == "__main__":
+    main()
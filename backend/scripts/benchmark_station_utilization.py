@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-station utilization queries vs one grouped query
+
+Builds a synthetic dataset (50 stations, 1M sessions over 60 days, a
+payment per session, 95% completed) in a throwaway schema of DATABASE_URL,
+rebuilds analytics_hourly from it with AnalyticsRollup, then times the old
+N+1 pattern (one aggregate join per station), the single grouped join over
+sessions and payments, and the grouped read of the hourly facts that
+AnalyticsService.get_station_utilization now serves (called below its result
+cache). The schema is dropped afterwards; existing tables are never touched.
+
+Usage: python scripts/benchmark_station_utilization.py [sessions]
+"""
+import asyncio
+import re
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import text, event
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+
+from app.core.config import settings
+from app.services.analytics_rollup import AnalyticsRollup
+from app.services.analytics_service import AnalyticsService
+
+SCHEMA = "bench_utilization"
+STATIONS = 50
+SESSIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+ROUNDS = 5
+
+FACT_TABLES = Path(__file__).parent.parent / "migrations" / "create_analytics_hourly.sql"
+
+# Mirrors the columns and indexes the analytics queries and the rollup touch
+SETUP = [
+    f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE",
+    f"CREATE SCHEMA {SCHEMA}",
+    f"""
+    CREATE TABLE {SCHEMA}.stations (
+        id UUID PRIMARY KEY,
+        name VARCHAR(100) NOT NULL UNIQUE
+    )
+    """,
+    f"""
+    CREATE TABLE {SCHEMA}.payments (
+        id UUID PRIMARY KEY,
+        amount NUMERIC(10, 2) NOT NULL,
+        status VARCHAR(20) NOT NULL,
+        station_id UUID,
+        created_at TIMESTAMP WITH TIME ZONE
+    )
+    """,
+    f"""
+    CREATE TABLE {SCHEMA}.sessions (
+        id UUID PRIMARY KEY,
+        station_id UUID NOT NULL,
+        started_at TIMESTAMP WITH TIME ZONE NOT NULL,
+        duration_minutes INTEGER NOT NULL,
+        extended_minutes INTEGER NOT NULL DEFAULT 0,
+        payment_id UUID,
+        status VARCHAR(20) NOT NULL DEFAULT 'EXPIRED',
+        user_name VARCHAR(255)
+    )
+    """,
+    f"CREATE INDEX ON {SCHEMA}.sessions(station_id)",
+    f"""
+    INSERT INTO {SCHEMA}.stations (id, name)
+    SELECT gen_random_uuid(), 'PC-' || lpad(n::text, 2, '0')
+    FROM generate_series(1, {STATIONS}) n
+    """,
+    f"""
+    INSERT INTO {SCHEMA}.payments (id, amount, status)
+    SELECT gen_random_uuid(), (5 + random() * 20)::numeric(10, 2),
+           CASE WHEN random() < 0.95 THEN 'COMPLETED' ELSE 'REFUNDED' END
+    FROM generate_series(1, {SESSIONS})
+    """,
+    f"""
+    WITH ids AS (SELECT array_agg(id ORDER BY name) AS station_ids FROM {SCHEMA}.stations)
+    INSERT INTO {SCHEMA}.sessions (id, station_id, started_at, duration_minutes, extended_minutes, payment_id)
+    SELECT gen_random_uuid(),
+           ids.station_ids[1 + p.n % {STATIONS}],
+           now() - random() * interval '60 days',
+           (30 + floor(random() * 4) * 30)::int,
+           CASE WHEN random() < 0.1 THEN 30 ELSE 0 END,
+           p.id
+    FROM (SELECT id, row_number() OVER () AS n FROM {SCHEMA}.payments) p, ids
+    """,
+    f"""
+    UPDATE {SCHEMA}.payments p
+    SET station_id = s.station_id, created_at = s.started_at
+    FROM {SCHEMA}.sessions s
+    WHERE s.payment_id = p.id
+    """,
+    f"ANALYZE {SCHEMA}.stations",
+    f"ANALYZE {SCHEMA}.payments",
+    f"ANALYZE {SCHEMA}.sessions",
+]
+
+def fact_table_ddl() -> list:
+    """The analytics_hourly migration, one statement at a time"""
+    lines = [line for line in FACT_TABLES.read_text().splitlines() if not line.lstrip().startswith("--")]
+    # Statements end at a semicolon closing a line (the COMMENT text contains one)
+    return [statement.strip() for statement in re.split(r";\s*$", "\n".join(lines), flags=re.M) if statement.strip()]
+
+# The per-station query the service used to run once per station
+PER_STATION = text("""
+    SELECT
+        COUNT(*) as total_sessions,
+        SUM(duration_minutes + extended_minutes) as total_minutes,
+        AVG(duration_minutes + extended_minutes) as avg_duration,
+        COALESCE(SUM(p.amount), 0) as revenue
+    FROM sessions s
+    LEFT JOIN payments p ON s.payment_id = p.id AND p.status = 'COMPLETED'
+    WHERE s.station_id = :station_id
+        AND s.started_at >= :start_date
+""")
+
+async def n_plus_one(db: AsyncSession) -> int:
+    start_date = datetime.now(timezone.utc) - timedelta(days=30)
+    result = await db.execute(text("SELECT id FROM stations ORDER BY name"))
+    station_ids = [row.id for row in result]
+    for station_id in station_ids:
+        await db.execute(PER_STATION, {'station_id': station_id, 'start_date': start_date})
+    return len(station_ids) + 1
+
+# The grouped query the service ran before it read the hourly facts
+GROUPED = text("""
+    SELECT
+        st.id,
+        st.name,
+        COALESCE(m.total_sessions, 0) as total_sessions,
+        m.total_minutes,
+        m.avg_duration,
+        COALESCE(m.revenue, 0) as revenue
+    FROM stations st
+    LEFT JOIN (
+        SELECT
+            s.station_id,
+            COUNT(*) as total_sessions,
+            SUM(duration_minutes + extended_minutes) as total_minutes,
+            AVG(duration_minutes + extended_minutes) as avg_duration,
+            COALESCE(SUM(p.amount), 0) as revenue
+        FROM sessions s
+        LEFT JOIN payments p ON s.payment_id = p.id AND p.status = 'COMPLETED'
+        WHERE s.started_at >= :start_date
+        GROUP BY s.station_id
+    ) m ON m.station_id = st.id
+    ORDER BY st.name
+""")
+
+async def grouped(db: AsyncSession) -> int:
+    start_date = datetime.now(timezone.utc) - timedelta(days=30)
+    await db.execute(GROUPED, {'start_date': start_date})
+    return 1
+
+async def hourly_facts(db: AsyncSession) -> int:
+    # Below get_station_utilization's cache, so every round hits the database
+    rows = await AnalyticsService(db)._get_all_station_metrics()
+    assert len(rows) == STATIONS
+    return 1
+
+async def measure(engine, fn) -> tuple:
+    timings = []
+    queries = 0
+    for _ in range(ROUNDS):
+        async with AsyncSession(engine) as db:
+            start = time.perf_counter()
+            queries = await fn(db)
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2], queries
+
+async def main():
+    engine = create_async_engine(settings.DATABASE_URL)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def use_bench_schema(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"SET search_path TO {SCHEMA}, public")
+        cursor.close()
+
+    try:
+        print(f"Building {STATIONS} stations / {SESSIONS:,} sessions in schema {SCHEMA}...")
+        start = time.perf_counter()
+        async with engine.begin() as conn:
+            for statement in SETUP + fact_table_ddl():
+                await conn.execute(text(statement))
+        print(f"✓ Dataset ready in {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        async with AsyncSession(engine) as db:
+            await AnalyticsRollup(db).rebuild()
+            await db.commit()
+        async with engine.begin() as conn:
+            await conn.execute(text(f"ANALYZE {SCHEMA}.analytics_hourly"))
+        print(f"✓ Hourly facts rebuilt in {time.perf_counter() - start:.1f}s")
+
+        before, before_queries = await measure(engine, n_plus_one)
+        after, after_queries = await measure(engine, grouped)
+        facts, facts_queries = await measure(engine, hourly_facts)
+
+        print(f"N+1 per-station queries:  {before * 1000:8.1f} ms median ({before_queries} queries)")
+        print(f"Single grouped query:     {after * 1000:8.1f} ms median ({after_queries} query)")
+        print(f"Hourly fact table:        {facts * 1000:8.1f} ms median ({facts_queries} query)")
+        print(f"Speedup (grouped):        {before / after:8.1f}x")
+        print(f"Speedup (hourly facts):   {before / facts:8.1f}x")
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -21,6 +21,10 @@ async def create_tables():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     print("✓ Tables created successfully")
+    
+    from app.scheduler.event_maintenance import event_maintenance
+    created = await event_maintenance.ensure_partitions()
+    print(f"✓ Event partitions ready ({len(created)} created)")
 
 async def create_admin_user():
     """Create default admin user"""
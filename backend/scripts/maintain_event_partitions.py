@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Run events table partition maintenance once
+
+Creates upcoming monthly partitions and rolls up/removes partitions past
+EVENT_RETENTION_DAYS. The backend does this periodically on its own; use
+this from cron when the backend isn't running or to apply a new retention
+setting immediately.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.core.database import engine
+from app.scheduler.event_maintenance import event_maintenance
+
+async def main():
+    print(f"Retention: {settings.EVENT_RETENTION_DAYS} days, "
+          f"{'archive' if settings.EVENT_ARCHIVE_PARTITIONS else 'drop'} expired partitions")
+    try:
+        result = await event_maintenance.run_once()
+    finally:
+        await engine.dispose()
+    
+    print(f"✓ Created partitions: {', '.join(result['created']) or 'none'}")
+    print(f"✓ Expired partitions: {', '.join(result['expired']) or 'none'}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
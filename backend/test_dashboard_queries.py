@@ -0,0 +1,87 @@
+"""
+Regression test: the dashboard snapshot issues the same number of queries
+however many stations there are
+
+Runs against the database in DATABASE_URL inside a transaction that is
+rolled back; skipped if the database is unreachable.
+
+    pytest test_dashboard_queries.py
+"""
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import Base, engine
+from app.models.session import Session, SessionStatus
+from app.models.station import ControlMethod, Station, StationStatus, StationType
+from app.services.dashboard_service import DashboardService
+
+
+async def _add_stations(db: AsyncSession, count: int):
+    """Add stations, every other one with an active session"""
+    now = datetime.now(timezone.utc)
+    for i in range(count):
+        station = Station(
+            name=f"querycount-{uuid.uuid4().hex[:12]}",
+            station_type=StationType.PC,
+            control_method=ControlMethod.AGENT,
+            status=StationStatus.ONLINE,
+        )
+        db.add(station)
+        await db.flush()
+        if i % 2 == 0:
+            db.add(Session(
+                station_id=station.id,
+                station_name=station.name,
+                started_at=now,
+                scheduled_end_at=now + timedelta(minutes=60),
+                duration_minutes=60,
+                status=SessionStatus.ACTIVE,
+            ))
+    await db.flush()
+
+
+async def _count_snapshot_queries(db: AsyncSession) -> int:
+    """Build a snapshot and return the number of statements it executed"""
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    try:
+        snapshot = await DashboardService(db).get_snapshot()
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+    assert snapshot["total_stations"] >= 1
+    return len(statements)
+
+
+@pytest.mark.asyncio
+async def test_snapshot_query_count_is_constant():
+    try:
+        conn = await engine.connect()
+    except Exception as e:
+        pytest.skip(f"Database unavailable: {e}")
+
+    transaction = await conn.begin()
+    try:
+        await conn.run_sync(Base.metadata.create_all)
+        db = AsyncSession(bind=conn, expire_on_commit=False)
+
+        await _add_stations(db, 1)
+        one_station = await _count_snapshot_queries(db)
+
+        await _add_stations(db, 49)
+        many_stations = await _count_snapshot_queries(db)
+
+        await db.close()
+
+        assert one_station == many_stations
+    finally:
+        await transaction.rollback()
+        await conn.close()
@@ -0,0 +1,80 @@
+"""
+Regression test: a principal loaded before another worker invalidated the
+user is not written back to the shared Redis copy
+
+Runs against the Redis in REDIS_URL; skipped if Redis is unreachable.
+
+    pytest test_principal_cache.py
+"""
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from app.core.principal_cache import PrincipalCache
+from app.core.redis import redis_manager
+from app.models.user import MembershipTier, Role, User
+
+
+def _user(username: str, role: Role) -> User:
+    return User(
+        id=uuid.uuid4(),
+        username=username,
+        role=role,
+        membership_tier=MembershipTier.BASIC,
+        balance=Decimal("0"),
+        is_active=True,
+        created_at=datetime.now(timezone.utc),
+    )
+
+
+async def _connect():
+    await redis_manager.connect()
+    if not redis_manager.is_connected:
+        pytest.skip("Redis unavailable")
+
+
+@pytest.mark.asyncio
+async def test_lookup_racing_invalidation_is_not_shared():
+    await _connect()
+    sub = f"principal-race-{uuid.uuid4().hex[:12]}"
+    worker_a, worker_b, worker_c = PrincipalCache(), PrincipalCache(), PrincipalCache()
+    try:
+        # Worker A starts a lookup and reads the user as ADMIN...
+        generation = await worker_a.generation(sub)
+        stale = _user(sub, Role.ADMIN)
+
+        # ...worker B demotes the user before A finishes...
+        await worker_b.invalidate(sub)
+
+        # ...and A's bus message hasn't arrived when it caches the result
+        await worker_a.set(sub, 1, stale, generation)
+
+        assert await redis_manager.get(f"principal:{sub}") is None
+        assert await worker_c.get(sub, 1) is None
+    finally:
+        await redis_manager.delete(f"principal:{sub}")
+        await redis_manager.delete(f"principal_gen:{sub}")
+        await redis_manager.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_lookup_without_invalidation_is_shared():
+    await _connect()
+    sub = f"principal-share-{uuid.uuid4().hex[:12]}"
+    worker_a, worker_b = PrincipalCache(), PrincipalCache()
+    try:
+        await worker_b.invalidate(sub)
+
+        # A lookup that starts after the invalidation is cached for everyone
+        generation = await worker_a.generation(sub)
+        await worker_a.set(sub, 1, _user(sub, Role.STAFF), generation)
+
+        cached = await worker_b.get(sub, 1)
+        assert cached is not None
+        assert cached.role == Role.STAFF
+    finally:
+        await redis_manager.delete(f"principal:{sub}")
+        await redis_manager.delete(f"principal_gen:{sub}")
+        await redis_manager.disconnect()
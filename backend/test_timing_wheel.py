@@ -0,0 +1,92 @@
+"""
+TimingWheel: keys fire once, in the sweep after their tick has elapsed,
+however they were moved or how long the gap between sweeps was
+
+    pytest test_timing_wheel.py
+"""
+from app.scheduler.timing_wheel import TimingWheel
+
+
+def test_key_fires_after_its_tick_elapses():
+    wheel = TimingWheel()
+    wheel.schedule("a", 100.5)
+
+    # Rounded up to tick 101, which has only elapsed once 101 is swept
+    assert wheel.pop_due(100.9) == []
+    assert wheel.pop_due(101.0) == ["a"]
+    assert "a" not in wheel
+    assert wheel.pop_due(200.0) == []
+
+
+def test_reschedule_to_later_moves_the_key():
+    wheel = TimingWheel()
+    wheel.schedule("a", 110)
+    wheel.schedule("a", 130)
+
+    assert len(wheel) == 1
+    assert wheel.pop_due(120) == []
+    assert wheel.pop_due(130) == ["a"]
+
+
+def test_reschedule_to_earlier_moves_the_key():
+    wheel = TimingWheel()
+    wheel.schedule("a", 130)
+    wheel.schedule("a", 110)
+
+    assert wheel.pop_due(115) == ["a"]
+    assert wheel.pop_due(130) == []
+
+
+def test_cancel_removes_the_key():
+    wheel = TimingWheel()
+    wheel.schedule("a", 110)
+    wheel.schedule("b", 110)
+    wheel.cancel("a")
+    wheel.cancel("missing")
+
+    assert "a" not in wheel
+    assert wheel.pop_due(120) == ["b"]
+    assert len(wheel) == 0
+
+
+def test_deadline_in_a_swept_tick_fires_on_next_sweep():
+    wheel = TimingWheel()
+    wheel.schedule("a", 100)
+    assert wheel.pop_due(150) == ["a"]
+
+    # Already in the past relative to the cursor: clamped, not lost
+    wheel.schedule("b", 120)
+    assert "b" in wheel
+    assert wheel.pop_due(151) == ["b"]
+
+
+def test_first_deadline_already_past_fires_on_first_sweep():
+    wheel = TimingWheel()
+    wheel.schedule("a", 90)
+
+    assert wheel.pop_due(100) == ["a"]
+
+
+def test_long_gap_between_sweeps_returns_every_due_key():
+    wheel = TimingWheel()
+    wheel.schedule("a", 100)
+    wheel.schedule("b", 5_000)
+    wheel.schedule("c", 1_000_000)
+    wheel.schedule("d", 2_000_000)
+
+    # Far more elapsed ticks than occupied slots
+    assert sorted(wheel.pop_due(1_500_000)) == ["a", "b", "c"]
+    assert len(wheel) == 1
+
+    # Cursor moved past the gap: an old deadline is clamped to the next sweep
+    wheel.schedule("e", 200)
+    assert wheel.pop_due(1_500_001) == ["e"]
+    assert wheel.pop_due(2_000_000) == ["d"]
+
+
+def test_fractional_resolution():
+    wheel = TimingWheel(resolution=0.5)
+    wheel.schedule("a", 10.2)
+
+    assert wheel.pop_due(10.4) == []
+    assert wheel.pop_due(10.5) == ["a"]
@@ -49,8 +49,8 @@ export default function Dashboard() {
 
   const handleSessionUpdate = useCallback((data: any) => {
     console.log('Session update received:', data)
-    // Reload all sessions to get fresh data with station mapping
-    sessionsAPI.getAll().then(sessionsData => {
+    // Reload active sessions to get fresh data with station mapping
+    sessionsAPI.getAll({ status: 'ACTIVE' }).then(sessionsData => {
       const sessionsWithStations = sessionsData.map(session => ({
         ...session,
         station: stations.find((s: Station) => s.id === session.station_id)
@@ -64,6 +64,16 @@ export default function Dashboard() {
     setStats(data)
   }, [setStats])
 
+  const handleSessionCommandResult = useCallback((data: any) => {
+    if (data.ok) return
+    // The agent didn't confirm a session start/extend/end/expiry
+    const station = stations.find((s: Station) => s.id === data.station_id)
+    const action = String(data.command).replace('session_', '')
+    toast.error(`${station?.name || 'Station'} did not confirm session ${action} (${data.status})`, {
+      id: `session-command-${data.id}`
+    })
+  }, [stations])
+
   const handleConnect = useCallback(() => {
     console.log('✅ Dashboard connected to real-time updates')
     // Only show toast once, not on every reconnect
@@ -81,6 +91,7 @@ export default function Dashboard() {
     onStationUpdate: handleStationUpdate,
     onSessionUpdate: handleSessionUpdate,
     onStatsUpdate: handleStatsUpdate,
+    onSessionCommandResult: handleSessionCommandResult,
     onConnect: handleConnect,
     onDisconnect: handleDisconnect,
   })
@@ -100,7 +111,7 @@ export default function Dashboard() {
     try {
       const [stationsData, sessionsData, statsData] = await Promise.all([
         stationsAPI.getAll().catch(() => []),
-        sessionsAPI.getAll().catch(() => []),
+        sessionsAPI.getAll({ status: 'ACTIVE' }).catch(() => []),
         dashboardAPI.getStats().catch(() => ({
           total_stations: 0,
           active_sessions: 0,
@@ -10,6 +10,7 @@ interface UseWebSocketOptions {
   onStationUpdate?: (data: any) => void
   onSessionUpdate?: (data: any) => void
   onStatsUpdate?: (data: any) => void
+  onSessionCommandResult?: (data: any) => void
   onConnect?: () => void
   onDisconnect?: () => void
   onError?: (error: Event) => void
@@ -65,6 +66,9 @@ export function useWebSocket(url: string, options: UseWebSocketOptions = {}) {
             case 'stats_update':
               optionsRef.current.onStatsUpdate?.(message.data)
               break
+            case 'session_command_result':
+              optionsRef.current.onSessionCommandResult?.(message.data)
+              break
             case 'server_shutdown':
               console.warn('⚠️ Server is shutting down')
               break
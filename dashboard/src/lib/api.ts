@@ -1,5 +1,5 @@
 import axios from 'axios'
-import type { Station, Session, User, DashboardStats } from '@/types'
+import type { Station, Session, SessionStatus, User, DashboardStats } from '@/types'
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000/api/v1'
 
@@ -107,9 +107,16 @@ export const stationsAPI = {
 }
 
 export const sessionsAPI = {
-  getAll: async (): Promise<Session[]> => {
-    const response = await api.get('/sessions')
-    return response.data
+  // Pages are capped server-side; follow X-Next-Cursor until the last one
+  getAll: async (params: { status?: SessionStatus; station_id?: string } = {}): Promise<Session[]> => {
+    const sessions: Session[] = []
+    let cursor: string | undefined
+    do {
+      const response = await api.get('/sessions', { params: { ...params, limit: 500, cursor } })
+      sessions.push(...response.data)
+      cursor = response.headers['x-next-cursor']
+    } while (cursor)
+    return sessions
   },
   getById: async (id: string): Promise<Session> => {
     const response = await api.get(`/sessions/${id}`)
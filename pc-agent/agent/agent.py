@@ -49,6 +49,7 @@ class PCAgent:
         self.ws_client.on_message("session_start", self._handle_session_start)
         self.ws_client.on_message("session_extended", self._handle_session_extend)
         self.ws_client.on_message("session_end", self._handle_session_end)
+        self.ws_client.on_message("session_expired", self._handle_session_expired)
         self.ws_client.on_message("server_hello", self._handle_server_hello)
         self.ws_client.on_message("heartbeat_ack", self._handle_heartbeat_ack)
         self.ws_client.on_message("lock_station", self._handle_lock_station)
@@ -141,6 +142,30 @@ class PCAgent:
                 "session_id": data.get("id")
             })
     
+    async def _handle_session_expired(self, message: Dict[str, Any]):
+        """Handle session expired command (the server reached the deadline)"""
+        logger.info("Received session expired command")
+        data = message.get("data", {})
+
+        try:
+            success = self.session_manager.expire_session(data.get("session_id"))
+
+            # Update overlay
+            if self.kiosk_overlay:
+                self.kiosk_overlay.update_session(self.session_manager.get_session_status())
+
+            await self.ws_client.send_message("session_event", {
+                "event": "session_expired",
+                "success": success,
+                "session_id": data.get("session_id")
+            })
+        except Exception as e:
+            logger.error(f"Error handling session expired: {e}")
+            await self.ws_client.send_message("error", {
+                "message": f"Failed to expire session: {str(e)}",
+                "session_id": data.get("session_id")
+            })
+
     async def _handle_lock_station(self, message: Dict[str, Any]):
         """Handle lock station command"""
         logger.info("Received lock station command")
@@ -1,6 +1,7 @@
 """Session management - tracks active sessions and enforces time limits
 """
 import asyncio
+import contextvars
 import logging
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any
@@ -17,6 +18,7 @@ class SessionManager:
         self.config = config
         self.current_session: Optional[Dict[str, Any]] = None
         self.session_timer_task: Optional[asyncio.Task] = None
+        self.expiry_task: Optional[asyncio.Task] = None
         self.warning_shown = False
         self.lock_overlay: Optional[LockOverlay] = None
         
@@ -58,10 +60,19 @@ class SessionManager:
                 f"Your gaming session has started. Duration: {self.current_session['duration_minutes']} minutes"
             )
             
+            # A new session cancels the previous one's pending lock
+            if self.expiry_task:
+                self.expiry_task.cancel()
+                self.expiry_task = None
+
             # Start session timer
             if self.session_timer_task:
                 self.session_timer_task.cancel()
-            self.session_timer_task = asyncio.create_task(self._session_timer())
+            # Fresh context: the timer outlives the command that started it and
+            # must not echo that command's request_id on later messages
+            self.session_timer_task = contextvars.Context().run(
+                asyncio.create_task, self._session_timer()
+            )
             
             return True
             
@@ -180,30 +191,7 @@ class SessionManager:
                 # Session expired
                 if time_remaining <= 0:
                     logger.warning("Session time expired")
-                    self.end_session("time_expired")
-                    
-                    # Show lock overlay instead of logout if auto_lock is enabled
-                    if self.config.get('features.auto_lock', True):
-                        grace_period = self.config.get('session.grace_period', 60)
-                        await asyncio.sleep(grace_period)
-                        
-                        logger.info("Showing lock overlay with input blocking")
-                        
-                        # Show fullscreen lock overlay (blocks keyboard/mouse)
-                        if self.lock_overlay:
-                            self.lock_overlay.show()
-                        
-                        # Optionally lock Windows workstation (requires password to unlock)
-                        # Disabled by default - overlay with input blocking is sufficient
-                        # self.system_control.lock_workstation()
-                    elif self.config.get('features.auto_logout', False):
-                        # Fallback to logout if auto_lock is disabled but auto_logout is enabled
-                        grace_period = self.config.get('session.grace_period', 60)
-                        await asyncio.sleep(grace_period)
-                        
-                        logger.info("Logging out user after grace period")
-                        self.system_control.logout_user()
-                    
+                    self.expire_session()
                     break
                     
         except asyncio.CancelledError:
@@ -211,6 +199,57 @@ class SessionManager:
         except Exception as e:
             logger.error(f"Error in session timer: {e}")
     
+    def expire_session(self, session_id: Optional[str] = None) -> bool:
+        """
+        End the session because its time ran out, then lock after the grace period
+
+        Called by the session timer or by the server's session_expired
+        command, whichever comes first. Returns True once the session is no
+        longer running.
+        """
+        if not self.current_session or (session_id and str(self.current_session['id']) != session_id):
+            logger.info(f"Session {session_id} already ended")
+            return True
+
+        if not self.end_session("time_expired"):
+            return False
+
+        # Own task: ending the session cancels the timer that may have called
+        # us, and the fresh context keeps a server command's request_id out
+        self.expiry_task = contextvars.Context().run(
+            asyncio.create_task, self._lock_after_grace()
+        )
+        return True
+
+    async def _lock_after_grace(self):
+        """Lock (or log out) once the expired session's grace period is over"""
+        try:
+            grace_period = self.config.get('session.grace_period', 60)
+
+            # Show lock overlay instead of logout if auto_lock is enabled
+            if self.config.get('features.auto_lock', True):
+                await asyncio.sleep(grace_period)
+
+                logger.info("Showing lock overlay with input blocking")
+
+                # Show fullscreen lock overlay (blocks keyboard/mouse)
+                if self.lock_overlay:
+                    self.lock_overlay.show()
+
+                # Optionally lock Windows workstation (requires password to unlock)
+                # Disabled by default - overlay with input blocking is sufficient
+                # self.system_control.lock_workstation()
+            elif self.config.get('features.auto_logout', False):
+                # Fallback to logout if auto_lock is disabled but auto_logout is enabled
+                await asyncio.sleep(grace_period)
+
+                logger.info("Logging out user after grace period")
+                self.system_control.logout_user()
+        except asyncio.CancelledError:
+            logger.info("Post-session lock cancelled")
+        except Exception as e:
+            logger.error(f"Error locking after session: {e}")
+
     def get_session_status(self) -> Dict[str, Any]:
         """Get current session status"""
         if not self.current_session:
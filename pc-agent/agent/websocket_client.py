@@ -2,6 +2,7 @@
 WebSocket client for backend communication
 """
 import asyncio
+import contextvars
 import json
 import logging
 import websockets
@@ -10,6 +11,12 @@ from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# request_id of the server command being handled; echoed on every message
+# sent while handling it so the server can match the reply to its call
+current_request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "current_request_id", default=None
+)
+
 class WebSocketClient:
     """WebSocket client for agent-backend communication"""
     
@@ -82,6 +89,9 @@ class WebSocketClient:
                 "timestamp": datetime.utcnow().isoformat(),
                 "data": data
             }
+            request_id = current_request_id.get()
+            if request_id:
+                message["request_id"] = request_id
             
             await self.websocket.send(json.dumps(message))
             logger.debug(f"Sent message: {message_type}")
@@ -133,7 +143,11 @@ class WebSocketClient:
                 message_type = message.get('type')
                 if message_type in self.message_handlers:
                     handler = self.message_handlers[message_type]
-                    await handler(message)
+                    token = current_request_id.set(message.get('request_id'))
+                    try:
+                        await handler(message)
+                    finally:
+                        current_request_id.reset(token)
                 else:
                     logger.warning(f"No handler for message type: {message_type}")
                 